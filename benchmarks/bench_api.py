@@ -0,0 +1,149 @@
+"""
+Prueba de carga de la API de consultas (src/api.py).
+
+Genera un libro sintético, lo transforma y lo guarda en un almacén temporal,
+levanta la API en un hilo y la consulta con --conexiones clientes concurrentes
+(keep-alive) durante --segundos, con una mezcla de pedidos de series, último
+mes y rankings. Informa pedidos por segundo y latencias p50/p99, en total y
+por endpoint. Con --revalidar los clientes envían If-None-Match con el ETag
+recibido, como haría un navegador o una caché intermedia.
+
+Uso:
+    python -m benchmarks.bench_api --anios 10 --conexiones 32 --segundos 10
+"""
+import argparse
+import asyncio
+import logging
+import os
+import random
+import statistics
+import tempfile
+import threading
+import time
+from typing import Dict, List, Tuple
+from urllib.parse import urlencode
+
+import pandas as pd
+
+from benchmarks.libro_sintetico import generar_libro
+from src.almacen import AlmacenPrecios
+from src.api import DatosConsulta, ServidorConsultas
+from src.pipeline import transformar_hojas
+from src.transformaciones import TransformadorDatos
+
+
+def preparar_almacen(directorio: str, anios: int) -> str:
+    ruta_libro = os.path.join(directorio, "libro.xls")
+    generar_libro(ruta_libro, anios=anios, inflacion=0.02)
+    hojas = {
+        hoja: df for hoja, df in pd.read_excel(ruta_libro, sheet_name=None).items()
+        if TransformadorDatos.es_hoja_compatible(df)
+    }
+    ruta = os.path.join(directorio, "precios.sqlite")
+    AlmacenPrecios(ruta).guardar(transformar_hojas(hojas, workers=1))
+    return ruta
+
+
+def pedidos(datos: DatosConsulta) -> List[str]:
+    """Mezcla de consultas: una serie por producto y región, el último mes y rankings."""
+    regiones = datos.precios["Región"].cat.remove_unused_categories().cat.categories
+    productos = datos.precios["Productos seleccionados"].cat.remove_unused_categories().cat.categories
+    urls = [f"/series?{urlencode({'producto': p, 'region': r})}" for p in productos for r in regiones]
+    urls += ["/ultimo", "/meta"]
+    urls += [f"/ranking?nivel={nivel}&variacion={variacion}&orden={orden}"
+             for nivel in ("region", "producto", "region_producto")
+             for variacion in ("var_mensual", "var_interanual") for orden in ("asc", "desc")]
+    return urls
+
+
+def levantar(datos: DatosConsulta) -> int:
+    """Levanta la API en un hilo con su propio event loop y devuelve el puerto."""
+    listo = threading.Event()
+    puerto: List[int] = []
+
+    def al_escuchar(p: int) -> None:
+        puerto.append(p)
+        listo.set()
+
+    hilo = threading.Thread(
+        target=lambda: asyncio.run(ServidorConsultas(datos).servir("127.0.0.1", 0, al_escuchar)), daemon=True
+    )
+    hilo.start()
+    listo.wait(30)
+    return puerto[0]
+
+
+async def cliente(puerto: int, urls: List[str], fin: float, revalidar: bool,
+                  muestras: List[Tuple[str, float, int]]) -> None:
+    reader, writer = await asyncio.open_connection("127.0.0.1", puerto)
+    etags: Dict[str, str] = {}
+    try:
+        while time.perf_counter() < fin:
+            url = random.choice(urls)
+            cabeceras = f"If-None-Match: {etags[url]}\r\n" if revalidar and url in etags else ""
+            inicio = time.perf_counter()
+            writer.write(f"GET {url} HTTP/1.1\r\nHost: localhost\r\n{cabeceras}\r\n".encode("utf-8"))
+            estado = int((await reader.readline()).split()[1])
+            largo = 0
+            while True:
+                linea = await reader.readline()
+                if linea == b"\r\n":
+                    break
+                nombre, _, valor = linea.decode("latin-1").partition(":")
+                if nombre.lower() == "content-length":
+                    largo = int(valor)
+                elif nombre.lower() == "etag":
+                    etags[url] = valor.strip()
+            await reader.readexactly(largo)
+            muestras.append((url.split("?")[0], time.perf_counter() - inicio, estado))
+    finally:
+        writer.close()
+
+
+async def cargar(puerto: int, urls: List[str], conexiones: int, segundos: float,
+                 revalidar: bool) -> List[Tuple[str, float, int]]:
+    muestras: List[Tuple[str, float, int]] = []
+    fin = time.perf_counter() + segundos
+    await asyncio.gather(*(cliente(puerto, urls, fin, revalidar, muestras) for _ in range(conexiones)))
+    return muestras
+
+
+def percentil(valores: List[float], p: float) -> float:
+    return statistics.quantiles(valores, n=100, method="inclusive")[int(p) - 1] if len(valores) > 1 else valores[0]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--anios", type=int, default=10)
+    parser.add_argument("--conexiones", type=int, default=32)
+    parser.add_argument("--segundos", type=float, default=10.0)
+    parser.add_argument("--revalidar", action="store_true", help="Enviar If-None-Match con el último ETag")
+    args = parser.parse_args()
+
+    logging.disable(logging.WARNING)
+    with tempfile.TemporaryDirectory() as directorio:
+        inicio = time.perf_counter()
+        datos = DatosConsulta(preparar_almacen(directorio, args.anios))
+        print(f"Almacén de {args.anios} años: {len(datos.precios)} precios "
+              f"({time.perf_counter() - inicio:.1f}s de preparación)")
+        urls = pedidos(datos)
+        puerto = levantar(datos)
+
+        muestras = asyncio.run(cargar(puerto, urls, args.conexiones, args.segundos, args.revalidar))
+
+    estados = pd.Series([estado for _, _, estado in muestras]).value_counts().to_dict()
+    print(f"{len(muestras)} pedidos en {args.segundos:.0f}s con {args.conexiones} conexiones: "
+          f"{len(muestras) / args.segundos:,.0f} pedidos/s | estados {estados} | "
+          f"caché {datos.responder.cache_info().hits} aciertos, {datos.responder.cache_info().misses} fallos\n")
+    print(f"{'Endpoint':<12} {'Pedidos':>8} {'p50':>9} {'p99':>9}")
+    grupos: Dict[str, List[float]] = {}
+    for endpoint, segundos, _ in muestras:
+        grupos.setdefault(endpoint, []).append(segundos)
+    grupos["total"] = [segundos for _, segundos, _ in muestras]
+    for endpoint, valores in grupos.items():
+        print(f"{endpoint:<12} {len(valores):>8} {percentil(valores, 50) * 1000:7.2f}ms "
+              f"{percentil(valores, 99) * 1000:7.2f}ms")
+
+
+if __name__ == "__main__":
+    main()
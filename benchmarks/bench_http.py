@@ -0,0 +1,131 @@
+"""
+Cliente HTTP del scraper (src/cliente_http.py) frente a un servidor local inestable.
+
+Levanta un servidor HTTP en un hilo que simula las fallas del sitio del INDEC
+(503 transitorios, conexiones cortadas a mitad del cuerpo, respuestas que no
+llegan a tiempo y archivos demasiado grandes) y muestra, para cada caso, qué
+obtiene un requests.get suelto y qué obtiene ClienteHTTP (estado, intentos,
+bytes y tiempo). Después compara la latencia de peticiones sucesivas sin
+reutilizar conexiones y con el pool keep-alive del cliente.
+
+Uso:
+    python -m benchmarks.bench_http --peticiones 300
+"""
+import argparse
+import logging
+import statistics
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Dict
+
+import requests
+
+from src.cliente_http import ClienteHTTP, DescargaExcedida
+
+CUERPO = bytes(range(256)) * 4096  # 1 MiB
+
+
+class ServidorInestable(BaseHTTPRequestHandler):
+    """
+    Rutas /<falla>/<n>/<nombre>: las primeras n peticiones a cada ruta fallan
+    con la falla indicada y las siguientes responden bien.
+        /ok/0/...         siempre 200, con 1 KiB
+        /caido/n/...      503 con Retry-After: 0
+        /cortado/n/...    anuncia el cuerpo completo y cierra a la mitad
+        /lento/n/...      tarda 2 segundos en responder
+        /grande/0/...     anuncia y envía 4 MiB
+    """
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+    intentos: Dict[str, int] = {}
+    candado = threading.Lock()
+
+    def log_message(self, *args) -> None:
+        pass
+
+    def do_GET(self) -> None:
+        _, falla, fallas, _ = self.path.split("/", 3)
+        with self.candado:
+            intento = self.intentos[self.path] = self.intentos.get(self.path, 0) + 1
+        fallar = intento <= int(fallas)
+
+        if falla == "caido" and fallar:
+            self.send_response(503)
+            self.send_header("Retry-After", "0")
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        if falla == "lento" and fallar:
+            time.sleep(2)
+        cuerpo = {"grande": CUERPO * 4, "ok": CUERPO[:1024]}.get(falla, CUERPO)
+        self.send_response(200)
+        self.send_header("Content-Length", str(len(cuerpo)))
+        self.end_headers()
+        try:
+            if falla == "cortado" and fallar:
+                self.wfile.write(cuerpo[: len(cuerpo) // 2])
+                self.close_connection = True
+                return
+            self.wfile.write(cuerpo)
+        except ConnectionError:
+            # El cliente abandonó la respuesta (timeout o tope de tamaño)
+            self.close_connection = True
+
+
+def levantar() -> str:
+    servidor = ThreadingHTTPServer(("127.0.0.1", 0), ServidorInestable)
+    threading.Thread(target=servidor.serve_forever, daemon=True).start()
+    return f"http://127.0.0.1:{servidor.server_address[1]}"
+
+
+def probar(nombre: str, funcion: Callable[[], str]) -> None:
+    inicio = time.perf_counter()
+    try:
+        resultado = funcion()
+    except Exception as e:
+        resultado = f"{type(e).__name__}"
+    print(f"  {nombre:<12} {resultado:<48} {time.perf_counter() - inicio:6.2f}s")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--peticiones", type=int, default=300, help="Peticiones para medir la latencia")
+    args = parser.parse_args()
+
+    logging.disable(logging.WARNING)
+    base = levantar()
+    cliente = ClienteHTTP(timeout=(1.0, 1.0), espera_base=0.05, tamano_maximo=2 * 2**20)
+
+    def con_cliente(url: str) -> str:
+        with cliente.descargar(url) as respuesta:
+            registro = cliente.registros[-1]
+            return f"{respuesta.estado}, {registro['intentos']} intento(s), {respuesta.tamano} bytes"
+
+    def sin_cliente(url: str) -> str:
+        respuesta = requests.get(url, timeout=1.0)
+        return f"{respuesta.status_code}, {len(respuesta.content)} bytes"
+
+    for caso in ("caido/2", "cortado/1", "lento/1", "grande/0"):
+        print(f"\n/{caso}")
+        probar("requests.get", lambda: sin_cliente(f"{base}/{caso}/a.xls"))
+        probar("ClienteHTTP", lambda: con_cliente(f"{base}/{caso}/b.xls"))
+    try:
+        cliente.descargar(f"{base}/grande/0/c.xls")
+    except DescargaExcedida as e:
+        print(f"\nTope de tamaño: {e}")
+
+    print(f"\n{args.peticiones} peticiones GET de 1 KiB seguidas:")
+    for nombre, get in (("sin pool", lambda url: requests.get(url, timeout=5).content),
+                        ("ClienteHTTP", lambda url: cliente.get(url).content)):
+        tiempos = []
+        for i in range(args.peticiones):
+            inicio = time.perf_counter()
+            get(f"{base}/ok/0/{i}")
+            tiempos.append(time.perf_counter() - inicio)
+        print(f"  {nombre:<12} mediana {statistics.median(tiempos) * 1000:6.2f}ms  "
+              f"p99 {statistics.quantiles(tiempos, n=100)[98] * 1000:6.2f}ms")
+
+
+if __name__ == "__main__":
+    main()
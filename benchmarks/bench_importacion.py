@@ -0,0 +1,121 @@
+"""
+Tiempo de importación y arranque en frío de los comandos livianos.
+
+Ejecuta cada caso en un intérprete nuevo con `python -X importtime`, suma el
+tiempo acumulado de las importaciones de primer nivel (descontando el arranque
+del intérprete, medido con `python -c pass`) y registra qué módulos quedaron
+cargados y el pico de memoria residente del proceso. Cada caso tiene
+módulos prohibidos (dependencias pesadas que no debe cargar) y un presupuesto
+de milisegundos de importación; con --estricto el script termina con error si
+algún caso importa un módulo prohibido o supera su presupuesto (multiplicado
+por --holgura, para máquinas más lentas que la de referencia).
+
+Uso:
+    python -m benchmarks.bench_importacion --repeticiones 5
+    python -m benchmarks.bench_importacion --estricto --holgura 2
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Dict, List, Optional, Sequence, Set, Tuple
+
+# Dependencias que solo deben cargar los comandos que las usan
+PESADOS = ("pandas", "numpy", "pyarrow", "requests", "playwright", "tweepy", "dotenv", "openpyxl", "xlrd")
+SIN_DATAFRAMES = ("pandas", "numpy", "pyarrow", "playwright", "tweepy", "dotenv")
+
+# Caso: argumentos del intérprete, módulos prohibidos y presupuesto de importación en ms
+CASOS: Dict[str, Tuple[List[str], Sequence[str], float]] = {
+    "src.main --help": (["-m", "src.main", "--help"], PESADOS, 30),
+    "src.main transform --help": (["-m", "src.main", "transform", "--help"], PESADOS, 30),
+    "import src.publicar": (["-c", "import src.publicar"], PESADOS, 50),
+    "import src.planificador": (["-c", "import src.planificador"], PESADOS, 30),
+    # El chequeo de fecha del workflow mensual (python -c con IndecScraper)
+    "from src.scraper import IndecScraper": (["-c", "from src.scraper import IndecScraper"], SIN_DATAFRAMES, 120),
+    "import src.metricas": (["-c", "import src.metricas"], PESADOS, 25),
+}
+
+
+def medir(argumentos: List[str]) -> Tuple[float, float, Set[str], Optional[float]]:
+    """
+    Ejecuta el intérprete con -X importtime.
+
+    Returns:
+        Tuple[float, float, Set[str], Optional[float]]: Segundos de importación, segundos
+            de reloj del proceso, módulos importados y pico de memoria en MiB
+    """
+    with tempfile.TemporaryFile() as errores:
+        inicio = time.perf_counter()
+        proceso = subprocess.Popen(
+            [sys.executable, "-X", "importtime", *argumentos],
+            stdout=subprocess.DEVNULL, stderr=errores,
+        )
+        if hasattr(os, "wait4"):
+            _, estado, uso = os.wait4(proceso.pid, 0)
+            proceso.returncode = os.waitstatus_to_exitcode(estado) if hasattr(os, "waitstatus_to_exitcode") else estado
+            # Linux informa KiB; macOS, bytes
+            memoria = uso.ru_maxrss / (2**20 if sys.platform == "darwin" else 2**10)
+        else:
+            proceso.wait()
+            memoria = None
+        reloj = time.perf_counter() - inicio
+        errores.seek(0)
+        salida = errores.read().decode("utf-8", "replace")
+
+    if proceso.returncode != 0:
+        raise RuntimeError(f"{' '.join(argumentos)} terminó con código {proceso.returncode}:\n{salida[-2000:]}")
+    total, modulos = 0, set()
+    for linea in salida.splitlines():
+        if not linea.startswith("import time:") or "|" not in linea:
+            continue
+        _, acumulado, nombre = linea.split("|")
+        if not acumulado.strip().isdigit():
+            continue  # Encabezado
+        modulos.add(nombre.strip())
+        # Las importaciones de primer nivel no tienen sangría; su acumulado incluye a las anidadas
+        if not nombre[1:].startswith(" "):
+            total += int(acumulado)
+    return total / 1e6, reloj, modulos, memoria
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeticiones", type=int, default=5, help="Ejecuciones de cada caso (se informa la mediana)")
+    parser.add_argument("--holgura", type=float, default=1.0, help="Factor aplicado a los presupuestos")
+    parser.add_argument("--estricto", action="store_true", help="Terminar con error si algún caso falla")
+    args = parser.parse_args()
+
+    print(f"Python {sys.version.split()[0]} | {args.repeticiones} repeticiones | holgura x{args.holgura:g}")
+    base = statistics.median(medir(["-c", "pass"])[0] for _ in range(args.repeticiones))
+    print(f"Arranque del intérprete (descontado): {base * 1000:.1f}ms\n")
+    print(f"{'Caso':<40} {'Importación':>12} {'Proceso':>9} {'Memoria':>9} {'Presupuesto':>12}")
+    fallas = []
+    for caso, (argumentos, prohibidos, presupuesto) in CASOS.items():
+        medidas = [medir(argumentos) for _ in range(args.repeticiones)]
+        importacion = statistics.median(m[0] for m in medidas) - base
+        reloj = statistics.median(m[1] for m in medidas)
+        memorias = [m[3] for m in medidas if m[3] is not None]
+        cargados = sorted({modulo.split(".")[0] for m in medidas for modulo in m[2]} & set(prohibidos))
+        limite = presupuesto * args.holgura
+        linea = (f"{caso:<40} {importacion * 1000:10.1f}ms {reloj * 1000:7.0f}ms "
+                 f"{(f'{statistics.median(memorias):.0f}MiB' if memorias else '-'):>9} {limite:10.0f}ms")
+        if importacion * 1000 > limite:
+            fallas.append(caso)
+            linea += "  EXCEDIDO"
+        if cargados:
+            fallas.append(caso)
+            linea += f"  IMPORTA {', '.join(cargados)}"
+        print(linea)
+
+    if fallas:
+        print(f"\n{len(set(fallas))} caso(s) fuera de presupuesto o con importaciones pesadas: "
+              f"{', '.join(dict.fromkeys(fallas))}")
+        if args.estricto:
+            raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
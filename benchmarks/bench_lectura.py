@@ -0,0 +1,93 @@
+"""
+Benchmark de la lectura del libro de Excel.
+
+Compara, sobre un libro sintético de tamaño real, la lectura original
+(pd.read_excel con sheet_name=None, que parsea todas las hojas) con la
+lectura selectiva de IndecScraper.leer_hojas, sin caché, guardando en la
+caché de hojas y leyendo desde ella. Informa tiempo y pico de memoria (tracemalloc) de cada variante.
+
+Uso:
+    python -m benchmarks.bench_lectura --anios 9 --productos 60
+"""
+import argparse
+import io
+import logging
+import os
+import tempfile
+import time
+import tracemalloc
+
+import pandas as pd
+
+from benchmarks.libro_sintetico import generar_libro
+from src.cache import CacheHojas
+from src.scraper import IndecScraper
+
+
+def medir(nombre: str, preparar) -> pd.DataFrame:
+    """
+    Mide tiempo y pico de memoria por separado (tracemalloc distorsiona los
+    tiempos). preparar() devuelve la función a medir, con su estado inicial.
+    """
+    funcion = preparar()
+    inicio = time.perf_counter()
+    resultado = funcion()
+    duracion = time.perf_counter() - inicio
+
+    funcion = preparar()
+    tracemalloc.start()
+    funcion()
+    _, pico = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"{nombre:<42} {duracion:8.3f}s {pico / 2**20:10.1f} MiB")
+    return resultado
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--anios", type=int, default=9)
+    parser.add_argument("--productos", type=int, default=60)
+    parser.add_argument("--formato", choices=["xls", "xlsx"], default="xls")
+    args = parser.parse_args()
+
+    logging.disable(logging.WARNING)
+    with tempfile.TemporaryDirectory() as directorio:
+        ruta = os.path.join(directorio, f"libro.{args.formato}")
+        hojas = generar_libro(ruta, anios=args.anios, productos=args.productos)
+        with open(ruta, "rb") as archivo:
+            contenido = archivo.read()
+        print(f"Libro: {len(hojas)} hojas, {len(hojas['Nacional'])} filas en Nacional, "
+              f"{len(contenido) / 2**20:.1f} MiB\n")
+        print(f"{'Variante':<42} {'Tiempo':>9} {'Pico memoria':>14}")
+
+        motor = "xlrd" if args.formato == "xls" else "openpyxl"
+        original = medir(
+            "read_excel(sheet_name=None)",
+            lambda: lambda: pd.read_excel(io.BytesIO(contenido), sheet_name=None, engine=motor)["Nacional"],
+        )
+
+        def lectura_fria():
+            # Caché vacía en cada medición: parsea la hoja y la guarda
+            cache = CacheHojas(tempfile.mkdtemp(dir=directorio))
+            return lambda: IndecScraper(cache_hojas=cache).leer_hojas(contenido, ["Nacional"])["Nacional"]
+
+        cache = CacheHojas(os.path.join(directorio, "hojas"))
+        IndecScraper(cache_hojas=cache).leer_hojas(contenido, ["Nacional"])
+        selectiva = medir(
+            "leer_hojas(['Nacional'])",
+            lambda: lambda: IndecScraper().leer_hojas(contenido, ["Nacional"])["Nacional"],
+        )
+        fria = medir("leer_hojas(['Nacional']) + guardar caché", lectura_fria)
+        caliente = medir(
+            "leer_hojas(['Nacional']) desde caché",
+            lambda: lambda: IndecScraper(cache_hojas=cache).leer_hojas(contenido, ["Nacional"])["Nacional"],
+        )
+
+        pd.testing.assert_frame_equal(original, selectiva)
+        pd.testing.assert_frame_equal(original, fria)
+        pd.testing.assert_frame_equal(original, caliente)
+        print("\nResultados idénticos en todas las variantes")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+"""
+Benchmark de memoria del DataFrame transformado.
+
+Transforma un libro sintético de diez años (todas las hojas) y compara el
+esquema compacto actual (categorías, float32, int16) con el esquema anterior
+(textos como object, float64 e int64), columna por columna, junto con el
+tamaño de la exportación a Arrow y el tiempo de to_arrow().
+
+Uso:
+    python -m benchmarks.bench_memoria --anios 10 --productos 14
+"""
+import argparse
+import logging
+import os
+import tempfile
+import time
+
+import pandas as pd
+
+from benchmarks.libro_sintetico import generar_libro
+from src.pipeline import transformar_hojas
+from src.transformaciones import to_arrow
+
+
+def esquema_anterior(df: pd.DataFrame) -> pd.DataFrame:
+    """Reconstruye el DataFrame con los tipos que emitía el transformador antes."""
+    anterior = df.astype({
+        "Región": "object",
+        "Productos seleccionados": "object",
+        "Unidad de medida": "object",
+        "sheet": "object",
+        "product_id": "int64",
+    })
+    anterior["Price"] = anterior["Price"].astype("float64").round(2)
+    return anterior
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--anios", type=int, default=10)
+    parser.add_argument("--productos", type=int, default=None)
+    parser.add_argument("--inflacion", type=float, default=0.02,
+                        help="Variación mensual de los precios sintéticos")
+    args = parser.parse_args()
+
+    logging.disable(logging.WARNING)
+    with tempfile.TemporaryDirectory() as directorio:
+        ruta = os.path.join(directorio, "libro.xls")
+        generar_libro(ruta, anios=args.anios, productos=args.productos, inflacion=args.inflacion)
+        hojas = pd.read_excel(ruta, sheet_name=None)
+
+    compacto = transformar_hojas(hojas, workers=1)
+    anterior = esquema_anterior(compacto)
+
+    uso_anterior = anterior.memory_usage(deep=True, index=False)
+    uso_compacto = compacto.memory_usage(deep=True, index=False)
+    print(f"{len(compacto)} filas de {len(hojas)} hojas, {args.anios} años\n")
+    print(f"{'Columna':<26} {'Anterior':>12} {'Compacto':>12} {'Tipo compacto':>16}")
+    for columna in compacto.columns:
+        print(f"{columna:<26} {uso_anterior[columna] / 2**20:10.2f}MB {uso_compacto[columna] / 2**20:10.2f}MB "
+              f"{str(compacto[columna].dtype):>16}")
+    print(f"{'Total':<26} {uso_anterior.sum() / 2**20:10.2f}MB {uso_compacto.sum() / 2**20:10.2f}MB "
+          f"{'':>16} ({uso_anterior.sum() / uso_compacto.sum():.1f}x)")
+
+    inicio = time.perf_counter()
+    tabla = to_arrow(compacto)
+    duracion = time.perf_counter() - inicio
+    print(f"\nto_arrow(): {tabla.nbytes / 2**20:.2f}MB en {duracion * 1000:.1f}ms")
+
+    # Los precios deben seguir siendo los mismos con dos decimales
+    diferencia = (compacto["Price"].astype("float64").round(2) - anterior["Price"]).abs().max()
+    print(f"Diferencia máxima de precio tras redondear: {diferencia}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+"""
+Benchmark del relleno de precios faltantes.
+
+Compara la implementación fila a fila original de
+TransformadorDatos.fill_missing_with_adjacent con la versión vectorizada
+sobre un DataFrame melted sintético y verifica que ambas den el mismo
+resultado.
+
+Uso:
+    python -m benchmarks.bench_relleno --series 100000 --series-legado 300
+"""
+import argparse
+import logging
+import time
+
+import numpy as np
+import pandas as pd
+
+from src.transformaciones import TransformadorDatos, ESTRATEGIAS_RELLENO
+
+
+def generar_melted(series: int, meses: int = 12, faltantes: float = 0.05, semilla: int = 0) -> pd.DataFrame:
+    """
+    Genera un DataFrame con el formato de salida de realizar_melt.
+
+    Args:
+        series (int): Cantidad de series (producto, región, unidad)
+        meses (int): Meses por serie
+        faltantes (float): Proporción de precios faltantes
+        semilla (int): Semilla del generador aleatorio
+
+    Returns:
+        pd.DataFrame: DataFrame melted sintético
+    """
+    rng = np.random.default_rng(semilla)
+    regiones = np.array(['GBA', 'Pampeana', 'Noreste', 'Noroeste', 'Cuyo', 'Patagonia'])
+    fechas = pd.date_range("2017-01-01", periods=meses, freq="MS").strftime("%Y-%m-%d")
+
+    ids = np.repeat(np.arange(series), meses)
+    precios = rng.uniform(50, 5000, series)[ids] * (1 + rng.normal(0.03, 0.02, len(ids))).round(4)
+    precios[rng.random(len(ids)) < faltantes] = np.nan
+
+    # El orden de filas de pd.melt es por fecha y luego por serie
+    df = pd.DataFrame({
+        "Región": regiones[ids % len(regiones)],
+        "Productos seleccionados": np.char.add("Producto ", (ids // len(regiones)).astype(str)),
+        "Unidad de medida": "1 kg",
+        "Date": np.tile(fechas, series),
+        "Price": precios,
+    })
+    return df.sort_values(by="Date", kind="stable").reset_index(drop=True)
+
+
+def relleno_fila_a_fila(df_melted: pd.DataFrame) -> pd.DataFrame:
+    """Implementación original con iterrows, usada como referencia."""
+    df_melted = df_melted.sort_values(by="Date")
+    for index, row in df_melted[df_melted["Price"].isna()].iterrows():
+        product_data = df_melted[
+            (df_melted["Región"] == row["Región"]) &
+            (df_melted["Productos seleccionados"] == row["Productos seleccionados"]) &
+            (df_melted["Unidad de medida"] == row["Unidad de medida"])
+        ]
+        previous_price = product_data[product_data["Date"] < row["Date"]]["Price"].dropna().tail(1)
+        next_price = product_data[product_data["Date"] > row["Date"]]["Price"].dropna().head(1)
+        if not previous_price.empty and not next_price.empty:
+            df_melted.at[index, "Price"] = (previous_price.iloc[0] + next_price.iloc[0]) / 2
+        elif not previous_price.empty:
+            df_melted.at[index, "Price"] = previous_price.iloc[0]
+        elif not next_price.empty:
+            df_melted.at[index, "Price"] = next_price.iloc[0]
+    return df_melted
+
+
+def medir(funcion, *args) -> tuple:
+    inicio = time.perf_counter()
+    resultado = funcion(*args)
+    return resultado, time.perf_counter() - inicio
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--series", type=int, default=100_000, help="Series para la versión vectorizada")
+    parser.add_argument("--series-legado", type=int, default=300, help="Series para comparar con la versión fila a fila")
+    parser.add_argument("--meses", type=int, default=12)
+    parser.add_argument("--faltantes", type=float, default=0.05)
+    args = parser.parse_args()
+
+    logging.disable(logging.INFO)
+    transformador = TransformadorDatos(pd.DataFrame())
+
+    # Equivalencia y comparación de tiempos sobre un tamaño manejable por la versión original
+    chico = generar_melted(args.series_legado, args.meses, args.faltantes)
+    legado, t_legado = medir(relleno_fila_a_fila, chico.copy())
+    nuevo, t_nuevo_chico = medir(transformador.fill_missing_with_adjacent, chico.copy())
+    pd.testing.assert_frame_equal(legado, nuevo)
+    faltantes_chico = int(chico["Price"].isna().sum())
+    print(f"{args.series_legado} series ({faltantes_chico} faltantes): "
+          f"fila a fila {t_legado:.3f}s | vectorizado {t_nuevo_chico:.4f}s | resultados idénticos")
+
+    # Escala completa, solo la versión vectorizada
+    grande = generar_melted(args.series, args.meses, args.faltantes)
+    faltantes_grande = int(grande["Price"].isna().sum())
+    for estrategia in ESTRATEGIAS_RELLENO:
+        _, t = medir(transformador.fill_missing_with_adjacent, grande.copy(), estrategia)
+        print(f"{args.series} series ({len(grande)} filas, {faltantes_grande} faltantes) [{estrategia}]: {t:.3f}s")
+
+    # Estimación lineal del costo de la versión original a escala completa
+    estimado = t_legado / max(faltantes_chico, 1) * faltantes_grande * (len(grande) / len(chico))
+    print(f"Estimación fila a fila a escala completa: ~{estimado:,.0f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+"""
+Generación de reportes mensuales desde el cubo analítico.
+
+Arma un almacén y un cubo con un libro sintético de --anios años y compara la
+composición original del tweet (una lectura del cubo por mes, iterrows y la
+cadena de .replace() para el nombre del mes) con src.reportes: resúmenes de
+todos los meses en dos lecturas del cubo y plantillas compiladas para todos los
+formatos. Verifica que el tweet de cada mes sea idéntico al original y falla
+si renderizar todos los meses en todos los formatos supera --presupuesto segundos.
+
+Uso:
+    python -m benchmarks.bench_reportes --anios 10 --presupuesto 1
+"""
+import argparse
+import logging
+import tempfile
+import time
+
+import pandas as pd
+
+from benchmarks.bench_api import preparar_almacen
+from src.almacen import AlmacenPrecios
+from src.analitica import CuboAnalitico
+from src.reportes import FORMATOS, compilar, renderizar_historial, resumenes_mensuales
+
+
+def componer_tweet_legado(cubo: CuboAnalitico, sheet: str, mes: pd.Timestamp) -> str:
+    """Versión original de publicar.componer_tweet, para un mes dado."""
+    df_final = cubo.consultar("region", sheet, mes).sort_values(by="var_mensual", ascending=False)
+    inflacion_promedio = df_final["var_mensual"].mean()
+    df_productos_final = cubo.consultar("producto", sheet, mes)
+    mayor_alza_producto = df_productos_final.loc[df_productos_final["var_mensual"].idxmax()]
+    mayor_baja_producto = df_productos_final.loc[df_productos_final["var_mensual"].idxmin()]
+    mes_str = mes.strftime("%B %Y") \
+        .replace("January", "Enero").replace("February", "Febrero") \
+        .replace("March", "Marzo").replace("April", "Abril") \
+        .replace("May", "Mayo").replace("June", "Junio") \
+        .replace("July", "Julio").replace("August", "Agosto") \
+        .replace("September", "Septiembre").replace("October", "Octubre") \
+        .replace("November", "Noviembre").replace("December", "Diciembre")
+
+    tweet_text = f"INDEC CANASTA IPC {mes_str}: {inflacion_promedio:.2f}% \n"
+    tweet_text += "\n📊Región:\n"
+    for _, row in df_final.iterrows():
+        tweet_text += f"🔹 {row['Región']}: {row['var_mensual']:.2f}% \n"
+    tweet_text += f"\n📈Cambios:\n"
+    tweet_text += f"🔼: {mayor_alza_producto['Productos seleccionados']} +{mayor_alza_producto['var_mensual']:.2f}%\n"
+    tweet_text += f"🔽: {mayor_baja_producto['Productos seleccionados']} {mayor_baja_producto['var_mensual']:.2f}%\n"
+    tweet_text += "\n🤖Github/Mauricioarcez"
+    return tweet_text
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--anios", type=int, default=10)
+    parser.add_argument("--sheet", default="Nacional")
+    parser.add_argument("--presupuesto", type=float, default=1.0,
+                        help="Segundos máximos para renderizar todos los meses en todos los formatos")
+    args = parser.parse_args()
+
+    logging.disable(logging.INFO)
+    with tempfile.TemporaryDirectory() as directorio:
+        ruta = preparar_almacen(directorio, args.anios)
+        cubo = CuboAnalitico(ruta)
+        cubo.actualizar(AlmacenPrecios(ruta).consultar())
+
+        # Primera vez: incluye compilar las plantillas
+        compilar.cache_clear()
+        inicio = time.perf_counter()
+        resumenes = resumenes_mensuales(cubo, args.sheet)
+        t_resumenes = time.perf_counter() - inicio
+        reportes = renderizar_historial(resumenes, FORMATOS)
+        t_nuevo = time.perf_counter() - inicio
+
+        inicio = time.perf_counter()
+        legado = [componer_tweet_legado(cubo, args.sheet, resumen.fecha) for resumen in resumenes]
+        t_legado = time.perf_counter() - inicio
+
+    distintos = [r.fecha.strftime("%Y-%m") for r, rep, texto in zip(resumenes, reportes, legado) if rep["tweet"] != texto]
+    if distintos:
+        raise SystemExit(f"El tweet difiere del original en {len(distintos)} mes(es): {', '.join(distintos[:5])}")
+    hilos = sum(len(reporte["hilo"]) > 1 for reporte in reportes)
+
+    print(f"{len(resumenes)} meses ({args.anios} años, hoja {args.sheet}) | tweets idénticos al original")
+    print(f"Original, solo tweet:              {t_legado:.3f}s ({t_legado / len(resumenes) * 1000:.1f}ms por mes)")
+    print(f"Reportes, {len(FORMATOS)} formatos:             {t_nuevo:.3f}s "
+          f"(resúmenes {t_resumenes:.3f}s, plantillas {t_nuevo - t_resumenes:.3f}s)")
+    print(f"Meses que necesitan hilo: {hilos}")
+    if t_nuevo > args.presupuesto:
+        raise SystemExit(f"Fuera de presupuesto: {t_nuevo:.3f}s > {args.presupuesto:.3f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+"""
+Benchmark de la transformación por lotes frente a la transformación en memoria.
+
+Sobre un libro sintético mide tiempo y pico de memoria (tracemalloc) de leer
+todas las hojas con pd.read_excel y transformarlas con transformar_hojas,
+frente a recorrerlo con transformar_libro_streaming descartando cada lote, y
+verifica que ambos caminos producen las mismas filas.
+
+Uso:
+    python -m benchmarks.bench_streaming --anios 30 --formato xlsx --lote 5000
+"""
+import argparse
+import logging
+import os
+import tempfile
+import time
+import tracemalloc
+
+import pandas as pd
+
+from benchmarks.libro_sintetico import generar_libro
+from src.pipeline import transformar_hojas
+from src.streaming import transformar_libro_streaming
+from src.transformaciones import TransformadorDatos
+
+
+def medir(funcion):
+    """Ejecuta funcion() y devuelve su resultado, los segundos y el pico de memoria en MiB."""
+    tracemalloc.start()
+    inicio = time.perf_counter()
+    resultado = funcion()
+    segundos = time.perf_counter() - inicio
+    pico = tracemalloc.get_traced_memory()[1] / 2**20
+    tracemalloc.stop()
+    return resultado, segundos, pico
+
+
+def en_memoria(ruta: str) -> pd.DataFrame:
+    hojas = {
+        hoja: df for hoja, df in pd.read_excel(ruta, sheet_name=None).items()
+        if TransformadorDatos.es_hoja_compatible(df)
+    }
+    return transformar_hojas(hojas, workers=1)
+
+
+def por_lotes(ruta: str, lote: int, conservar: bool) -> pd.DataFrame:
+    lotes, filas = [], 0
+    for parte in transformar_libro_streaming(ruta, tamano_lote=lote):
+        filas += len(parte)
+        if conservar:
+            lotes.append(parte)
+    return pd.concat(lotes, ignore_index=True) if conservar else filas
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--anios", type=int, default=30)
+    parser.add_argument("--formato", choices=["xls", "xlsx"], default="xlsx")
+    parser.add_argument("--lote", type=int, default=5000, help="Filas aproximadas de cada lote")
+    args = parser.parse_args()
+
+    logging.disable(logging.WARNING)
+    with tempfile.TemporaryDirectory() as directorio:
+        ruta = os.path.join(directorio, f"libro.{args.formato}")
+        generar_libro(ruta, anios=args.anios, inflacion=0.02, peculiaridades=True)
+        print(f"Libro de {args.anios} años ({os.path.getsize(ruta) / 2**20:.1f} MiB, {args.formato})\n")
+
+        completo, segundos, pico = medir(lambda: en_memoria(ruta))
+        print(f"{'En memoria':<22} {segundos:8.2f}s  pico {pico:8.1f} MiB  {len(completo)} filas")
+        filas, segundos, pico = medir(lambda: por_lotes(ruta, args.lote, conservar=False))
+        print(f"{f'Por lotes ({args.lote})':<22} {segundos:8.2f}s  pico {pico:8.1f} MiB  {filas} filas")
+
+        lotes = por_lotes(ruta, args.lote, conservar=True)
+    claves = ["sheet", "Date", "product_id"]
+    pd.testing.assert_frame_equal(
+        completo.sort_values(claves).reset_index(drop=True),
+        lotes.sort_values(claves).reset_index(drop=True),
+        check_exact=True,
+    )
+    print("\nMismas filas, valores y tipos en ambos caminos")
+
+
+if __name__ == "__main__":
+    main()
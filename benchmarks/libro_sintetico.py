@@ -0,0 +1,203 @@
+"""
+Generador de libros de Excel sintéticos con la forma de los del INDEC.
+
+Reproduce la disposición que TransformadorDatos espera de la hoja Nacional:
+filas de título, la fila de encabezados con los marcadores "Año NNNN", la
+fila de meses, filas en blanco, una fila por región y producto, y notas al
+pie. También agrega una hoja por región con el mismo formato. Con
+--peculiaridades cada hoja varía la posición de los encabezados, las filas
+en blanco (también intercaladas entre los datos), el formato de los años y
+las notas, como pasa entre publicaciones reales. El tamaño escala con
+--anios, --productos y --regiones (hasta las seis del INDEC; los productos
+que no están en la canasta se descartan en la validación).
+
+Uso:
+    python -m benchmarks.libro_sintetico salida.xls --anios 8 --productos 60
+"""
+import argparse
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+REGIONES = ['GBA', 'Pampeana', 'Noreste', 'Noroeste', 'Cuyo', 'Patagonia']
+PRODUCTOS = [
+    'Pan francés', 'Harina de trigo común', 'Arroz blanco simple',
+    'Fideos secos tipo guisero', 'Carne picada común', 'Pollo entero',
+    'Aceite de girasol', 'Leche fresca entera sachet',
+    'Huevos de gallina', 'Papa', 'Azúcar', 'Detergente líquido',
+    'Lavandina', 'Jabón de tocador'
+]
+MESES = [
+    'Enero', 'Febrero', 'Marzo', 'Abril', 'Mayo', 'Junio', 'Julio',
+    'Agosto', 'Septiembre', 'Octubre', 'Noviembre', 'Diciembre'
+]
+
+
+def generar_hoja(regiones: List[str], productos: List[str], anio_inicio: int, meses: int,
+                 faltantes: float, rng: np.random.Generator, inflacion: float = 0.04,
+                 filas_titulo: int = 2, vacias_tras_meses: int = 2, vacias_intermedias: int = 0,
+                 mes_inicio: int = 1, marcadores_sin_prefijo: bool = False, notas: int = 2) -> List[List]:
+    """
+    Genera las filas de una hoja de precios con la disposición del INDEC.
+
+    Args:
+        regiones (List[str]): Regiones de la hoja
+        productos (List[str]): Productos de cada región
+        anio_inicio (int): Año del primer mes
+        meses (int): Cantidad de columnas de meses
+        faltantes (float): Proporción de precios faltantes ("///")
+        rng (np.random.Generator): Generador aleatorio
+        inflacion (float): Variación mensual promedio de los precios
+        filas_titulo (int): Filas de título antes de los encabezados (al menos 1)
+        vacias_tras_meses (int): Filas en blanco entre la fila de meses y los datos
+        vacias_intermedias (int): Filas en blanco intercaladas al azar entre los datos
+        mes_inicio (int): Mes (1-12) de la primera columna
+        marcadores_sin_prefijo (bool): Escribir los años como "2017" en lugar de "Año 2017"
+        notas (int): Filas de notas al pie
+
+    Returns:
+        List[List]: Filas de la hoja (la primera es el título)
+    """
+    ancho = 3 + meses
+    vacia = [None] * ancho
+    encabezado = ["Región", "Productos seleccionados", "Unidad de medida"] + [None] * meses
+    fila_meses = [None, None, None] + [None] * meses
+    for i in range(meses):
+        mes = (mes_inicio - 1 + i) % 12
+        if i == 0 or mes == 0:
+            anio = anio_inicio + (mes_inicio - 1 + i) // 12
+            encabezado[3 + i] = str(anio) if marcadores_sin_prefijo else f"Año {anio}"
+        fila_meses[3 + i] = MESES[mes]
+
+    titulos = [
+        "Precios promedio al consumidor de productos seleccionados, según regiones",
+        "En pesos",
+        "Base: relevamiento mensual",
+        "Productos seleccionados",
+    ]
+    filas = [[titulos[i % len(titulos)]] + [None] * (ancho - 1) for i in range(max(filas_titulo, 1))]
+    filas += [encabezado, fila_meses] + [list(vacia) for _ in range(vacias_tras_meses)]
+
+    datos = []
+    inflacion_mensual = np.cumprod(1 + rng.normal(inflacion, 0.015, meses))
+    for region in regiones:
+        for producto in productos:
+            base = rng.uniform(100, 3000)
+            precios = np.round(base * inflacion_mensual * (1 + rng.normal(0, 0.01, meses)), 2).astype(object)
+            precios[rng.random(meses) < faltantes] = "///"
+            datos.append([region, producto, "1 kg"] + list(precios))
+    for posicion in sorted(rng.integers(1, max(len(datos), 2), vacias_intermedias), reverse=True):
+        datos.insert(int(posicion), list(vacia))
+    filas += datos
+
+    filas.append(list(vacia))
+    pies = [
+        "Fuente: INDEC, Índice de precios al consumidor.",
+        "Nota: los precios corresponden a promedios mensuales.",
+        "/// Dato que no corresponde presentar.",
+    ]
+    filas += [[pies[i % len(pies)]] + [None] * (ancho - 1) for i in range(notas)]
+    return filas
+
+
+def generar_libro(ruta: str, anios: int = 8, productos: Optional[int] = None, regiones: Optional[int] = None,
+                  anio_inicio: int = 2017, faltantes: float = 0.02, hojas_regionales: bool = True,
+                  semilla: int = 0, inflacion: float = 0.04, peculiaridades: bool = False,
+                  mes_inicio: int = 1) -> Dict[str, List[List]]:
+    """
+    Escribe un libro sintético en XLS (xlwt) o XLSX (openpyxl) según la extensión.
+
+    Args:
+        ruta (str): Ruta del archivo a generar (.xls o .xlsx)
+        anios (int): Años de datos por hoja
+        productos (Optional[int]): Cantidad de productos (por defecto los de la canasta)
+        regiones (Optional[int]): Cantidad de regiones (por defecto las seis del INDEC)
+        anio_inicio (int): Primer año de la serie
+        faltantes (float): Proporción de precios faltantes ("///")
+        hojas_regionales (bool): Agregar una hoja por región además de Nacional
+        semilla (int): Semilla del generador aleatorio
+        inflacion (float): Variación mensual promedio de los precios
+        peculiaridades (bool): Variar al azar, hoja por hoja, la cantidad de filas de
+            título, las filas en blanco (tras los meses e intercaladas), el formato de
+            los años y la cantidad de notas al pie
+        mes_inicio (int): Mes (1-12) de la primera columna de datos
+
+    Returns:
+        Dict[str, List[List]]: Filas escritas en cada hoja
+    """
+    rng = np.random.default_rng(semilla)
+    lista_productos = [
+        PRODUCTOS[i] if i < len(PRODUCTOS) else f"Producto {i + 1}"
+        for i in range(productos or len(PRODUCTOS))
+    ]
+    lista_regiones = REGIONES[:regiones or len(REGIONES)]
+    meses = anios * 12
+
+    def disposicion() -> Dict:
+        if not peculiaridades:
+            return {"mes_inicio": mes_inicio}
+        return {
+            "filas_titulo": int(rng.integers(1, 5)),
+            "vacias_tras_meses": int(rng.integers(0, 4)),
+            "vacias_intermedias": int(rng.integers(0, 4)),
+            "marcadores_sin_prefijo": bool(rng.random() < 0.5),
+            "notas": int(rng.integers(0, 4)),
+            "mes_inicio": mes_inicio,
+        }
+
+    hojas = {"Nacional": generar_hoja(lista_regiones, lista_productos, anio_inicio, meses, faltantes, rng,
+                                      inflacion, **disposicion())}
+    if hojas_regionales:
+        for region in lista_regiones:
+            hojas[region] = generar_hoja([region], lista_productos, anio_inicio, meses, faltantes, rng,
+                                         inflacion, **disposicion())
+
+    escribir_libro(ruta, hojas)
+    return hojas
+
+
+def escribir_libro(ruta: str, hojas: Dict[str, List[List]]) -> None:
+    """
+    Escribe las filas de cada hoja en XLS (xlwt) o XLSX (openpyxl) según la extensión.
+
+    Args:
+        ruta (str): Ruta del archivo a generar (.xls o .xlsx)
+        hojas (Dict[str, List[List]]): Filas de cada hoja (None para las celdas vacías)
+    """
+    if ruta.endswith(".xls"):
+        import xlwt
+        libro = xlwt.Workbook(encoding="utf-8")
+        for nombre, filas in hojas.items():
+            hoja = libro.add_sheet(nombre)
+            for i, fila in enumerate(filas):
+                for j, valor in enumerate(fila):
+                    if valor is not None:
+                        hoja.write(i, j, valor)
+        libro.save(ruta)
+    else:
+        with pd.ExcelWriter(ruta, engine="openpyxl") as writer:
+            for nombre, filas in hojas.items():
+                pd.DataFrame(filas).to_excel(writer, sheet_name=nombre, header=False, index=False)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("ruta", help="Archivo de salida (.xls o .xlsx)")
+    parser.add_argument("--anios", type=int, default=8)
+    parser.add_argument("--productos", type=int, default=None)
+    parser.add_argument("--regiones", type=int, default=None)
+    parser.add_argument("--faltantes", type=float, default=0.02)
+    parser.add_argument("--semilla", type=int, default=0)
+    parser.add_argument("--inflacion", type=float, default=0.04)
+    parser.add_argument("--peculiaridades", action="store_true",
+                        help="Variar filas de título, filas en blanco, formato de años y notas en cada hoja")
+    parser.add_argument("--mes-inicio", type=int, default=1)
+    args = parser.parse_args()
+    generar_libro(args.ruta, args.anios, args.productos, args.regiones,
+                  faltantes=args.faltantes, semilla=args.semilla, inflacion=args.inflacion,
+                  peculiaridades=args.peculiaridades, mes_inicio=args.mes_inicio)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,220 @@
+"""
+Suite de benchmarks del pipeline con seguimiento de regresiones entre commits.
+
+Sobre un libro sintético (benchmarks/libro_sintetico.py) mide:
+    - cada etapa de TransformadorDatos, de identificar_encabezados a
+      validar_dataframe, sobre la hoja Nacional (tiempo propio de cada etapa);
+    - la transformación completa de todas las hojas (transformar_hojas);
+    - la validación del DataFrame transformado (src/validacion.py);
+    - run() completo con la red reemplazada por el libro local, en un
+      directorio temporal (almacén, cubo y bandeja de salida nuevos).
+
+Cada caso se repite --repeticiones veces y se informa la mediana. Con
+--guardar el resultado se agrega a --resultados junto con el commit actual;
+cada corrida se compara con la última guardada con los mismos parámetros en
+otro commit (o con --base) y marca como regresión los casos que empeoran más
+de --umbral. Con --estricto la suite termina con error si hay regresiones.
+
+Uso:
+    python -m benchmarks.suite --anios 10 --repeticiones 5 --guardar
+    python -m benchmarks.suite --base 1a2b3c4 --estricto
+"""
+import argparse
+import json
+import logging
+import os
+import statistics
+import subprocess
+import tempfile
+import time
+from typing import Callable, Dict, List, Optional
+
+import pandas as pd
+
+from benchmarks.libro_sintetico import generar_libro
+from src.cache import Descarga, sha256_bytes
+from src.metricas import Perfilador, activar
+from src.pipeline import transformar_hojas
+from src.transformaciones import TransformadorDatos
+from src.validacion import validar
+
+# Etapas de la cadena de TransformadorDatos, en orden
+ETAPAS = [
+    "transformar.identificar_encabezados",
+    "transformar.eliminar_filas_nulas",
+    "transformar.identificar_ultima_fila_valida",
+    "transformar.procesar_fechas",
+    "transformar.realizar_melt",
+    "transformar.validar_dataframe",
+    "transformar.fill_missing_with_adjacent",
+]
+
+
+def commit_actual() -> str:
+    """Commit abreviado de HEAD, con '+' si hay cambios sin commitear."""
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True,
+                                text=True, check=True).stdout.strip()
+        sucio = subprocess.run(["git", "status", "--porcelain", "--untracked-files=no"],
+                               capture_output=True, text=True, check=True).stdout.strip()
+        return commit + ("+" if sucio else "")
+    except (OSError, subprocess.CalledProcessError):
+        return "desconocido"
+
+
+def repetir(funcion: Callable[[], Dict[str, float]], repeticiones: int) -> Dict[str, Dict[str, float]]:
+    """
+    Ejecuta funcion() varias veces (más una de calentamiento que se descarta) y
+    resume los tiempos de cada caso que devuelve.
+    """
+    funcion()
+    muestras: Dict[str, List[float]] = {}
+    for _ in range(repeticiones):
+        for caso, segundos in funcion().items():
+            muestras.setdefault(caso, []).append(segundos)
+    return {
+        caso: {"mediana": statistics.median(valores), "minimo": min(valores)}
+        for caso, valores in muestras.items()
+    }
+
+
+def medir_etapas(hoja: pd.DataFrame) -> Dict[str, float]:
+    """Tiempo propio de cada etapa de la cadena sobre una copia de la hoja."""
+    with activar(Perfilador()) as perfilador:
+        inicio = time.perf_counter()
+        TransformadorDatos(hoja.copy()).identificar_encabezados()
+        total = time.perf_counter() - inicio
+    tiempos = {registro["etapa"]: registro["segundos_propios"] for registro in perfilador.etapas}
+    tiempos["transformar.cadena_completa"] = total
+    return tiempos
+
+
+def medir_hojas(hojas: Dict[str, pd.DataFrame]) -> Dict[str, float]:
+    inicio = time.perf_counter()
+    with activar(Perfilador()):
+        transformar_hojas({nombre: df.copy() for nombre, df in hojas.items()}, workers=1)
+    return {"pipeline.transformar_hojas": time.perf_counter() - inicio}
+
+
+def medir_validacion(df: pd.DataFrame) -> Dict[str, float]:
+    inicio = time.perf_counter()
+    validar(df)
+    return {"validacion.validar": time.perf_counter() - inicio}
+
+
+def medir_run(contenido: bytes) -> Dict[str, float]:
+    """run() completo con el descubrimiento y la descarga reemplazados por el libro local."""
+    from src import main
+    from src.scraper import IndecScraper
+
+    originales = IndecScraper.obtener_url_excel, IndecScraper.descargar_excel
+    IndecScraper.obtener_url_excel = lambda self: "https://www.indec.gob.ar/sintetico.xls"
+    IndecScraper.descargar_excel = lambda self, url: Descarga(url, contenido, sha256_bytes(contenido))
+    directorio_original = os.getcwd()
+    try:
+        with tempfile.TemporaryDirectory() as directorio:
+            os.chdir(directorio)
+            inicio = time.perf_counter()
+            with activar(Perfilador()):
+                # Con muchos años el libro sintético llega a fechas futuras: se mide
+                # igual, sin que la validación corte la corrida
+                df = main.run(workers=1, bloquear_invalidos=False).df
+            segundos = time.perf_counter() - inicio
+    finally:
+        os.chdir(directorio_original)
+        IndecScraper.obtener_url_excel, IndecScraper.descargar_excel = originales
+    if df is None:
+        raise RuntimeError("run() no devolvió datos")
+    return {"run": segundos}
+
+
+def cargar_base(ruta: str, parametros: Dict, commit: str, base: Optional[str]) -> Optional[Dict]:
+    """Última corrida guardada con los mismos parámetros (del commit `base`, o de otro commit)."""
+    if not os.path.exists(ruta):
+        return None
+    candidata = None
+    with open(ruta, encoding="utf-8") as archivo:
+        for linea in archivo:
+            corrida = json.loads(linea)
+            if corrida["parametros"] != parametros:
+                continue
+            if base is not None and corrida["commit"].rstrip("+").startswith(base):
+                candidata = corrida
+            elif base is None and corrida["commit"] != commit:
+                candidata = corrida
+    return candidata
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--anios", type=int, default=10)
+    parser.add_argument("--productos", type=int, default=None)
+    parser.add_argument("--regiones", type=int, default=None)
+    parser.add_argument("--formato", choices=["xls", "xlsx"], default="xls")
+    parser.add_argument("--peculiaridades", action="store_true", help="Libro con disposición variable por hoja")
+    parser.add_argument("--repeticiones", type=int, default=5)
+    parser.add_argument("--sin-run", action="store_true", help="No medir run() completo")
+    parser.add_argument("--resultados", default=".cache/benchmarks.jsonl", help="Historial de corridas")
+    parser.add_argument("--guardar", action="store_true", help="Agregar esta corrida al historial")
+    parser.add_argument("--base", default=None, help="Commit contra el que comparar (por defecto, el último otro)")
+    parser.add_argument("--umbral", type=float, default=0.25, help="Empeoramiento relativo considerado regresión")
+    parser.add_argument("--estricto", action="store_true", help="Terminar con error si hay regresiones")
+    args = parser.parse_args()
+
+    logging.disable(logging.WARNING)
+    parametros = {
+        "anios": args.anios, "productos": args.productos, "regiones": args.regiones,
+        "formato": args.formato, "peculiaridades": args.peculiaridades,
+    }
+    with tempfile.TemporaryDirectory() as directorio:
+        ruta = os.path.join(directorio, f"libro.{args.formato}")
+        generar_libro(ruta, anios=args.anios, productos=args.productos, regiones=args.regiones,
+                      inflacion=0.02, peculiaridades=args.peculiaridades)
+        with open(ruta, "rb") as archivo:
+            contenido = archivo.read()
+        hojas = pd.read_excel(ruta, sheet_name=None)
+
+    resultados = repetir(lambda: medir_etapas(hojas["Nacional"]), args.repeticiones)
+    resultados.update(repetir(lambda: medir_hojas(hojas), args.repeticiones))
+    transformado = transformar_hojas({nombre: df.copy() for nombre, df in hojas.items()}, workers=1)
+    resultados.update(repetir(lambda: medir_validacion(transformado), args.repeticiones))
+    if not args.sin_run:
+        resultados.update(repetir(lambda: medir_run(contenido), args.repeticiones))
+
+    commit = commit_actual()
+    base = cargar_base(args.resultados, parametros, commit, args.base)
+    print(f"Commit {commit} | {len(hojas)} hojas, {len(hojas['Nacional'])} filas en Nacional | "
+          f"{args.repeticiones} repeticiones" + (f" | base {base['commit']}" if base else ""))
+    print(f"\n{'Caso':<46} {'Mediana':>10} {'Mínimo':>10} {'Base':>10} {'Cambio':>8}")
+
+    regresiones = []
+    orden = ETAPAS + [caso for caso in resultados if caso not in ETAPAS]
+    for caso in [c for c in orden if c in resultados]:
+        actual = resultados[caso]
+        linea = f"{caso:<46} {actual['mediana'] * 1000:8.1f}ms {actual['minimo'] * 1000:8.1f}ms"
+        anterior = (base or {}).get("resultados", {}).get(caso)
+        if anterior:
+            cambio = actual["mediana"] / anterior["mediana"] - 1
+            linea += f" {anterior['mediana'] * 1000:8.1f}ms {cambio:+7.0%}"
+            if cambio > args.umbral:
+                regresiones.append(caso)
+                linea += "  REGRESIÓN"
+        print(linea)
+
+    if args.guardar:
+        os.makedirs(os.path.dirname(args.resultados) or ".", exist_ok=True)
+        with open(args.resultados, "a", encoding="utf-8") as archivo:
+            archivo.write(json.dumps({
+                "commit": commit, "fecha": time.strftime("%Y-%m-%dT%H:%M:%S"),
+                "parametros": parametros, "resultados": resultados,
+            }, ensure_ascii=False) + "\n")
+        print(f"\nCorrida guardada en {args.resultados}")
+
+    if regresiones:
+        print(f"\n{len(regresiones)} regresiones por encima de {args.umbral:.0%}: {', '.join(regresiones)}")
+        if args.estricto:
+            raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,369 @@
+from contextlib import closing
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional
+import argparse
+import glob
+import logging
+import os
+import sqlite3
+import uuid
+
+import numpy as np
+import pandas as pd
+
+from src.metricas import configurar_logging, medir_etapa
+
+# Columnas que identifican una serie en el almacén
+COLUMNAS_SERIE = ["sheet", "Región", "Productos seleccionados", "Unidad de medida"]
+
+ESQUEMA = """
+CREATE TABLE IF NOT EXISTS series (
+    product_id INTEGER PRIMARY KEY,
+    sheet TEXT NOT NULL,
+    region TEXT NOT NULL,
+    producto TEXT NOT NULL,
+    unidad TEXT NOT NULL,
+    UNIQUE (sheet, region, producto, unidad)
+);
+CREATE TABLE IF NOT EXISTS precios (
+    product_id INTEGER NOT NULL REFERENCES series (product_id),
+    date TEXT NOT NULL,
+    price REAL,
+    publicado INTEGER NOT NULL DEFAULT 1,
+    PRIMARY KEY (product_id, date)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS idx_precios_date ON precios (date);
+CREATE TABLE IF NOT EXISTS revisiones (
+    corrida TEXT NOT NULL,
+    product_id INTEGER NOT NULL,
+    date TEXT NOT NULL,
+    tipo TEXT NOT NULL,
+    anterior REAL,
+    nuevo REAL,
+    PRIMARY KEY (corrida, product_id, date)
+) WITHOUT ROWID;
+"""
+
+# Tipos de cambio que registra el log de revisiones
+TIPOS_REVISION = ("nuevo", "revisado", "eliminado")
+
+# Un precio que vuelve a publicarse deja de estar marcado como eliminado
+UPSERT_PRECIOS = """
+INSERT INTO precios (product_id, date, price) VALUES (?, ?, ?)
+ON CONFLICT (product_id, date) DO UPDATE SET price = excluded.price, publicado = 1
+"""
+
+
+def nueva_corrida() -> str:
+    """
+    Identificador de una corrida: fecha y hora con microsegundos (se ordena
+    cronológicamente, así MAX(corrida) es la última) más un sufijo aleatorio,
+    para que dos corridas en el mismo instante no compartan el log de revisiones.
+    """
+    return f"{datetime.now():%Y-%m-%dT%H:%M:%S.%f}-{uuid.uuid4().hex[:8]}"
+
+
+class AlmacenPrecios:
+    """
+    Almacén persistente de precios en SQLite, indexado por (product_id, date).
+
+    Cada serie (hoja, región, producto y unidad) recibe un product_id estable la
+    primera vez que aparece, de modo que los identificadores no cambian entre
+    corridas aunque se agreguen productos. Las corridas nuevas solo escriben
+    los precios nuevos o revisados, y cada una deja en la tabla revisiones
+    qué precios agregó, cuáles revisó el INDEC y cuáles dejaron de publicarse,
+    para que las etapas siguientes actualicen solo lo afectado. Los precios que
+    dejaron de publicarse se conservan marcados (publicado = 0), así se
+    registran como eliminados una sola vez.
+    """
+
+    def __init__(self, ruta: str = "data/precios.sqlite"):
+        """
+        Args:
+            ruta (str): Archivo de la base SQLite
+        """
+        self.ruta = ruta
+        os.makedirs(os.path.dirname(ruta) or ".", exist_ok=True)
+        with closing(self._conectar()) as con, con:
+            con.executescript(ESQUEMA)
+            # Bases creadas antes de marcar los precios que dejaron de publicarse
+            if "publicado" not in {fila[1] for fila in con.execute("PRAGMA table_info(precios)")}:
+                con.execute("ALTER TABLE precios ADD COLUMN publicado INTEGER NOT NULL DEFAULT 1")
+
+    def _conectar(self) -> sqlite3.Connection:
+        return sqlite3.connect(self.ruta)
+
+    def vacio(self) -> bool:
+        """Indica si el almacén todavía no tiene precios."""
+        with closing(self._conectar()) as con:
+            return con.execute("SELECT 1 FROM precios LIMIT 1").fetchone() is None
+
+    @staticmethod
+    def _normalizar(df: pd.DataFrame) -> pd.DataFrame:
+        """Deja solo las columnas del almacén, con la fecha como texto YYYY-MM-DD."""
+        df = df.copy()
+        if "sheet" not in df.columns:
+            df["sheet"] = "Nacional"
+        df["Date"] = pd.to_datetime(df["Date"]).dt.strftime("%Y-%m-%d")
+        # Los precios pueden venir en float32: se guardan en float64 con dos decimales
+        df["Price"] = pd.to_numeric(df["Price"], errors="coerce").astype("float64").round(2)
+        df[COLUMNAS_SERIE] = df[COLUMNAS_SERIE].astype("object")
+        return df[COLUMNAS_SERIE + ["Date", "Price"]].dropna(subset=COLUMNAS_SERIE + ["Date"])
+
+    def _series(self, con: sqlite3.Connection) -> pd.DataFrame:
+        return pd.read_sql_query(
+            "SELECT product_id, sheet, region AS 'Región', producto AS 'Productos seleccionados', "
+            "unidad AS 'Unidad de medida' FROM series",
+            con,
+        )
+
+    def _asignar_ids(self, con: sqlite3.Connection, df: pd.DataFrame) -> pd.DataFrame:
+        """Agrega al DataFrame el product_id estable de cada serie, creando las nuevas."""
+        claves = df[COLUMNAS_SERIE].drop_duplicates()
+        conocidas = claves.merge(self._series(con), on=COLUMNAS_SERIE, how="left")
+        nuevas = conocidas.loc[conocidas["product_id"].isna(), COLUMNAS_SERIE]
+        if len(nuevas):
+            con.executemany(
+                "INSERT INTO series (sheet, region, producto, unidad) VALUES (?, ?, ?, ?)",
+                nuevas.itertuples(index=False, name=None),
+            )
+            logging.info(f"{len(nuevas)} series nuevas registradas en el almacén")
+        return df.merge(self._series(con), on=COLUMNAS_SERIE, how="left")
+
+    def _diferencias(self, con: sqlite3.Connection, df: pd.DataFrame) -> pd.DataFrame:
+        """
+        Compara los datos normalizados (ya con product_id) con lo guardado, por
+        (product_id, Date), con un único join externo. Solo se comparan las hojas
+        y el rango de fechas de df. Los precios guardados que ya estaban marcados
+        como no publicados no vuelven a registrarse como eliminados; si reaparecen,
+        cuentan como nuevos.
+
+        Returns:
+            pd.DataFrame: product_id, Date, anterior, nuevo, publicado y tipo ('nuevo',
+                'revisado', 'eliminado' o '' si no cambió)
+        """
+        sheets = list(df["sheet"].unique())
+        existentes = pd.read_sql_query(
+            "SELECT p.product_id, p.date AS 'Date', p.price AS anterior, p.publicado FROM precios p "
+            "JOIN series s USING (product_id) "
+            f"WHERE p.date BETWEEN ? AND ? AND s.sheet IN ({', '.join('?' * len(sheets))})",
+            con,
+            params=[df["Date"].min(), df["Date"].max()] + sheets,
+        )
+        diferencias = df[["product_id", "Date", "Price"]].rename(columns={"Price": "nuevo"}).merge(
+            existentes, on=["product_id", "Date"], how="outer", indicator=True
+        )
+        origen = diferencias.pop("_merge").to_numpy()
+        nuevo = diferencias["nuevo"].to_numpy(dtype="float64")
+        anterior = diferencias["anterior"].to_numpy(dtype="float64")
+        publicado = diferencias["publicado"].fillna(1).to_numpy() == 1
+        iguales = (nuevo == anterior) | (np.isnan(nuevo) & np.isnan(anterior))
+        diferencias["tipo"] = np.select(
+            [origen == "left_only", (origen == "right_only") & publicado,
+             origen == "right_only", ~publicado, ~iguales],
+            ["nuevo", "eliminado", "", "nuevo", "revisado"],
+            default="",
+        )
+        return diferencias
+
+    @medir_etapa("almacen.guardar")
+    def guardar(self, df: pd.DataFrame, corrida: Optional[str] = None, simular: bool = False) -> Dict[str, int]:
+        """
+        Inserta los precios nuevos y actualiza los revisados; el resto no se escribe.
+        Los cambios quedan en el log de revisiones con la clave de la corrida. Los
+        precios que dejaron de publicarse se registran una vez y se marcan, pero
+        no se borran.
+
+        Args:
+            df (pd.DataFrame): Datos transformados (con o sin columna 'sheet')
+            corrida (Optional[str]): Identificador de la corrida en el log de revisiones
+                (por defecto, la fecha y hora actual)
+            simular (bool): Calcular los cambios sin escribirlos (la transacción se descarta)
+
+        Returns:
+            Dict[str, int]: Cantidad de precios nuevos, revisados, eliminados y sin cambios
+        """
+        corrida = corrida or nueva_corrida()
+        df = self._normalizar(df)
+        with closing(self._conectar()) as con, con:
+            df = self._asignar_ids(con, df)
+            diferencias = self._diferencias(con, df)
+            tipo = diferencias["tipo"].to_numpy()
+
+            cambios = diferencias.loc[np.isin(tipo, ("nuevo", "revisado")), ["product_id", "Date", "nuevo"]]
+            con.executemany(
+                UPSERT_PRECIOS,
+                (
+                    (int(pid), fecha, None if np.isnan(precio) else float(precio))
+                    for pid, fecha, precio in cambios.itertuples(index=False, name=None)
+                ),
+            )
+            registro = diferencias.loc[tipo != "", ["product_id", "Date", "tipo", "anterior", "nuevo"]]
+            con.executemany(
+                "INSERT OR REPLACE INTO revisiones (corrida, product_id, date, tipo, anterior, nuevo) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (
+                    (corrida, int(pid), fecha, tipo_cambio,
+                     None if np.isnan(anterior) else float(anterior), None if np.isnan(nuevo) else float(nuevo))
+                    for pid, fecha, tipo_cambio, anterior, nuevo in registro.itertuples(index=False, name=None)
+                ),
+            )
+            eliminados = diferencias.loc[tipo == "eliminado", ["product_id", "Date"]]
+            con.executemany(
+                "UPDATE precios SET publicado = 0 WHERE product_id = ? AND date = ?",
+                ((int(pid), fecha) for pid, fecha in eliminados.itertuples(index=False, name=None)),
+            )
+            if simular:
+                con.rollback()
+
+        resumen = {
+            "nuevos": int((tipo == "nuevo").sum()),
+            "revisados": int((tipo == "revisado").sum()),
+            "eliminados": int((tipo == "eliminado").sum()),
+            # Los precios ya marcados como no publicados no cuentan
+            "sin_cambios": len(df) - int(np.isin(tipo, ("nuevo", "revisado")).sum()),
+        }
+        series_eliminadas = np.setdiff1d(
+            diferencias.loc[tipo == "eliminado", "product_id"].unique(), df["product_id"].unique()
+        )
+        logging.info(
+            f"{'Simulación del almacén' if simular else 'Almacén actualizado'} (corrida {corrida}): "
+            f"{resumen['nuevos']} precios nuevos, "
+            f"{resumen['revisados']} revisados, {resumen['eliminados']} ya no publicados "
+            f"({len(series_eliminadas)} series completas), {resumen['sin_cambios']} sin cambios"
+        )
+        return resumen
+
+    def revisiones(self, corrida: Optional[str] = None, tipos: Optional[Iterable[str]] = None) -> pd.DataFrame:
+        """
+        Lee el log de revisiones de una corrida (por defecto, la última).
+
+        Args:
+            corrida (Optional[str]): Identificador de la corrida
+            tipos (Optional[Iterable[str]]): Tipos de cambio a incluir (todos si es None)
+
+        Returns:
+            pd.DataFrame: corrida, product_id, sheet, Región, Productos seleccionados,
+                Unidad de medida, Date, tipo, anterior y nuevo
+        """
+        with closing(self._conectar()) as con:
+            if corrida is None:
+                corrida = con.execute("SELECT MAX(corrida) FROM revisiones").fetchone()[0]
+            condiciones, parametros = ["r.corrida = ?"], [corrida]
+            if tipos is not None:
+                tipos = list(tipos)
+                condiciones.append(f"r.tipo IN ({', '.join('?' * len(tipos))})")
+                parametros.extend(tipos)
+            df = pd.read_sql_query(
+                "SELECT r.corrida, r.product_id, s.sheet, s.region AS 'Región', "
+                "s.producto AS 'Productos seleccionados', s.unidad AS 'Unidad de medida', "
+                "r.date AS 'Date', r.tipo, r.anterior, r.nuevo "
+                "FROM revisiones r JOIN series s USING (product_id) WHERE " + " AND ".join(condiciones)
+                + " ORDER BY r.date, r.product_id",
+                con,
+                params=parametros,
+            )
+        df["Date"] = pd.to_datetime(df["Date"])
+        return df
+
+    def consultar(self, desde: Optional[str] = None, hasta: Optional[str] = None,
+                  productos: Optional[Iterable[str]] = None, regiones: Optional[Iterable[str]] = None,
+                  sheet: Optional[str] = None, product_ids: Optional[Iterable[int]] = None,
+                  fechas: Optional[Iterable[str]] = None, incluir_no_publicados: bool = False) -> pd.DataFrame:
+        """
+        Consulta un rango de fechas y/o productos sin leer el almacén completo.
+        Por defecto solo devuelve los precios que siguen publicados en el último libro.
+
+        Args:
+            desde (Optional[str]): Fecha mínima YYYY-MM-DD (inclusive)
+            hasta (Optional[str]): Fecha máxima YYYY-MM-DD (inclusive)
+            productos (Optional[Iterable[str]]): Nombres de productos
+            regiones (Optional[Iterable[str]]): Regiones
+            sheet (Optional[str]): Hoja de origen
+            product_ids (Optional[Iterable[int]]): Identificadores de serie
+            fechas (Optional[Iterable[str]]): Meses YYYY-MM-DD puntuales
+            incluir_no_publicados (bool): Incluye también los precios que dejaron de publicarse
+
+        Returns:
+            pd.DataFrame: Precios con las columnas del DataFrame transformado
+        """
+        condiciones: List[str] = []
+        parametros: List = []
+        if not incluir_no_publicados:
+            condiciones.append("p.publicado = 1")
+        if desde:
+            condiciones.append("p.date >= ?")
+            parametros.append(desde)
+        if hasta:
+            condiciones.append("p.date <= ?")
+            parametros.append(hasta)
+        if sheet:
+            condiciones.append("s.sheet = ?")
+            parametros.append(sheet)
+        for columna, valores in (("s.producto", productos), ("s.region", regiones), ("p.product_id", product_ids),
+                                 ("p.date", fechas)):
+            if valores is not None:
+                valores = list(valores)
+                condiciones.append(f"{columna} IN ({', '.join('?' * len(valores))})")
+                parametros.extend(valores)
+
+        consulta = (
+            "SELECT s.region AS 'Región', s.producto AS 'Productos seleccionados', "
+            "s.unidad AS 'Unidad de medida', p.date AS 'Date', p.price AS 'Price', "
+            "p.product_id, s.sheet FROM precios p JOIN series s USING (product_id)"
+            + (" WHERE " + " AND ".join(condiciones) if condiciones else "")
+            + " ORDER BY p.date, p.product_id"
+        )
+        with closing(self._conectar()) as con:
+            df = pd.read_sql_query(consulta, con, params=parametros)
+        df["Date"] = pd.to_datetime(df["Date"])
+        return df
+
+    def importar_csv(self, rutas: Iterable[str]) -> Dict[str, int]:
+        """
+        Migra al almacén los CSV procesados de corridas anteriores, del más viejo al
+        más nuevo, para que las revisiones posteriores prevalezcan.
+
+        Args:
+            rutas (Iterable[str]): Archivos *_procesado_*.csv
+
+        Returns:
+            Dict[str, int]: Totales de precios nuevos, revisados, eliminados y sin cambios
+        """
+        totales = {"nuevos": 0, "revisados": 0, "eliminados": 0, "sin_cambios": 0}
+        inicio = nueva_corrida()
+        for ruta in sorted(rutas, key=lambda r: os.path.basename(r).split("_procesado_")[-1]):
+            logging.info(f"Importando {ruta}...")
+            corrida = f"{inicio} {os.path.basename(ruta)}"
+            for clave, valor in self.guardar(pd.read_csv(ruta), corrida).items():
+                totales[clave] += valor
+        return totales
+
+
+def main() -> None:
+    configurar_logging()
+    parser = argparse.ArgumentParser(description="Migra los CSV procesados existentes al almacén SQLite")
+    parser.add_argument("csv", nargs="*", help="CSV a importar (por defecto data/*_procesado_*.csv)")
+    parser.add_argument("--almacen", default="data/precios.sqlite", help="Archivo de la base SQLite")
+    parser.add_argument("--revisiones", nargs="?", const="", default=None, metavar="CORRIDA",
+                        help="Mostrar el log de revisiones de una corrida (por defecto, la última) y salir")
+    args = parser.parse_args()
+
+    if args.revisiones is not None:
+        revisiones = AlmacenPrecios(args.almacen).revisiones(args.revisiones or None)
+        if revisiones.empty:
+            logging.info("No hay revisiones registradas")
+            return
+        print(revisiones.groupby(["sheet", "tipo"]).size().unstack(fill_value=0).to_string())
+        print(revisiones[revisiones["tipo"] != "nuevo"].to_string(index=False))
+        return
+
+    rutas = args.csv or glob.glob("data/*_procesado_*.csv")
+    if not rutas:
+        logging.info("No hay CSV para importar")
+        return
+    AlmacenPrecios(args.almacen).importar_csv(rutas)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,299 @@
+from contextlib import closing
+from typing import Dict, List, Optional
+import logging
+import os
+import sqlite3
+
+import numpy as np
+import pandas as pd
+
+from src.metricas import medir_etapa
+
+# Niveles del cubo y columnas que agrupan cada uno (además de la hoja y la fecha)
+NIVELES = {
+    "region": ["Región"],
+    "producto": ["Productos seleccionados"],
+    "region_producto": ["Región", "Productos seleccionados"],
+}
+
+# Columnas que identifican una serie del cubo
+CLAVES_CUBO = ["sheet", "nivel", "region", "producto"]
+
+ESQUEMA = """
+CREATE TABLE IF NOT EXISTS cubo (
+    sheet TEXT NOT NULL,
+    nivel TEXT NOT NULL,
+    region TEXT NOT NULL,
+    producto TEXT NOT NULL,
+    date TEXT NOT NULL,
+    promedio REAL,
+    var_mensual REAL,
+    var_interanual REAL,
+    PRIMARY KEY (sheet, nivel, region, producto, date)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS idx_cubo_fecha ON cubo (sheet, nivel, date);
+"""
+
+UPSERT_PROMEDIOS = """
+INSERT INTO cubo (sheet, nivel, region, producto, date, promedio) VALUES (?, ?, ?, ?, ?, ?)
+ON CONFLICT (sheet, nivel, region, producto, date) DO UPDATE SET promedio = excluded.promedio
+"""
+
+ACTUALIZAR_VARIACIONES = """
+UPDATE cubo SET var_mensual = ?, var_interanual = ?
+WHERE sheet = ? AND nivel = ? AND region = ? AND producto = ? AND date = ?
+"""
+
+
+def _nulo(valor: float) -> Optional[float]:
+    return None if np.isnan(valor) else float(valor)
+
+
+def calcular_promedios(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Calcula el precio promedio mensual de cada nivel del cubo.
+
+    Args:
+        df (pd.DataFrame): Datos transformados (con o sin columna 'sheet')
+
+    Returns:
+        pd.DataFrame: Columnas sheet, nivel, region, producto, date (YYYY-MM-DD) y
+            promedio; region o producto quedan vacíos en los niveles que no los usan
+    """
+    df = df[[c for c in ("sheet", "Región", "Productos seleccionados", "Date", "Price") if c in df.columns]].copy()
+    if "sheet" not in df.columns:
+        df["sheet"] = "Nacional"
+    df["Date"] = pd.to_datetime(df["Date"]).dt.strftime("%Y-%m-%d")
+    df["Price"] = df["Price"].astype("float64")
+
+    partes = []
+    for nivel, columnas in NIVELES.items():
+        promedios = (
+            df.groupby(["sheet"] + columnas + ["Date"], observed=True)["Price"].mean().reset_index()
+            .rename(columns={"Región": "region", "Productos seleccionados": "producto", "Date": "date",
+                             "Price": "promedio"})
+        )
+        for columna in ("region", "producto"):
+            promedios[columna] = promedios[columna].astype("object") if columna in promedios else ""
+        promedios["nivel"] = nivel
+        partes.append(promedios)
+
+    promedios = pd.concat(partes, ignore_index=True)
+    promedios["sheet"] = promedios["sheet"].astype("object")
+    promedios["promedio"] = promedios["promedio"].round(4)
+    return promedios[CLAVES_CUBO + ["date", "promedio"]]
+
+
+def calcular_variaciones(promedios: pd.DataFrame) -> pd.DataFrame:
+    """
+    Agrega las variaciones porcentuales mensual e interanual de cada serie,
+    comparando con el promedio del mismo nivel un mes y doce meses antes.
+
+    Args:
+        promedios (pd.DataFrame): Salida de calcular_promedios (o el cubo persistido)
+
+    Returns:
+        pd.DataFrame: Los promedios con var_mensual y var_interanual (en %)
+    """
+    fechas = pd.to_datetime(promedios["date"])
+    resultado = promedios[CLAVES_CUBO + ["date", "promedio"]].copy()
+    for columna, meses in (("var_mensual", 1), ("var_interanual", 12)):
+        referencia = promedios[CLAVES_CUBO + ["promedio"]].assign(
+            date=(fechas + pd.DateOffset(months=meses)).dt.strftime("%Y-%m-%d")
+        ).rename(columns={"promedio": "_referencia"})
+        resultado = resultado.merge(referencia, on=CLAVES_CUBO + ["date"], how="left")
+        resultado[columna] = (resultado["promedio"] / resultado["_referencia"] - 1) * 100
+        resultado = resultado.drop(columns="_referencia")
+    return resultado
+
+
+class CuboAnalitico:
+    """
+    Cubo de promedios mensuales y variaciones (mensual e interanual) por región,
+    por producto y por región y producto, persistido en la misma base SQLite que
+    el almacén de precios.
+
+    Se actualiza una vez por ingesta y solo recalcula los meses cuyos promedios
+    cambiaron y los que dependen de ellos (el mes siguiente y el mismo mes del año
+    siguiente). El tweet y los reportes leen los valores ya calculados.
+    """
+
+    def __init__(self, ruta: str = "data/precios.sqlite"):
+        """
+        Args:
+            ruta (str): Archivo de la base SQLite
+        """
+        self.ruta = ruta
+        os.makedirs(os.path.dirname(ruta) or ".", exist_ok=True)
+        with closing(self._conectar()) as con, con:
+            con.executescript(ESQUEMA)
+
+    def _conectar(self) -> sqlite3.Connection:
+        return sqlite3.connect(self.ruta)
+
+    def vacio(self) -> bool:
+        """Indica si el cubo todavía no tiene datos."""
+        with closing(self._conectar()) as con:
+            return con.execute("SELECT 1 FROM cubo LIMIT 1").fetchone() is None
+
+    @medir_etapa("cubo.actualizar")
+    def actualizar(self, df: pd.DataFrame, completos: Optional[pd.DataFrame] = None) -> Dict[str, int]:
+        """
+        Incorpora al cubo los datos de una ingesta.
+
+        Args:
+            df (pd.DataFrame): Datos transformados (o el contenido del almacén)
+            completos (Optional[pd.DataFrame]): Meses (columnas sheet y Date) para los que df
+                trae todos los precios vigentes; los promedios de esos meses que ya no
+                salen de df se eliminan del cubo
+
+        Returns:
+            Dict[str, int]: Promedios nuevos, revisados y eliminados y filas con variaciones recalculadas
+        """
+        promedios = calcular_promedios(df)
+        resumen = {"nuevos": 0, "revisados": 0, "eliminados": 0, "variaciones": 0}
+        if promedios.empty and completos is None:
+            return resumen
+
+        with closing(self._conectar()) as con, con:
+            sheets = sorted(set(promedios["sheet"]) | (set(completos["sheet"]) if completos is not None else set()))
+            existentes = pd.read_sql_query(
+                f"SELECT sheet, nivel, region, producto, date, promedio AS anterior FROM cubo "
+                f"WHERE sheet IN ({', '.join('?' * len(sheets))})",
+                con,
+                params=sheets,
+            )
+            eliminados = existentes.iloc[:0][CLAVES_CUBO + ["date"]]
+            if completos is not None:
+                meses = completos[["sheet"]].assign(date=completos["Date"].dt.strftime("%Y-%m-%d")).drop_duplicates()
+                eliminados = existentes.merge(meses, on=["sheet", "date"]).merge(
+                    promedios[CLAVES_CUBO + ["date"]], on=CLAVES_CUBO + ["date"], how="left", indicator=True
+                )
+                eliminados = eliminados.loc[eliminados["_merge"] == "left_only", CLAVES_CUBO + ["date"]]
+
+            promedios = promedios.merge(existentes, on=CLAVES_CUBO + ["date"], how="left", indicator=True)
+            nuevos = (promedios["_merge"] == "left_only").to_numpy()
+            anterior = promedios["anterior"].to_numpy(dtype="float64")
+            actual = promedios["promedio"].to_numpy(dtype="float64")
+            revisados = ~nuevos & ~((actual == anterior) | (np.isnan(actual) & np.isnan(anterior)))
+            cambios = promedios.loc[nuevos | revisados, CLAVES_CUBO + ["date", "promedio"]]
+            resumen["nuevos"], resumen["revisados"] = int(nuevos.sum()), int(revisados.sum())
+            resumen["eliminados"] = len(eliminados)
+            if cambios.empty and eliminados.empty:
+                logging.info("Cubo analítico sin cambios")
+                return resumen
+
+            con.executemany(
+                UPSERT_PROMEDIOS,
+                (fila[:-1] + (_nulo(fila[-1]),) for fila in cambios.itertuples(index=False, name=None)),
+            )
+            con.executemany(
+                "DELETE FROM cubo WHERE sheet = ? AND nivel = ? AND region = ? AND producto = ? AND date = ?",
+                eliminados.itertuples(index=False, name=None),
+            )
+
+            # Meses que dependen de los promedios modificados: el mismo, el siguiente y el del año siguiente
+            modificados = pd.concat([cambios[CLAVES_CUBO + ["date"]], eliminados])
+            fechas = pd.to_datetime(modificados["date"])
+            afectados = pd.concat([
+                modificados[CLAVES_CUBO].assign(date=(fechas + pd.DateOffset(months=meses)).dt.strftime("%Y-%m-%d"))
+                for meses in (0, 1, 12)
+            ]).drop_duplicates()
+
+            # Ventana de la que salen los promedios de referencia
+            desde = (fechas.min() - pd.DateOffset(months=12)).strftime("%Y-%m-%d")
+            ventana = pd.read_sql_query(
+                f"SELECT sheet, nivel, region, producto, date, promedio FROM cubo "
+                f"WHERE date >= ? AND sheet IN ({', '.join('?' * len(sheets))})",
+                con,
+                params=[desde] + sheets,
+            )
+            variaciones = calcular_variaciones(ventana).merge(afectados, on=CLAVES_CUBO + ["date"])
+            con.executemany(
+                ACTUALIZAR_VARIACIONES,
+                (
+                    (_nulo(mensual), _nulo(interanual), sheet, nivel, region, producto, fecha)
+                    for sheet, nivel, region, producto, fecha, mensual, interanual in variaciones[
+                        CLAVES_CUBO + ["date", "var_mensual", "var_interanual"]
+                    ].itertuples(index=False, name=None)
+                ),
+            )
+            resumen["variaciones"] = len(variaciones)
+
+        logging.info(
+            f"Cubo analítico actualizado: {resumen['nuevos']} promedios nuevos, "
+            f"{resumen['revisados']} revisados, {resumen['eliminados']} eliminados, "
+            f"{resumen['variaciones']} variaciones recalculadas"
+        )
+        return resumen
+
+    def sincronizar(self, almacen, revisiones: Optional[pd.DataFrame] = None) -> Dict[str, int]:
+        """
+        Actualiza el cubo leyendo siempre los precios publicados del almacén: la
+        primera vez con todo el historial y después solo los meses de cada hoja que
+        aparecen en el log de revisiones. Como cada mes afectado se recalcula con
+        todos sus precios (y se eliminan los promedios que quedaron sin datos), el
+        resultado es el mismo que reconstruir el cubo desde cero.
+
+        Args:
+            almacen (AlmacenPrecios): Almacén ya actualizado con la corrida
+            revisiones (Optional[pd.DataFrame]): Log de revisiones de la corrida (con
+                columnas sheet y Date); si es None se recalcula todo
+
+        Returns:
+            Dict[str, int]: Promedios nuevos, revisados y eliminados y filas con variaciones recalculadas
+        """
+        if revisiones is None or self.vacio():
+            return self.actualizar(almacen.consultar())
+        afectados = revisiones[["sheet", "Date"]].drop_duplicates()
+        if afectados.empty:
+            logging.info("Cubo analítico sin cambios")
+            return {"nuevos": 0, "revisados": 0, "eliminados": 0, "variaciones": 0}
+        datos = almacen.consultar(fechas=sorted(afectados["Date"].dt.strftime("%Y-%m-%d").unique()))
+        return self.actualizar(datos.merge(afectados, on=["sheet", "Date"]), completos=afectados)
+
+    def ultimo_mes(self, sheet: str = "Nacional") -> Optional[pd.Timestamp]:
+        """Último mes con datos en el cubo para una hoja."""
+        with closing(self._conectar()) as con:
+            fecha = con.execute("SELECT MAX(date) FROM cubo WHERE sheet = ?", (sheet,)).fetchone()[0]
+        return pd.Timestamp(fecha) if fecha else None
+
+    def consultar(self, nivel: str, sheet: str = "Nacional", fecha: Optional[str] = None,
+                  regiones: Optional[List[str]] = None, productos: Optional[List[str]] = None) -> pd.DataFrame:
+        """
+        Lee valores ya calculados del cubo.
+
+        Args:
+            nivel (str): 'region', 'producto' o 'region_producto'
+            sheet (str): Hoja de origen
+            fecha (Optional[str]): Mes YYYY-MM-DD (todos si es None)
+            regiones (Optional[List[str]]): Regiones a incluir
+            productos (Optional[List[str]]): Productos a incluir
+
+        Returns:
+            pd.DataFrame: Columnas Región, Productos seleccionados, Date, promedio,
+                var_mensual y var_interanual
+        """
+        if nivel not in NIVELES:
+            raise ValueError(f"Nivel desconocido: {nivel}")
+        condiciones = ["sheet = ?", "nivel = ?"]
+        parametros: List = [sheet, nivel]
+        if fecha:
+            condiciones.append("date = ?")
+            parametros.append(pd.Timestamp(fecha).strftime("%Y-%m-%d"))
+        for columna, valores in (("region", regiones), ("producto", productos)):
+            if valores is not None:
+                condiciones.append(f"{columna} IN ({', '.join('?' * len(valores))})")
+                parametros.extend(valores)
+
+        consulta = (
+            "SELECT region AS 'Región', producto AS 'Productos seleccionados', date AS 'Date', "
+            "promedio, var_mensual, var_interanual FROM cubo WHERE "
+            + " AND ".join(condiciones) + " ORDER BY date, region, producto"
+        )
+        with closing(self._conectar()) as con:
+            df = pd.read_sql_query(consulta, con, params=parametros)
+        df["Date"] = pd.to_datetime(df["Date"])
+        return df.drop(columns=[c for c, usada in (("Región", "Región" in NIVELES[nivel]),
+                                                  ("Productos seleccionados", "Productos seleccionados" in NIVELES[nivel]))
+                                if not usada])
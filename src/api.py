@@ -0,0 +1,433 @@
+"""
+API HTTP de solo lectura sobre los precios procesados.
+
+Sirve series de precios por producto y región, el resumen del último mes y
+rankings de variaciones (los mismos valores que usa el tweet) sin releer los
+CSV en cada consulta: el conjunto de datos se carga una vez en memoria (con el
+esquema compacto) junto con su cubo de promedios y variaciones, cada respuesta
+se guarda en una caché LRU ya serializada y lleva un ETag, de modo que los
+clientes pueden revalidar con If-None-Match y recibir un 304 sin cuerpo.
+Si el archivo de datos cambia, se recarga en segundo plano sin cortar el
+servicio.
+
+Usa solo asyncio de la biblioteca estándar (HTTP/1.1 con keep-alive, GET y HEAD).
+
+Uso:
+    python -m src.api --datos data/precios.sqlite --puerto 8080
+
+Endpoints:
+    /meta                    hojas, regiones, productos y rango de fechas
+    /series?producto=Papa&region=GBA&sheet=Nacional&desde=2024-01-01&hasta=2024-12-01
+    /ultimo?sheet=Nacional   promedios y variaciones del último mes
+    /ranking?sheet=Nacional&nivel=producto&variacion=var_mensual&orden=desc&n=10&fecha=2024-12-01
+"""
+from functools import lru_cache
+from typing import Callable, Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, urlsplit
+import argparse
+import asyncio
+import glob
+import hashlib
+import json
+import logging
+import os
+import time
+
+import pandas as pd
+
+from src.analitica import NIVELES, calcular_promedios, calcular_variaciones
+from src.metricas import configurar_logging
+from src.transformaciones import compactar
+
+VARIACIONES = ("var_mensual", "var_interanual")
+
+MOTIVOS = {200: "OK", 304: "Not Modified", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed"}
+
+# Respuesta ya serializada: estado, cuerpo y ETag
+Respuesta = Tuple[int, bytes, str]
+
+# Datos leídos, todavía sin aplicar: precios, cubo y firma del archivo
+Carga = Tuple[pd.DataFrame, pd.DataFrame, Optional[Tuple[float, int]]]
+
+
+class ErrorConsulta(ValueError):
+    """Parámetros inválidos en una consulta (se responde con 400)."""
+
+
+def cargar_precios(ruta: str) -> pd.DataFrame:
+    """
+    Lee los precios procesados desde el almacén SQLite, un Parquet o un CSV
+    procesado. Si la ruta es un patrón (por ejemplo data/nacional_procesado_*.csv)
+    se usa el archivo más reciente.
+
+    Args:
+        ruta (str): Archivo o patrón de archivos
+
+    Returns:
+        pd.DataFrame: Precios con el esquema compacto y la columna 'sheet'
+    """
+    if glob.has_magic(ruta):
+        rutas = sorted(glob.glob(ruta), key=lambda r: os.path.basename(r).split("_procesado_")[-1])
+        if not rutas:
+            raise FileNotFoundError(f"No hay archivos que coincidan con {ruta}")
+        ruta = rutas[-1]
+
+    extension = os.path.splitext(ruta)[1].lower()
+    if extension in (".sqlite", ".db"):
+        from src.almacen import AlmacenPrecios
+        df = AlmacenPrecios(ruta).consultar()
+    elif extension == ".parquet":
+        df = pd.read_parquet(ruta)
+    else:
+        df = pd.read_csv(ruta)
+    if "sheet" not in df.columns:
+        df["sheet"] = "Nacional"
+    return compactar(df)
+
+
+class DatosConsulta:
+    """
+    Conjunto de datos que sirve la API: los precios y su cubo de promedios y
+    variaciones, calculados una vez al cargar. Las consultas devuelven
+    respuestas JSON ya serializadas y se guardan en una caché LRU que se
+    vacía al recargar.
+    """
+
+    def __init__(self, ruta: str, tamano_cache: int = 1024):
+        """
+        Args:
+            ruta (str): Archivo de datos (ver cargar_precios)
+            tamano_cache (int): Respuestas que se mantienen en la caché LRU
+        """
+        self.ruta = ruta
+        self.responder = lru_cache(maxsize=tamano_cache)(self._responder)
+        self.firma: Optional[Tuple[float, int]] = None
+        self.cargar()
+
+    def _firma_archivo(self) -> Optional[Tuple[float, int]]:
+        rutas = glob.glob(self.ruta) if glob.has_magic(self.ruta) else [self.ruta]
+        try:
+            return max((os.stat(r).st_mtime, os.stat(r).st_size) for r in rutas) if rutas else None
+        except OSError:
+            return None
+
+    def cargar(self) -> None:
+        """Lee los datos y los aplica (ver leer y aplicar)."""
+        self.aplicar(self.leer())
+
+    def leer(self) -> Carga:
+        """
+        Lee los datos y calcula su cubo sin tocar los que se están sirviendo, por
+        eso puede ejecutarse en otro hilo.
+
+        Returns:
+            Carga: Precios, cubo y firma del archivo, para aplicar
+        """
+        inicio = time.perf_counter()
+        firma = self._firma_archivo()
+        precios = cargar_precios(self.ruta)
+        cubo = calcular_variaciones(calcular_promedios(precios))
+        cubo["Date"] = pd.to_datetime(cubo["date"])
+        logging.info(
+            f"Datos de la API cargados desde {self.ruta}: {len(precios)} precios, "
+            f"{len(cubo)} filas del cubo en {time.perf_counter() - inicio:.2f}s"
+        )
+        return precios, cubo, firma
+
+    def aplicar(self, carga: Carga) -> None:
+        """
+        Reemplaza los datos servidos y vacía la caché en un solo paso. Se llama
+        desde el hilo que atiende las consultas (el event loop): si se hiciera en
+        el hilo de la recarga, una consulta atendida entre el reemplazo y el
+        vaciado podría dejar en la caché una respuesta de los datos anteriores.
+
+        Args:
+            carga (Carga): Resultado de leer
+        """
+        self.precios, self.cubo, self.firma = carga
+        self.responder.cache_clear()
+
+    def cambiaron(self) -> bool:
+        """Indica si el archivo de datos cambió desde la última carga."""
+        return self._firma_archivo() != self.firma
+
+    def _responder(self, ruta: str, parametros: Tuple[Tuple[str, Tuple[str, ...]], ...]) -> Respuesta:
+        consultas: Dict[str, Callable[[Dict[str, List[str]]], object]] = {
+            "/meta": self.meta,
+            "/series": self.series,
+            "/ultimo": self.ultimo,
+            "/ranking": self.ranking,
+        }
+        if ruta not in consultas:
+            return _respuesta(404, {"error": f"Ruta desconocida: {ruta}", "rutas": sorted(consultas)})
+        try:
+            return _respuesta(200, consultas[ruta]({clave: list(valores) for clave, valores in parametros}))
+        except ErrorConsulta as e:
+            return _respuesta(400, {"error": str(e)})
+
+    def consultar(self, ruta: str, consulta: str) -> Respuesta:
+        """
+        Respuesta a una consulta, desde la caché si ya se hizo.
+
+        Args:
+            ruta (str): Ruta del endpoint
+            consulta (str): Query string
+
+        Returns:
+            Respuesta: Estado HTTP, cuerpo JSON y ETag
+        """
+        parametros = parse_qs(consulta, keep_blank_values=False)
+        clave = tuple(sorted((nombre, tuple(valores)) for nombre, valores in parametros.items()))
+        return self.responder(ruta.rstrip("/") or "/", clave)
+
+    def meta(self, parametros: Dict[str, List[str]]) -> Dict:
+        fechas = self.precios["Date"]
+        return {
+            "hojas": sorted(self.precios["sheet"].unique().tolist()),
+            "regiones": self.precios["Región"].cat.remove_unused_categories().cat.categories.tolist(),
+            "productos": self.precios["Productos seleccionados"].cat.remove_unused_categories().cat.categories.tolist(),
+            "desde": fechas.min().strftime("%Y-%m-%d"),
+            "hasta": fechas.max().strftime("%Y-%m-%d"),
+            "filas": len(self.precios),
+        }
+
+    def series(self, parametros: Dict[str, List[str]]) -> List[Dict]:
+        """Precios de los productos y regiones pedidos, por fecha."""
+        precios = self.precios
+        mascara = precios["sheet"] == _unico(parametros, "sheet", "Nacional")
+        for nombre, columna in (("producto", "Productos seleccionados"), ("region", "Región")):
+            if nombre in parametros:
+                mascara &= precios[columna].isin(parametros[nombre])
+        if "desde" in parametros:
+            mascara &= precios["Date"] >= _fecha(_unico(parametros, "desde"))
+        if "hasta" in parametros:
+            mascara &= precios["Date"] <= _fecha(_unico(parametros, "hasta"))
+        resultado = precios.loc[mascara, ["Región", "Productos seleccionados", "Unidad de medida", "Date", "Price"]]
+        return _registros(resultado.sort_values(["Productos seleccionados", "Región", "Date"]))
+
+    def _nivel(self, sheet: str, nivel: str, fecha: Optional[pd.Timestamp] = None) -> pd.DataFrame:
+        cubo = self.cubo[(self.cubo["sheet"] == sheet) & (self.cubo["nivel"] == nivel)]
+        if fecha is not None:
+            cubo = cubo[cubo["Date"] == fecha]
+        return cubo.rename(columns={"region": "Región", "producto": "Productos seleccionados"})[
+            NIVELES[nivel] + ["Date", "promedio", "var_mensual", "var_interanual"]
+        ]
+
+    def _ultimo_mes(self, sheet: str) -> pd.Timestamp:
+        fechas = self.cubo.loc[self.cubo["sheet"] == sheet, "Date"]
+        if fechas.empty:
+            raise ErrorConsulta(f"No hay datos de la hoja {sheet}")
+        return fechas.max()
+
+    def ultimo(self, parametros: Dict[str, List[str]]) -> Dict:
+        """Promedios y variaciones del último mes por región y por producto."""
+        sheet = _unico(parametros, "sheet", "Nacional")
+        fecha = self._ultimo_mes(sheet)
+        regiones = self._nivel(sheet, "region", fecha).sort_values("var_mensual", ascending=False)
+        productos = self._nivel(sheet, "producto", fecha).sort_values("var_mensual", ascending=False)
+        variacion = regiones["var_mensual"].mean()
+        return {
+            "sheet": sheet,
+            "fecha": fecha.strftime("%Y-%m-%d"),
+            "variacion_promedio": None if pd.isna(variacion) else round(float(variacion), 4),
+            "regiones": _registros(regiones),
+            "productos": _registros(productos),
+        }
+
+    def ranking(self, parametros: Dict[str, List[str]]) -> List[Dict]:
+        """Series de un nivel del cubo ordenadas por variación en un mes (por defecto, el último)."""
+        sheet = _unico(parametros, "sheet", "Nacional")
+        nivel = _unico(parametros, "nivel", "producto")
+        variacion = _unico(parametros, "variacion", "var_mensual")
+        orden = _unico(parametros, "orden", "desc")
+        if nivel not in NIVELES:
+            raise ErrorConsulta(f"Nivel desconocido: {nivel} (opciones: {', '.join(NIVELES)})")
+        if variacion not in VARIACIONES:
+            raise ErrorConsulta(f"Variación desconocida: {variacion} (opciones: {', '.join(VARIACIONES)})")
+        if orden not in ("asc", "desc"):
+            raise ErrorConsulta("El orden debe ser 'asc' o 'desc'")
+        try:
+            n = int(_unico(parametros, "n", "10"))
+        except ValueError:
+            n = 0
+        if n < 1:
+            raise ErrorConsulta("n debe ser un número entero positivo")
+        fecha = _fecha(_unico(parametros, "fecha")) if "fecha" in parametros else self._ultimo_mes(sheet)
+
+        resultado = self._nivel(sheet, nivel, fecha).dropna(subset=[variacion])
+        resultado = resultado.sort_values(variacion, ascending=orden == "asc")
+        return _registros(resultado.head(n))
+
+
+def _unico(parametros: Dict[str, List[str]], nombre: str, defecto: Optional[str] = None) -> str:
+    valores = parametros.get(nombre)
+    if not valores:
+        if defecto is None:
+            raise ErrorConsulta(f"Falta el parámetro {nombre}")
+        return defecto
+    if len(valores) > 1:
+        raise ErrorConsulta(f"El parámetro {nombre} admite un solo valor")
+    return valores[0]
+
+
+def _fecha(valor: str) -> pd.Timestamp:
+    try:
+        return pd.Timestamp(valor)
+    except ValueError:
+        raise ErrorConsulta(f"Fecha inválida: {valor}")
+
+
+def _registros(df: pd.DataFrame) -> List[Dict]:
+    """Filas como diccionarios, con fechas YYYY-MM-DD y NaN como null."""
+    df = df.assign(Date=df["Date"].dt.strftime("%Y-%m-%d"))
+    return json.loads(df.to_json(orient="records", force_ascii=False, double_precision=4))
+
+
+def _respuesta(estado: int, contenido: object) -> Respuesta:
+    cuerpo = json.dumps(contenido, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+    return estado, cuerpo, '"' + hashlib.blake2b(cuerpo, digest_size=8).hexdigest() + '"'
+
+
+class ServidorConsultas:
+    """
+    Servidor HTTP/1.1 mínimo (GET y HEAD, keep-alive) sobre asyncio. Cada
+    tanto revisa si el archivo de datos cambió y lo recarga en un hilo,
+    mientras sigue respondiendo con los datos anteriores.
+    """
+
+    def __init__(self, datos: DatosConsulta, intervalo_recarga: float = 30.0, espera_inactiva: float = 15.0):
+        """
+        Args:
+            datos (DatosConsulta): Datos a servir
+            intervalo_recarga (float): Segundos entre revisiones del archivo de datos
+            espera_inactiva (float): Segundos que se mantiene abierta una conexión sin pedidos
+        """
+        self.datos = datos
+        self.intervalo_recarga = intervalo_recarga
+        self.espera_inactiva = espera_inactiva
+        self._revisado = time.monotonic()
+        self._recargando = False
+
+    def _revisar_recarga(self) -> None:
+        """Si el archivo cambió, lo lee en un hilo; los datos se aplican en el event loop (ver _fin_recarga)."""
+        ahora = time.monotonic()
+        if self._recargando or ahora - self._revisado < self.intervalo_recarga:
+            return
+        self._revisado = ahora
+        if self.datos.cambiaron():
+            self._recargando = True
+            futuro = asyncio.get_running_loop().run_in_executor(None, self.datos.leer)
+            futuro.add_done_callback(self._fin_recarga)
+
+    def _fin_recarga(self, futuro: asyncio.Future) -> None:
+        # Los callbacks de un futuro de asyncio corren en el event loop, entre una
+        # consulta y otra: el reemplazo y el vaciado de la caché son atómicos para ellas
+        self._recargando = False
+        if futuro.exception() is not None:
+            logging.error(f"Error al recargar los datos de la API: {str(futuro.exception())}")
+            return
+        self.datos.aplicar(futuro.result())
+
+    async def atender(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        """Atiende los pedidos de una conexión hasta que el cliente la cierra."""
+        try:
+            while True:
+                try:
+                    linea = await asyncio.wait_for(reader.readline(), self.espera_inactiva)
+                except asyncio.TimeoutError:
+                    break
+                if not linea:
+                    break
+                partes = linea.decode("latin-1").split()
+                cabeceras: Dict[str, str] = {}
+                while True:
+                    cabecera = await reader.readline()
+                    if cabecera in (b"\r\n", b"\n", b""):
+                        break
+                    nombre, _, valor = cabecera.decode("latin-1").partition(":")
+                    cabeceras[nombre.strip().lower()] = valor.strip()
+                if len(partes) != 3:
+                    _, cuerpo, _ = _respuesta(400, {"error": "Línea de pedido inválida"})
+                    writer.write(f"HTTP/1.1 400 {MOTIVOS[400]}\r\nContent-Type: application/json; charset=utf-8\r\n"
+                                 f"Content-Length: {len(cuerpo)}\r\nConnection: close\r\n\r\n".encode("latin-1")
+                                 + cuerpo)
+                    await writer.drain()
+                    break
+
+                metodo, destino, version = partes
+                conexion = cabeceras.get("connection", "").lower()
+                seguir = conexion != "close" if version == "HTTP/1.1" else conexion == "keep-alive"
+                writer.write(self._responder(metodo, destino, cabeceras, seguir))
+                await writer.drain()
+                if not seguir:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        except Exception as e:
+            logging.error(f"Error al atender una conexión de la API: {str(e)}")
+        finally:
+            writer.close()
+
+    def _responder(self, metodo: str, destino: str, cabeceras: Dict[str, str], seguir: bool) -> bytes:
+        if metodo not in ("GET", "HEAD"):
+            estado, cuerpo, etag = _respuesta(405, {"error": f"Método no permitido: {metodo}"})
+        else:
+            self._revisar_recarga()
+            partes = urlsplit(destino)
+            try:
+                estado, cuerpo, etag = self.datos.consultar(partes.path, partes.query)
+            except Exception as e:
+                logging.error(f"Error en la consulta {destino}: {str(e)}")
+                estado, cuerpo, etag = _respuesta(400, {"error": str(e)})
+            if estado == 200 and etag in (v.strip() for v in cabeceras.get("if-none-match", "").split(",")):
+                estado, cuerpo = 304, b""
+
+        encabezado = (
+            f"HTTP/1.1 {estado} {MOTIVOS[estado]}\r\n"
+            f"Content-Type: application/json; charset=utf-8\r\n"
+            f"Content-Length: {len(cuerpo)}\r\n"
+            f"ETag: {etag}\r\n"
+            f"Cache-Control: no-cache\r\n"
+            f"Connection: {'keep-alive' if seguir else 'close'}\r\n\r\n"
+        ).encode("latin-1")
+        return encabezado if metodo == "HEAD" or estado == 304 else encabezado + cuerpo
+
+    async def servir(self, host: str = "127.0.0.1", puerto: int = 8080,
+                     listo: Optional[Callable[[int], None]] = None) -> None:
+        """
+        Escucha hasta que se cancela la tarea.
+
+        Args:
+            host (str): Dirección en la que escuchar
+            puerto (int): Puerto (0 elige uno libre)
+            listo (Optional[Callable[[int], None]]): Se llama con el puerto cuando el servidor escucha
+        """
+        servidor = await asyncio.start_server(self.atender, host, puerto)
+        puerto = servidor.sockets[0].getsockname()[1]
+        logging.info(f"API de consultas escuchando en http://{host}:{puerto}")
+        if listo is not None:
+            listo(puerto)
+        async with servidor:
+            await servidor.serve_forever()
+
+
+def main() -> None:
+    configurar_logging()
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--datos", default="data/precios.sqlite",
+                        help="Almacén SQLite, Parquet, CSV procesado o patrón (se usa el más reciente)")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--puerto", type=int, default=8080)
+    parser.add_argument("--cache", type=int, default=1024, help="Respuestas en la caché LRU")
+    parser.add_argument("--recarga", type=float, default=30.0, help="Segundos entre revisiones del archivo de datos")
+    args = parser.parse_args()
+
+    servidor = ServidorConsultas(DatosConsulta(args.datos, args.cache), intervalo_recarga=args.recarga)
+    try:
+        asyncio.run(servidor.servir(args.host, args.puerto))
+    except KeyboardInterrupt:
+        logging.info("API de consultas detenida")
+
+
+if __name__ == "__main__":
+    main()
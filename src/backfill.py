@@ -0,0 +1,187 @@
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Dict, List, Optional, Tuple
+import argparse
+import json
+import logging
+import os
+import time
+
+import pandas as pd
+
+from src.cache import CacheDescargas, CacheHojas, Descarga, escribir_atomico, sha256_archivo
+from src.metricas import configurar_logging
+from src.pipeline import transformar_hojas
+from src.salidas import crear_salida, escribir_salidas
+from src.scraper import IndecScraper
+from src.transformaciones import compactar
+
+# Claves que identifican un precio; entre publicaciones que se superponen gana la más reciente
+CLAVES_PRECIO = ["sheet", "Región", "Productos seleccionados", "Unidad de medida", "Date"]
+
+
+class Backfill:
+    """
+    Ingesta histórica de libros del INDEC (URLs o archivos XLS locales).
+
+    Descarga los libros en paralelo con un pool acotado, los transforma con
+    TransformadorDatos y guarda el resultado de cada uno como Parquet. El
+    avance queda registrado en un archivo de estado, de modo que una corrida
+    interrumpida retoma desde los libros pendientes.
+    """
+
+    def __init__(self, directorio: str = ".cache/backfill", descargas: int = 4,
+                 workers: Optional[int] = None, hojas: Optional[List[str]] = None):
+        """
+        Args:
+            directorio (str): Carpeta del archivo de estado y los resultados parciales
+            descargas (int): Descargas simultáneas
+            workers (Optional[int]): Procesos para transformar las hojas de cada libro
+            hojas (Optional[List[str]]): Hojas a procesar (todas las compatibles si es None)
+        """
+        self.directorio = directorio
+        self.descargas = descargas
+        self.workers = workers
+        self.hojas = hojas
+        self.ruta_estado = os.path.join(directorio, "estado.json")
+        self.scraper = IndecScraper(cache_descargas=CacheDescargas(), cache_hojas=CacheHojas())
+        self.estado = self._cargar_estado()
+
+    def _cargar_estado(self) -> Dict[str, Dict]:
+        try:
+            with open(self.ruta_estado, encoding="utf-8") as archivo:
+                return json.load(archivo)
+        except (OSError, ValueError):
+            return {}
+
+    def _guardar_estado(self) -> None:
+        escribir_atomico(self.ruta_estado, json.dumps(self.estado, indent=2).encode("utf-8"))
+
+    def _completado(self, fuente: str) -> bool:
+        entrada = self.estado.get(fuente)
+        return bool(entrada) and os.path.exists(entrada["resultado"])
+
+    def pendientes(self, fuentes: List[str]) -> List[Tuple[int, str]]:
+        """Libros que todavía no tienen resultado parcial, con su posición en la lista."""
+        return [(orden, fuente) for orden, fuente in enumerate(fuentes) if not self._completado(fuente)]
+
+    def _obtener(self, fuente: str) -> Optional[Descarga]:
+        """Descarga una URL o lee un archivo local."""
+        if os.path.exists(fuente):
+            return Descarga(url=fuente, contenido=None, sha256=sha256_archivo(fuente), ruta=fuente)
+        return self.scraper.descargar_excel(fuente)
+
+    def _procesar(self, orden: int, fuente: str, descarga: Descarga) -> None:
+        """Transforma un libro, guarda su resultado parcial y lo registra en el estado."""
+        hojas = self.scraper.leer_hojas_compatibles(descarga.fuente, self.hojas, descarga.sha256)
+        if not hojas:
+            raise ValueError("el libro no tiene hojas compatibles")
+        df = transformar_hojas(hojas, self.workers)
+
+        ruta = os.path.join(self.directorio, f"{descarga.sha256}.parquet")
+        df.to_parquet(ruta, index=False)
+        self.estado[fuente] = {
+            "orden": orden,
+            "sha256": descarga.sha256,
+            "resultado": ruta,
+            "ultimo_mes": str(df["Date"].max().date()),
+            "filas": len(df),
+        }
+        self._guardar_estado()
+
+    def ejecutar(self, fuentes: List[str], salidas: List[str]) -> Optional[pd.DataFrame]:
+        """
+        Procesa los libros pendientes y escribe el dataset consolidado.
+
+        Args:
+            fuentes (List[str]): URLs o rutas locales de los libros
+            salidas (List[str]): Salidas del dataset consolidado ('formato:ruta' o rutas
+                cuya extensión indica el formato, ver crear_salida)
+
+        Returns:
+            Optional[pd.DataFrame]: Dataset consolidado o None si no hay resultados
+        """
+        os.makedirs(self.directorio, exist_ok=True)
+        destinos = [crear_salida(salida, "data/historico_procesado") for salida in salidas]
+        inicio = time.perf_counter()
+        pendientes = self.pendientes(fuentes)
+        logging.info(f"Backfill: {len(fuentes) - len(pendientes)} libros ya procesados, {len(pendientes)} pendientes")
+
+        errores = 0
+        with ThreadPoolExecutor(max_workers=self.descargas) as pool:
+            futuros = {pool.submit(self._obtener, fuente): (orden, fuente) for orden, fuente in pendientes}
+            for hechos, futuro in enumerate(as_completed(futuros), start=1):
+                orden, fuente = futuros[futuro]
+                try:
+                    descarga = futuro.result()
+                    if descarga is None:
+                        raise ValueError("no se pudo descargar")
+                    self._procesar(orden, fuente, descarga)
+                    logging.info(f"Backfill [{hechos}/{len(pendientes)}] {fuente}: listo")
+                except Exception as e:
+                    errores += 1
+                    logging.error(f"Backfill [{hechos}/{len(pendientes)}] {fuente}: {str(e)}")
+
+        df = self.consolidar(fuentes)
+        if df is None:
+            logging.error("Backfill: no hay resultados para consolidar")
+            return None
+
+        escribir_salidas(df, destinos)
+        logging.info(
+            f"Backfill completado en {time.perf_counter() - inicio:.1f}s: {len(df)} filas en "
+            f"{', '.join(map(repr, destinos))}"
+            + (f" ({errores} libros con error, se reintentarán en la próxima corrida)" if errores else "")
+        )
+        return df
+
+    def consolidar(self, fuentes: List[str]) -> Optional[pd.DataFrame]:
+        """
+        Une los resultados parciales. Si varias publicaciones cubren el mismo mes,
+        gana la más reciente (la de último mes mayor; a igualdad, la última de la lista).
+
+        Args:
+            fuentes (List[str]): URLs o rutas locales de los libros
+
+        Returns:
+            Optional[pd.DataFrame]: Dataset consolidado con product_id recalculado
+        """
+        completadas = [self.estado[fuente] for fuente in fuentes if self._completado(fuente)]
+        if not completadas:
+            return None
+        completadas.sort(key=lambda entrada: (entrada["ultimo_mes"], entrada["orden"]))
+
+        partes = [
+            pd.read_parquet(entrada["resultado"]).assign(_publicacion=posicion)
+            for posicion, entrada in enumerate(completadas)
+        ]
+        df = pd.concat(partes, ignore_index=True)
+        df = (
+            df.sort_values("_publicacion", kind="stable")
+            .drop_duplicates(subset=CLAVES_PRECIO, keep="last")
+            .drop(columns="_publicacion")
+            .sort_values(CLAVES_PRECIO, kind="stable")
+            .reset_index(drop=True)
+        )
+        # Los product_id de cada libro son locales; se recalculan sobre el conjunto
+        df["product_id"] = df.groupby(["Productos seleccionados", "Región", "Unidad de medida"], observed=True).ngroup() + 1
+        return compactar(df)
+
+
+def main() -> None:
+    configurar_logging()
+    parser = argparse.ArgumentParser(description="Ingesta histórica de libros de precios del INDEC")
+    parser.add_argument("fuentes", nargs="+", help="URLs o rutas locales de los libros XLS")
+    parser.add_argument("--salida", action="append", default=None,
+                        help="Salida del dataset consolidado: formato[:ruta] o ruta (repetible; "
+                             "formatos: csv, csv.gz, parquet, sqlite, jsonl)")
+    parser.add_argument("--directorio", default=".cache/backfill", help="Estado y resultados parciales")
+    parser.add_argument("--descargas", type=int, default=4, help="Descargas simultáneas")
+    parser.add_argument("--workers", type=int, default=None, help="Procesos para transformar hojas")
+    parser.add_argument("--hojas", nargs="*", default=None, help="Hojas a procesar")
+    args = parser.parse_args()
+
+    Backfill(args.directorio, args.descargas, args.workers, args.hojas).ejecutar(args.fuentes, args.salida or ["data/historico_procesado.csv"])
+
+
+if __name__ == "__main__":
+    main()
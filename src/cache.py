@@ -0,0 +1,321 @@
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import IO, Dict, Iterator, Optional, Union
+import hashlib
+import io
+import json
+import logging
+import os
+import shutil
+import stat
+import tempfile
+import threading
+
+# umask del proceso, leída al crear el primer archivo (ver umask_proceso)
+_umask: Optional[int] = None
+_candado_umask = threading.Lock()
+
+# Ruta de un libro o su contenido
+Fuente = Union[str, bytes]
+
+# Bytes de cada bloque al copiar o hashear archivos
+TAMANO_BLOQUE = 2**20
+
+
+def sha256_bytes(contenido: bytes) -> str:
+    """Devuelve el SHA-256 hexadecimal de un contenido."""
+    return hashlib.sha256(contenido).hexdigest()
+
+
+def sha256_archivo(ruta: str) -> str:
+    """Devuelve el SHA-256 hexadecimal de un archivo, leyéndolo por bloques."""
+    sha = hashlib.sha256()
+    with open(ruta, "rb") as archivo:
+        for bloque in iter(lambda: archivo.read(TAMANO_BLOQUE), b""):
+            sha.update(bloque)
+    return sha.hexdigest()
+
+
+def _leer_umask() -> int:
+    """Lee la umask de /proc/self/status (Linux) o, si no está, cambiándola y restaurándola."""
+    try:
+        with open("/proc/self/status", encoding="ascii") as estado:
+            for linea in estado:
+                if linea.startswith("Umask:"):
+                    return int(linea.split()[1], 8)
+    except (OSError, ValueError):
+        pass
+    umask = os.umask(0)
+    os.umask(umask)
+    return umask
+
+
+def umask_proceso() -> int:
+    """
+    umask del proceso, leída una sola vez y no en cada escritura (las salidas
+    se escriben desde varios hilos). Importar el módulo no la toca.
+    """
+    global _umask
+    with _candado_umask:
+        if _umask is None:
+            _umask = _leer_umask()
+        return _umask
+
+
+def _permisos(ruta: str) -> int:
+    """Permisos del archivo existente en `ruta`, o 0666 menos la umask si no existe."""
+    try:
+        return stat.S_IMODE(os.stat(ruta).st_mode)
+    except FileNotFoundError:
+        return 0o666 & ~umask_proceso()
+
+
+@contextmanager
+def ruta_atomica(ruta: str) -> Iterator[str]:
+    """
+    Entrega la ruta de un temporal del mismo directorio que `ruta` y, si el bloque
+    termina sin errores, lo renombra a `ruta`; si falla, lo borra. Así nunca
+    queda un archivo a medio escribir. El archivo final conserva los permisos
+    del que reemplaza o, si es nuevo, recibe los de un archivo creado con open()
+    (mkstemp crea los temporales con 0600).
+
+    Args:
+        ruta (str): Ruta final del archivo
+    """
+    directorio = os.path.dirname(ruta) or "."
+    os.makedirs(directorio, exist_ok=True)
+    fd, temporal = tempfile.mkstemp(dir=directorio, prefix=".tmp-")
+    os.close(fd)
+    try:
+        yield temporal
+        os.chmod(temporal, _permisos(ruta))
+        os.replace(temporal, ruta)
+    except BaseException:
+        if os.path.exists(temporal):
+            os.remove(temporal)
+        raise
+
+
+def escribir_atomico(ruta: str, contenido: bytes) -> None:
+    """
+    Escribe un archivo de forma atómica (ver ruta_atomica).
+
+    Args:
+        ruta (str): Ruta final del archivo
+        contenido (bytes): Contenido a escribir
+    """
+    with ruta_atomica(ruta) as temporal:
+        with open(temporal, "wb") as archivo:
+            archivo.write(contenido)
+
+
+def copiar_con_hash(origen: IO[bytes], ruta: str) -> str:
+    """
+    Copia un archivo abierto (desde su posición actual) a `ruta` de forma
+    atómica, por bloques, calculando su hash al pasar.
+
+    Args:
+        origen (IO[bytes]): Archivo de origen
+        ruta (str): Ruta final del archivo
+
+    Returns:
+        str: SHA-256 hexadecimal de lo copiado
+    """
+    sha = hashlib.sha256()
+    with ruta_atomica(ruta) as temporal:
+        with open(temporal, "wb") as archivo:
+            for bloque in iter(lambda: origen.read(TAMANO_BLOQUE), b""):
+                sha.update(bloque)
+                archivo.write(bloque)
+    return sha.hexdigest()
+
+
+@dataclass
+class Descarga:
+    """
+    Resultado de una descarga a través de la caché. El cuerpo está en memoria
+    (`contenido`) o en disco (`ruta`, sin cargarlo): `fuente` devuelve el que haya.
+    """
+    url: str
+    contenido: Optional[bytes]
+    sha256: str
+    desde_cache: bool = False
+    ya_procesada: bool = False
+    ruta: Optional[str] = None
+
+    @property
+    def fuente(self) -> Fuente:
+        """Contenido o ruta del cuerpo, para leer el libro sin copiarlo a memoria."""
+        return self.contenido if self.contenido is not None else self.ruta
+
+    @property
+    def tamano(self) -> int:
+        return len(self.contenido) if self.contenido is not None else os.path.getsize(self.ruta)
+
+    def copiar(self, ruta: str) -> None:
+        """
+        Escribe el cuerpo en `ruta` de forma atómica.
+
+        Args:
+            ruta (str): Ruta del archivo de destino
+        """
+        if self.contenido is not None:
+            escribir_atomico(ruta, self.contenido)
+            return
+        with ruta_atomica(ruta) as temporal:
+            shutil.copyfile(self.ruta, temporal)
+
+
+class CacheDescargas:
+    """
+    Caché en disco de descargas, indexada por URL.
+
+    Por cada URL guarda el cuerpo, el ETag, el Last-Modified y el SHA-256 del
+    contenido, además del hash del último archivo procesado con éxito. Permite
+    hacer peticiones condicionales y saltear el procesamiento cuando el
+    contenido no cambió.
+    """
+
+    def __init__(self, directorio: str = ".cache/descargas"):
+        """
+        Args:
+            directorio (str): Carpeta donde se guardan los cuerpos y metadatos
+        """
+        self.directorio = directorio
+
+    def _clave(self, url: str) -> str:
+        return sha256_bytes(url.encode("utf-8"))[:32]
+
+    def _ruta_metadatos(self, url: str) -> str:
+        return os.path.join(self.directorio, f"{self._clave(url)}.json")
+
+    def _ruta_cuerpo(self, url: str) -> str:
+        return os.path.join(self.directorio, f"{self._clave(url)}.bin")
+
+    def entrada(self, url: str) -> Optional[Dict]:
+        """
+        Devuelve los metadatos guardados para una URL.
+
+        Args:
+            url (str): URL descargada
+
+        Returns:
+            Optional[Dict]: Metadatos o None si la URL no está en caché
+        """
+        try:
+            with open(self._ruta_metadatos(url), encoding="utf-8") as archivo:
+                entrada = json.load(archivo)
+        except (OSError, ValueError):
+            return None
+        if not os.path.exists(self._ruta_cuerpo(url)):
+            return None
+        return entrada
+
+    def cabeceras_condicionales(self, url: str) -> Dict[str, str]:
+        """
+        Arma las cabeceras If-None-Match / If-Modified-Since para una URL en caché.
+
+        Args:
+            url (str): URL a descargar
+
+        Returns:
+            Dict[str, str]: Cabeceras condicionales (vacío si no hay caché)
+        """
+        entrada = self.entrada(url)
+        if entrada is None:
+            return {}
+        cabeceras = {}
+        if entrada.get("etag"):
+            cabeceras["If-None-Match"] = entrada["etag"]
+        if entrada.get("last_modified"):
+            cabeceras["If-Modified-Since"] = entrada["last_modified"]
+        return cabeceras
+
+    def leer(self, url: str) -> Optional[Descarga]:
+        """
+        Lee de disco la descarga guardada para una URL.
+
+        Args:
+            url (str): URL descargada
+
+        Returns:
+            Optional[Descarga]: Descarga cacheada o None si no existe
+        """
+        entrada = self.entrada(url)
+        if entrada is None:
+            return None
+        ruta = self._ruta_cuerpo(url)
+        sha = sha256_archivo(ruta)
+        if sha != entrada.get("sha256"):
+            logging.warning(f"Caché corrupta para {url}, se descartará")
+            return None
+        return Descarga(
+            url=url,
+            contenido=None,
+            sha256=sha,
+            desde_cache=True,
+            ya_procesada=sha == entrada.get("procesado_sha256"),
+            ruta=ruta,
+        )
+
+    def guardar(self, url: str, contenido: Union[bytes, IO[bytes]], etag: Optional[str] = None,
+                last_modified: Optional[str] = None) -> Descarga:
+        """
+        Guarda una descarga nueva conservando el hash del último archivo procesado.
+        El cuerpo se copia por bloques y la descarga queda apuntando al archivo de
+        la caché, sin cargarlo en memoria.
+
+        Args:
+            url (str): URL descargada
+            contenido (Union[bytes, IO[bytes]]): Cuerpo de la respuesta, o un archivo
+                abierto con el cuerpo (se lee desde su posición actual)
+            etag (Optional[str]): Cabecera ETag de la respuesta
+            last_modified (Optional[str]): Cabecera Last-Modified de la respuesta
+
+        Returns:
+            Descarga: Descarga registrada
+        """
+        if isinstance(contenido, bytes):
+            contenido = io.BytesIO(contenido)
+        ruta = self._ruta_cuerpo(url)
+        sha = copiar_con_hash(contenido, ruta)
+        anterior = self.entrada(url) or {}
+        entrada = {
+            "url": url,
+            "etag": etag,
+            "last_modified": last_modified,
+            "sha256": sha,
+            "procesado_sha256": anterior.get("procesado_sha256"),
+        }
+        escribir_atomico(self._ruta_metadatos(url), json.dumps(entrada, indent=2).encode("utf-8"))
+        return Descarga(
+            url=url,
+            contenido=None,
+            sha256=sha,
+            ya_procesada=sha == entrada["procesado_sha256"],
+            ruta=ruta,
+        )
+
+    def marcar_procesado(self, url: str, sha256: str) -> None:
+        """
+        Registra que el contenido con ese hash ya fue procesado con éxito.
+
+        Args:
+            url (str): URL descargada
+            sha256 (str): Hash del contenido procesado
+        """
+        entrada = self.entrada(url)
+        if entrada is None:
+            return
+        entrada["procesado_sha256"] = sha256
+        escribir_atomico(self._ruta_metadatos(url), json.dumps(entrada, indent=2).encode("utf-8"))
+
+
+def __getattr__(nombre: str):
+    # La caché de hojas y su codec columnar necesitan pandas y numpy: se importan
+    # recién al usarlos, para que la caché de descargas y la escritura atómica
+    # no los carguen (ver src/cache_hojas.py)
+    if nombre in ("CacheHojas", "codificar_hoja", "decodificar_hoja"):
+        from src import cache_hojas
+        return getattr(cache_hojas, nombre)
+    raise AttributeError(f"module {__name__!r} has no attribute {nombre!r}")
@@ -0,0 +1,222 @@
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import quote
+import json
+import logging
+import os
+
+import numpy as np
+import pandas as pd
+
+from src.cache import escribir_atomico
+
+# Tipos de celda de las columnas object al guardarlas en formato columnar
+_NULO, _TEXTO, _ENTERO, _REAL, _FECHA, _BOOLEANO = range(6)
+
+
+def _tipo_celda(valor: Any) -> int:
+    if isinstance(valor, bool):
+        return _BOOLEANO
+    if isinstance(valor, (int, np.integer)):
+        return _ENTERO
+    if isinstance(valor, (float, np.floating)):
+        return _NULO if np.isnan(valor) else _REAL
+    if isinstance(valor, datetime):
+        return _FECHA
+    if valor is None:
+        return _NULO
+    return _TEXTO
+
+
+# Atajo para los tipos exactos más comunes; el resto pasa por _tipo_celda
+_TIPOS_POR_CLASE = {str: _TEXTO, int: _ENTERO, float: _REAL, bool: _BOOLEANO, datetime: _FECHA}
+
+
+def _tipos_celdas(valores: np.ndarray) -> np.ndarray:
+    tipos = np.fromiter(
+        (_TIPOS_POR_CLASE.get(type(v), -1) for v in valores), dtype="int8", count=len(valores)
+    )
+    for i in np.flatnonzero(tipos < 0):
+        tipos[i] = _tipo_celda(valores[i])
+    tipos[pd.isna(valores)] = _NULO
+    return tipos
+
+
+def _codificar_etiqueta(etiqueta: Any) -> List:
+    tipo = _tipo_celda(etiqueta)
+    if tipo == _FECHA:
+        return [tipo, etiqueta.isoformat()]
+    if tipo in (_ENTERO, _BOOLEANO):
+        return [tipo, int(etiqueta)]
+    if tipo in (_REAL, _NULO):
+        return [tipo, None if tipo == _NULO else float(etiqueta)]
+    return [tipo, str(etiqueta)]
+
+
+def _decodificar_etiqueta(codigo: List) -> Any:
+    tipo, valor = codigo
+    if tipo == _FECHA:
+        return pd.Timestamp(valor).to_pydatetime()
+    if tipo == _BOOLEANO:
+        return bool(valor)
+    if tipo == _NULO:
+        return np.nan
+    return valor
+
+
+def codificar_hoja(df: pd.DataFrame) -> Tuple[pd.DataFrame, Dict]:
+    """
+    Convierte una hoja leída de Excel a columnas de tipo único, aptas para Feather/Parquet.
+
+    Las columnas object de una hoja mezclan textos, números y fechas; cada una se
+    separa en una columna de texto, una numérica, una de fechas y un código de
+    tipo por celda que permite reconstruirla sin pérdida.
+
+    Args:
+        df (pd.DataFrame): Hoja tal como la devuelve pd.read_excel
+
+    Returns:
+        Tuple[pd.DataFrame, Dict]: Tabla columnar y metadatos para decodificarla
+    """
+    columnas = {}
+    meta = {"etiquetas": [], "mixtas": []}
+    for i, (etiqueta, serie) in enumerate(df.items()):
+        meta["etiquetas"].append(_codificar_etiqueta(etiqueta))
+        nombre = f"c{i}"
+        if serie.dtype != object:
+            columnas[nombre] = serie.to_numpy()
+            continue
+
+        valores = serie.to_numpy()
+        tipos = _tipos_celdas(valores)
+        es_numero = np.isin(tipos, (_ENTERO, _REAL, _BOOLEANO))
+        es_texto = tipos == _TEXTO
+        es_fecha = tipos == _FECHA
+
+        numeros = np.full(len(valores), np.nan)
+        numeros[es_numero] = valores[es_numero].astype("float64")
+        textos = np.full(len(valores), None, dtype=object)
+        textos[es_texto] = [str(v) for v in valores[es_texto]]
+        fechas = np.full(len(valores), np.datetime64("NaT"), dtype="datetime64[ns]")
+        if es_fecha.any():
+            fechas[es_fecha] = pd.to_datetime(list(valores[es_fecha])).to_numpy()
+
+        columnas[f"{nombre}_tipo"] = tipos
+        columnas[f"{nombre}_num"] = numeros
+        columnas[f"{nombre}_txt"] = textos
+        columnas[f"{nombre}_fec"] = fechas
+        meta["mixtas"].append(i)
+    return pd.DataFrame(columnas, index=pd.RangeIndex(len(df))), meta
+
+
+def decodificar_hoja(tabla: pd.DataFrame, meta: Dict) -> pd.DataFrame:
+    """
+    Reconstruye una hoja a partir de la tabla y los metadatos de codificar_hoja.
+
+    Args:
+        tabla (pd.DataFrame): Tabla columnar
+        meta (Dict): Metadatos de codificación
+
+    Returns:
+        pd.DataFrame: Hoja original
+    """
+    mixtas = set(meta["mixtas"])
+    columnas = []
+    for i in range(len(meta["etiquetas"])):
+        nombre = f"c{i}"
+        if i not in mixtas:
+            columnas.append(tabla[nombre])
+            continue
+
+        tipos = tabla[f"{nombre}_tipo"].to_numpy()
+        numeros = tabla[f"{nombre}_num"].to_numpy()
+        valores = np.full(len(tipos), np.nan, dtype=object)
+        for tipo, convertir in (
+            (_ENTERO, lambda x: x.astype("int64")),
+            (_REAL, lambda x: x),
+            (_BOOLEANO, lambda x: x.astype(bool)),
+        ):
+            mascara = tipos == tipo
+            if mascara.any():
+                valores[mascara] = convertir(numeros[mascara])
+        mascara = tipos == _TEXTO
+        if mascara.any():
+            valores[mascara] = tabla[f"{nombre}_txt"].to_numpy()[mascara]
+        mascara = tipos == _FECHA
+        if mascara.any():
+            valores[mascara] = pd.DatetimeIndex(tabla[f"{nombre}_fec"].to_numpy()[mascara]).to_pydatetime()
+        columnas.append(pd.Series(valores, index=tabla.index))
+
+    df = pd.concat(columnas, axis=1) if columnas else pd.DataFrame(index=tabla.index)
+    df.columns = [_decodificar_etiqueta(codigo) for codigo in meta["etiquetas"]]
+    return df
+
+
+class CacheHojas:
+    """
+    Memo en disco de hojas de Excel ya parseadas, indexado por el SHA-256 del
+    libro y el nombre de la hoja. Las hojas se guardan en Feather (requiere
+    pyarrow); sin pyarrow la caché queda deshabilitada.
+    """
+
+    def __init__(self, directorio: str = ".cache/hojas"):
+        """
+        Args:
+            directorio (str): Carpeta donde se guardan las hojas parseadas
+        """
+        self.directorio = directorio
+        try:
+            import pyarrow  # noqa: F401
+            self.habilitada = True
+        except ImportError:
+            logging.warning("pyarrow no está instalado; la caché de hojas queda deshabilitada")
+            self.habilitada = False
+
+    def _ruta(self, sha256: str, hoja: str) -> str:
+        return os.path.join(self.directorio, sha256, f"{quote(hoja, safe='')}.feather")
+
+    def obtener(self, sha256: str, hoja: str) -> Optional[pd.DataFrame]:
+        """
+        Devuelve la hoja parseada si está en caché.
+
+        Args:
+            sha256 (str): Hash del contenido del libro
+            hoja (str): Nombre de la hoja
+
+        Returns:
+            Optional[pd.DataFrame]: Hoja parseada o None si no está en caché
+        """
+        ruta = self._ruta(sha256, hoja)
+        if not self.habilitada or not os.path.exists(ruta):
+            return None
+        try:
+            from pyarrow import feather
+            tabla = feather.read_table(ruta)
+            meta = json.loads(tabla.schema.metadata[b"hoja"])
+            return decodificar_hoja(tabla.to_pandas(), meta)
+        except Exception as e:
+            logging.warning(f"No se pudo leer la hoja {hoja} de la caché: {str(e)}")
+            return None
+
+    def guardar(self, sha256: str, hoja: str, df: pd.DataFrame) -> None:
+        """
+        Guarda una hoja parseada en la caché.
+
+        Args:
+            sha256 (str): Hash del contenido del libro
+            hoja (str): Nombre de la hoja
+            df (pd.DataFrame): Hoja parseada
+        """
+        if not self.habilitada:
+            return
+        try:
+            import pyarrow as pa
+            from pyarrow import feather
+            tabla, meta = codificar_hoja(df)
+            tabla = pa.Table.from_pandas(tabla, preserve_index=False)
+            tabla = tabla.replace_schema_metadata({"hoja": json.dumps(meta)})
+            sink = pa.BufferOutputStream()
+            feather.write_feather(tabla, sink)
+            escribir_atomico(self._ruta(sha256, hoja), sink.getvalue().to_pybytes())
+        except Exception as e:
+            logging.warning(f"No se pudo guardar la hoja {hoja} en la caché: {str(e)}")
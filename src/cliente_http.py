@@ -0,0 +1,260 @@
+from collections import deque
+from dataclasses import dataclass
+from typing import IO, Callable, Deque, Dict, Mapping, Optional, Tuple, Union
+import logging
+import random
+import tempfile
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from src.metricas import perfilador_actual
+
+# Respuestas del servidor que vale la pena reintentar
+ESTADOS_REINTENTABLES = frozenset({429, 500, 502, 503, 504})
+
+# Errores de red que vale la pena reintentar (incluye cuerpos cortados a mitad de la descarga)
+ERRORES_REINTENTABLES = (requests.ConnectionError, requests.Timeout, requests.exceptions.ChunkedEncodingError)
+
+# Progreso de una descarga: bytes recibidos y total anunciado (None si el servidor no lo informa)
+Progreso = Callable[[int, Optional[int]], None]
+
+
+class DescargaExcedida(requests.RequestException):
+    """El cuerpo de la respuesta supera el tamaño máximo permitido."""
+
+
+@dataclass
+class RespuestaDescarga:
+    """
+    Respuesta de una descarga por bloques. El cuerpo queda en un archivo
+    temporal (en memoria hasta cierto tamaño y en disco después), posicionado
+    al principio.
+    """
+    estado: int
+    cabeceras: Mapping[str, str]
+    archivo: IO[bytes]
+    tamano: int
+
+    def cerrar(self) -> None:
+        self.archivo.close()
+
+    def __enter__(self) -> "RespuestaDescarga":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.cerrar()
+
+
+class ClienteHTTP:
+    """
+    Cliente HTTP compartido por el scraper.
+
+    Usa una sesión de requests con un pool de conexiones keep-alive y reintenta
+    los errores de red, los timeouts y las respuestas 429/5xx con espera
+    exponencial y jitter completo (respetando Retry-After). Las descargas se
+    leen por bloques a un archivo temporal, con un tope de tamaño y un
+    callback de progreso.
+
+    Cada petición se mide como etapa 'http.<método>' del perfilador actual, con
+    la URL, el estado, los intentos y los bytes recibidos; las últimas también
+    quedan en `registros`.
+    """
+
+    def __init__(self, timeout: Union[float, Tuple[float, float]] = (5.0, 30.0), reintentos: int = 3,
+                 espera_base: float = 0.5, espera_maxima: float = 10.0, tamano_maximo: int = 200 * 2**20,
+                 conexiones: int = 10, cabeceras: Optional[Dict[str, str]] = None,
+                 dormir: Callable[[float], None] = time.sleep, aleatorio: Callable[[], float] = random.random,
+                 plazo: Optional[float] = None):
+        """
+        Args:
+            timeout (Union[float, Tuple[float, float]]): Segundos máximos de conexión y de
+                lectura (entre bloques), o uno solo para ambos
+            reintentos (int): Reintentos después del primer intento
+            espera_base (float): Espera antes del primer reintento (se duplica en cada uno)
+            espera_maxima (float): Tope de la espera entre reintentos
+            tamano_maximo (int): Bytes máximos de un cuerpo descargado
+            conexiones (int): Conexiones que se mantienen abiertas por host
+            cabeceras (Optional[Dict[str, str]]): Cabeceras de todas las peticiones
+            dormir (Callable[[float], None]): Espera la cantidad de segundos indicada
+            aleatorio (Callable[[], float]): Número en [0, 1) para el jitter
+            plazo (Optional[float]): Segundos máximos de una petición contando las esperas
+                entre reintentos: no se reintenta si la espera terminaría después (cada
+                intento además tiene su timeout); sin plazo si es None
+        """
+        self.timeout = timeout
+        self.reintentos = reintentos
+        self.espera_base = espera_base
+        self.espera_maxima = espera_maxima
+        self.tamano_maximo = tamano_maximo
+        self.dormir = dormir
+        self.aleatorio = aleatorio
+        self.plazo = plazo
+        self.registros: Deque[Dict] = deque(maxlen=100)
+
+        self.sesion = requests.Session()
+        adaptador = HTTPAdapter(pool_connections=conexiones, pool_maxsize=conexiones, max_retries=0)
+        self.sesion.mount("http://", adaptador)
+        self.sesion.mount("https://", adaptador)
+        self.sesion.headers.update(cabeceras or {})
+
+    def __enter__(self) -> "ClienteHTTP":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.cerrar()
+
+    def cerrar(self) -> None:
+        self.sesion.close()
+
+    def _espera(self, intento: int, respuesta: Optional[requests.Response]) -> float:
+        """Espera antes del reintento: Retry-After si el servidor lo indica, si no exponencial con jitter."""
+        if respuesta is not None:
+            try:
+                # Un Retry-After negativo no se puede esperar: se reintenta enseguida
+                return max(0.0, min(float(respuesta.headers.get("Retry-After", "")), self.espera_maxima))
+            except ValueError:
+                pass
+        return self.aleatorio() * min(self.espera_maxima, self.espera_base * 2 ** intento)
+
+    def _espera_reintento(self, intento: int, inicio: float,
+                          respuesta: Optional[requests.Response]) -> Optional[float]:
+        """Espera antes del próximo intento, o None si no hay que reintentar (sin reintentos o fuera de plazo)."""
+        if intento == self.reintentos:
+            return None
+        espera = self._espera(intento, respuesta)
+        if self.plazo is not None and time.perf_counter() - inicio + espera > self.plazo:
+            logging.warning(f"Sin reintentar: la espera de {espera:.1f}s superaría el plazo de {self.plazo:.0f}s")
+            return None
+        return espera
+
+    def _ejecutar(self, metodo: str, url: str, consumir: Callable[[requests.Response], int],
+                  **kwargs) -> requests.Response:
+        """
+        Hace la petición con reintentos. `consumir` lee el cuerpo y devuelve los
+        bytes recibidos; un error de red mientras lee también se reintenta.
+
+        Returns:
+            requests.Response: Última respuesta (puede ser un 5xx si se agotaron los reintentos)
+        """
+        kwargs.setdefault("timeout", self.timeout)
+        with perfilador_actual().etapa(f"http.{metodo.lower()}") as registro:
+            inicio = time.perf_counter()
+            for intento in range(self.reintentos + 1):
+                respuesta = espera = None
+                try:
+                    respuesta = self.sesion.request(metodo, url, **kwargs)
+                    if respuesta.status_code in ESTADOS_REINTENTABLES:
+                        espera = self._espera_reintento(intento, inicio, respuesta)
+                    if espera is None:
+                        tamano = consumir(respuesta)
+                        break
+                    motivo = f"HTTP {respuesta.status_code}"
+                except ERRORES_REINTENTABLES as e:
+                    espera = self._espera_reintento(intento, inicio, respuesta)
+                    if espera is None:
+                        registro.update(url=url, intentos=intento + 1)
+                        raise
+                    motivo = type(e).__name__
+                finally:
+                    if respuesta is not None and kwargs.get("stream"):
+                        respuesta.close()
+
+                logging.warning(
+                    f"{metodo} {url}: {motivo}; reintento {intento + 1}/{self.reintentos} en {espera:.1f}s"
+                )
+                self.dormir(espera)
+
+            datos = {"metodo": metodo, "url": url, "estado": respuesta.status_code, "intentos": intento + 1,
+                     "bytes": tamano, "segundos": time.perf_counter() - inicio}
+            registro.update(datos)
+            self.registros.append(datos)
+        return respuesta
+
+    def pedir(self, metodo: str, url: str, **kwargs) -> requests.Response:
+        """
+        Petición con reintentos; el cuerpo queda leído en la respuesta.
+
+        Args:
+            metodo (str): Método HTTP
+            url (str): URL
+            **kwargs: Argumentos de requests (headers, allow_redirects, timeout...)
+
+        Returns:
+            requests.Response: Respuesta del servidor
+        """
+        return self._ejecutar(metodo, url, lambda respuesta: len(respuesta.content), **kwargs)
+
+    def get(self, url: str, **kwargs) -> requests.Response:
+        return self.pedir("GET", url, **kwargs)
+
+    def head(self, url: str, **kwargs) -> requests.Response:
+        return self.pedir("HEAD", url, **kwargs)
+
+    def descargar(self, url: str, cabeceras: Optional[Dict[str, str]] = None, progreso: Optional[Progreso] = None,
+                  tamano_bloque: int = 2**16, en_memoria: int = 8 * 2**20) -> RespuestaDescarga:
+        """
+        Descarga el cuerpo por bloques a un archivo temporal, sin tenerlo completo
+        dos veces en memoria. Si la conexión se corta a mitad de la descarga, se
+        reintenta desde el principio.
+
+        Args:
+            url (str): URL a descargar
+            cabeceras (Optional[Dict[str, str]]): Cabeceras adicionales (por ejemplo, condicionales)
+            progreso (Optional[Progreso]): Se llama después de cada bloque con los bytes
+                recibidos y el total anunciado
+            tamano_bloque (int): Bytes de cada bloque leído
+            en_memoria (int): Bytes que se mantienen en memoria antes de pasar a disco
+
+        Returns:
+            RespuestaDescarga: Estado, cabeceras y cuerpo (vacío si el estado no es 200)
+
+        Raises:
+            DescargaExcedida: Si el cuerpo supera tamano_maximo
+        """
+        archivo = tempfile.SpooledTemporaryFile(max_size=en_memoria)
+        # Bytes del último intento de esta descarga (los registros del cliente son
+        # compartidos: con varias descargas en paralelo el último puede ser de otra)
+        tamano = [0]
+
+        def consumir(respuesta: requests.Response) -> int:
+            archivo.seek(0)
+            archivo.truncate()
+            tamano[0] = 0
+            if respuesta.status_code != 200:
+                return 0
+            anunciado = respuesta.headers.get("Content-Length")
+            total = int(anunciado) if anunciado and anunciado.isdigit() else None
+            if total is not None and total > self.tamano_maximo:
+                raise DescargaExcedida(f"{url} anuncia {total} bytes (máximo {self.tamano_maximo})")
+            recibidos = 0
+            for bloque in respuesta.iter_content(tamano_bloque):
+                recibidos += len(bloque)
+                if recibidos > self.tamano_maximo:
+                    raise DescargaExcedida(f"{url} supera los {self.tamano_maximo} bytes")
+                archivo.write(bloque)
+                if progreso is not None:
+                    progreso(recibidos, total)
+            archivo.seek(0)
+            tamano[0] = recibidos
+            return recibidos
+
+        try:
+            respuesta = self._ejecutar("GET", url, consumir, headers=cabeceras, stream=True)
+        except Exception:
+            archivo.close()
+            raise
+        return RespuestaDescarga(respuesta.status_code, respuesta.headers, archivo, tamano[0])
+
+
+def progreso_en_log(nombre: str, paso: float = 0.25) -> Progreso:
+    """Callback de progreso que informa por log cada `paso` del total (si se conoce)."""
+    siguiente = [paso]
+
+    def informar(recibidos: int, total: Optional[int]) -> None:
+        if total and recibidos / total >= siguiente[0]:
+            logging.info(f"{nombre}: {recibidos / total:.0%} de {total / 2**20:.1f} MiB")
+            while recibidos / total >= siguiente[0]:
+                siguiente[0] += paso
+    return informar
@@ -1,67 +1,508 @@
-from src.scraper import IndecScraper
-from src.transformaciones import TransformadorDatos
-from src.publicar import publicar_tweet
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Iterator, List, Optional
+import argparse
 import logging
-import pandas as pd
 import os
-from datetime import datetime
-import shutil
+import sys
 
+from src.metricas import Perfilador, activar, configurar_logging
 
-# Configurar logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(levelname)s - %(message)s'
-)
+if TYPE_CHECKING:
+    import pandas as pd
+
+    from src.cache import Descarga
+    from src.scraper import IndecScraper
+
+# Los módulos de cada etapa se importan dentro de los comandos que los usan:
+# pandas, requests, playwright y tweepy solo se cargan si el comando los necesita
+# (`--help`, `publish` o `discover` no importan pandas).
+
+# Subcomandos de la línea de comandos (sin subcomando se ejecuta 'all')
+COMANDOS = ("discover", "fetch", "transform", "publish", "backfill", "all")
+
+
+@dataclass
+class ResultadoCorrida:
+    """
+    Resultado de run(). Sin datos nuevos (el Excel ya estaba procesado) la
+    corrida es exitosa pero df es None; si falló, exito es False.
+
+    Se desempaqueta como la tupla (df, ruta_almacen) que devolvía run() antes,
+    así que `df, ruta = run()` sigue funcionando.
+    """
+    exito: bool
+    df: Optional["pd.DataFrame"] = None
+    ruta_almacen: Optional[str] = None
+
+    def __iter__(self) -> Iterator:
+        return iter((self.df, self.ruta_almacen))
+
+
+def leer_libro_local(ruta: str) -> "Descarga":
+    """
+    Lee un libro Excel local como si se hubiera descargado, sin usar la red.
+
+    Args:
+        ruta (str): Ruta del archivo XLS o XLSX
+
+    Returns:
+        Descarga: Ruta del archivo y su hash
+    """
+    from src.cache import Descarga, sha256_archivo
+
+    ruta = os.path.abspath(ruta)
+    descarga = Descarga(url=ruta, contenido=None, sha256=sha256_archivo(ruta), ruta=ruta)
+    logging.info(f"Libro local {ruta} ({descarga.tamano} bytes)")
+    return descarga
+
+
+def descubrir_url(scraper: "IndecScraper") -> Optional[str]:
+    """URL del Excel publicado, con un único navegador si el HTTP no alcanza."""
+    with scraper:
+        url = scraper.obtener_url_excel()
+    if not url:
+        logging.error("No se pudo obtener la URL del archivo Excel")
+    return url
+
+
+def descargar_libro(scraper: "IndecScraper", url: Optional[str] = None) -> Optional["Descarga"]:
+    """
+    Descubre la URL del Excel (si no se indica) y lo descarga a través de la caché.
+
+    Args:
+        scraper (IndecScraper): Scraper con las cachés de la corrida
+        url (Optional[str]): URL del Excel; si es None se busca en la página del INDEC
+
+    Returns:
+        Optional[Descarga]: Descarga o None si no se pudo obtener
+    """
+    url = url or descubrir_url(scraper)
+    return scraper.descargar_excel(url) if url else None
+
+
+def leer_y_transformar(scraper: "IndecScraper", descarga: "Descarga", hojas: Optional[List[str]] = None,
+                       workers: Optional[int] = None, perfil: Optional[str] = None, streaming: bool = False):
+    """
+    Lee las hojas compatibles del libro y las transforma (una hoja por proceso).
+
+    Con streaming el libro se lee fila por fila y se transforma por lotes con
+    src.streaming (en este proceso, sin la caché de hojas): no se cargan las
+    hojas completas, solo el resultado compacto. Sirve para libros muy grandes.
+
+    Args:
+        scraper (IndecScraper): Scraper con la caché de hojas
+        descarga (Descarga): Libro descargado o local
+        hojas (Optional[List[str]]): Hojas a procesar (todas las compatibles si es None)
+        workers (Optional[int]): Procesos para transformar las hojas en paralelo
+        perfil (Optional[str]): Carpeta donde guardar el perfil de cProfile de la transformación
+        streaming (bool): Transformar por lotes en lugar de leer cada hoja completa
+
+    Returns:
+        Tuple[Optional[pd.DataFrame], List[str]]: Datos transformados (None si no hay
+            hojas para procesar) y nombres de las hojas procesadas
+    """
+    if streaming:
+        import pandas as pd
+
+        from src.streaming import transformar_libro_streaming
+
+        lotes = list(transformar_libro_streaming(descarga.fuente, hojas))
+        if not lotes:
+            logging.error("No se encontraron hojas con datos para procesar")
+            return None, []
+        # Todos los lotes comparten categorías: la unión conserva los tipos compactos
+        df = pd.concat(lotes, ignore_index=True)
+        return df, list(df["sheet"].cat.categories)
+
+    from src.pipeline import transformar_hojas
+
+    hojas_excel = scraper.leer_hojas_compatibles(descarga.fuente, hojas, descarga.sha256)
+    if not hojas_excel:
+        logging.error("No se encontraron hojas con datos para procesar")
+        return None, []
+    return transformar_hojas(hojas_excel, workers, perfil=perfil), list(hojas_excel)
+
+
+def run(hojas: Optional[List[str]] = None, workers: Optional[int] = None,
+        ruta_almacen: str = "data/precios.sqlite", ruta_bandeja: str = "data/publicaciones.sqlite",
+        salidas: Optional[List[str]] = None, perfil: Optional[str] = None,
+        ruta_validacion: str = "data/validacion.json", bloquear_invalidos: bool = True,
+        entrada: Optional[str] = None, simular: bool = False, streaming: bool = False) -> ResultadoCorrida:
+    """
+    Función principal para ejecutar el scraper, las transformaciones y encolar el tweet.
+
+    Args:
+        hojas (Optional[List[str]]): Hojas del Excel a procesar (todas las compatibles si es None)
+        workers (Optional[int]): Procesos para transformar las hojas en paralelo
+        ruta_almacen (str): Base SQLite donde se acumulan los precios
+        ruta_bandeja (str): Bandeja de salida de los mensajes a publicar
+        salidas (Optional[List[str]]): Salidas adicionales del DataFrame procesado
+            ('formato:ruta', 'formato' o una ruta; ver src.salidas.crear_salida)
+        perfil (Optional[str]): Carpeta donde guardar el perfil de cProfile de la transformación
+        ruta_validacion (str): Archivo JSON con el reporte de validación de la corrida
+        bloquear_invalidos (bool): Si los datos tienen errores de validación, no guardarlos
+            ni publicarlos (el archivo no se marca como procesado y se reintenta)
+        entrada (Optional[str]): Libro Excel local a procesar en lugar de descargarlo
+        simular (bool): Procesar y mostrar qué cambiaría sin escribir el almacén, las
+            salidas, la bandeja ni el reporte de validación
+        streaming (bool): Leer y transformar el libro por lotes (ver leer_y_transformar)
+
+    Returns:
+        ResultadoCorrida: Datos procesados y dónde se guardaron, o si no hubo datos
+            nuevos o la corrida falló
+    """
+    import glob
+
+    from src.almacen import AlmacenPrecios, nueva_corrida
+    from src.analitica import CuboAnalitico
+    from src.cache import CacheDescargas, CacheHojas
+    from src.publicar import BandejaSalida, encolar_tweet
+    from src.salidas import crear_salida, escribir_salidas
+    from src.scraper import IndecScraper
+    from src.validacion import validar
 
-def run():
-    """Función principal para ejecutar el scraper, las transformaciones y la publicación del tweet."""
     try:
-        # Eliminar la carpeta data si existe y volver a crearla
-        if os.path.exists("data"):
-            shutil.rmtree("data")
-        os.makedirs("data")  # Crear la carpeta nuevamente
-        
-        # Ejecutar el scraper
-        scraper = IndecScraper()
-        url_excel = scraper.obtener_url_excel()
-        
-        if url_excel:
-            df_nacional = scraper.obtener_datos_nacional(url_excel)
-            
-            if df_nacional is not None: 
-                # Generar un timestamp
-                timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-                
-                # Nombres de archivos
-                crudo_file = f"data/nacional_crudo_{timestamp}.csv"
-                procesado_file = f"data/nacional_procesado_{timestamp}.csv"
-
-                # Guardar datos crudos
-                scraper.guardar_csv(df_nacional, crudo_file)
-                
-                # Aplicar transformaciones
-                transformador = TransformadorDatos(df_nacional)
-                df_transformado = transformador.identificar_encabezados()
-                
-                # Guardar resultados procesados
-                df_transformado.to_csv(procesado_file, index=False, encoding='utf-8')
-                logging.info("Datos procesados guardados exitosamente en carpeta data")
-                
-                # Publicar en Twitter
-                publicar_tweet(df_transformado)
-                
-                return df_transformado, procesado_file
-            else:
-                logging.error("No se pudieron obtener los datos de la hoja Nacional")
-                return None, None
-        else:
-            logging.error("No se pudo obtener la URL del archivo Excel")
-            return None, None
+        # Validar las salidas antes de descargar nada
+        destinos = [crear_salida(salida) for salida in salidas or []]
+
+        scraper = IndecScraper(cache_descargas=CacheDescargas(), cache_hojas=CacheHojas())
+        descarga = leer_libro_local(entrada) if entrada else descargar_libro(scraper)
+        if descarga is None:
+            return ResultadoCorrida(exito=False)
+        if descarga.ya_procesada:
+            logging.info("El archivo Excel ya fue procesado; no hay datos nuevos")
+            return ResultadoCorrida(exito=True)
+
+        # Aplicar transformaciones (una hoja por proceso)
+        df_transformado, hojas_procesadas = leer_y_transformar(scraper, descarga, hojas, workers, perfil, streaming)
+        if df_transformado is None:
+            return ResultadoCorrida(exito=False)
+
+        # Validar el esquema y la plausibilidad de los datos antes de que lleguen
+        # al almacén, a las salidas o al tweet
+        reporte = validar(df_transformado)
+        if not simular:
+            reporte.guardar(ruta_validacion)
+        if reporte.bloquea_publicacion and bloquear_invalidos:
+            logging.error(f"Datos inválidos: no se guardan ni se publican (ver {ruta_validacion})")
+            return ResultadoCorrida(exito=False)
+
+        corrida = nueva_corrida()
+        if simular:
+            simular_corrida(df_transformado, hojas_procesadas, destinos, ruta_almacen, corrida)
+            return ResultadoCorrida(exito=True, df=df_transformado)
+
+        # Guardar en el almacén solo los precios nuevos o revisados, y registrar
+        # qué cambió respecto de la publicación anterior
+        almacen = AlmacenPrecios(ruta_almacen)
+        if almacen.vacio():
+            # Migrar los CSV de corridas anteriores, si los hay
+            almacen.importar_csv(glob.glob("data/*_procesado_*.csv"))
+        almacen.guardar(df_transformado, corrida)
+        revisiones = almacen.revisiones(corrida)
+        logging.info(f"Datos procesados guardados exitosamente en {ruta_almacen}")
+
+        # Escribir las salidas adicionales en paralelo, desde el mismo DataFrame
+        escribir_salidas(df_transformado, destinos)
+
+        # Actualizar el cubo analítico desde el almacén (la primera vez, con todo
+        # el historial; después, solo los meses de cada hoja con precios modificados)
+        cubo = CuboAnalitico(ruta_almacen)
+        cubo.sincronizar(almacen, revisiones)
+
+        # Encolar el tweet (solo con los datos de la hoja Nacional) si esa hoja
+        # cambió; lo publica después `python -m src.main publish`, sin bloquear el pipeline
+        if "Nacional" in hojas_procesadas and (revisiones["sheet"] == "Nacional").any():
+            encolar_tweet(cubo, BandejaSalida(ruta_bandeja), "Nacional")
+
+        # Registrar el archivo como procesado para saltearlo si no cambia
+        if not entrada:
+            scraper.marcar_procesado(descarga)
+
+        return ResultadoCorrida(exito=True, df=df_transformado, ruta_almacen=ruta_almacen)
 
     except Exception as e:
         logging.error(f"Error en la ejecución: {str(e)}")
-        return None, None
+        return ResultadoCorrida(exito=False)
+
+
+def simular_corrida(df: "pd.DataFrame", hojas_procesadas: List[str], destinos: List,
+                    ruta_almacen: str, corrida: str) -> None:
+    """
+    Informa qué escribiría la corrida: cambios en el almacén (calculados en una
+    transacción que se descarta), salidas y mensaje a encolar.
+    """
+    from src.almacen import AlmacenPrecios
+
+    if os.path.exists(ruta_almacen):
+        resumen = AlmacenPrecios(ruta_almacen).guardar(df, corrida, simular=True)
+        cambios = resumen["nuevos"] + resumen["revisados"]
+    else:
+        logging.info(f"Simulación: {ruta_almacen} no existe; se guardarían {len(df)} precios")
+        cambios = len(df)
+    for destino in destinos:
+        logging.info(f"Simulación: se escribirían {len(df)} filas en {destino!r}")
+    if "Nacional" in hojas_procesadas and cambios:
+        logging.info("Simulación: se encolaría el mensaje de la hoja Nacional")
+
+
+def transformar(entrada: Optional[str] = None, hojas: Optional[List[str]] = None, workers: Optional[int] = None,
+                salidas: Optional[List[str]] = None, perfil: Optional[str] = None,
+                bloquear_invalidos: bool = True, simular: bool = False,
+                streaming: bool = False) -> Optional["pd.DataFrame"]:
+    """
+    Transforma un libro (local o descargado) y escribe el resultado en las salidas,
+    sin tocar el almacén, el cubo ni la bandeja de salida.
+
+    Args:
+        entrada (Optional[str]): Libro Excel local (si es None se descarga el publicado)
+        hojas (Optional[List[str]]): Hojas a procesar (todas las compatibles si es None)
+        workers (Optional[int]): Procesos para transformar las hojas en paralelo
+        salidas (Optional[List[str]]): Salidas del resultado (por defecto, CSV en data/)
+        perfil (Optional[str]): Carpeta donde guardar el perfil de cProfile de la transformación
+        bloquear_invalidos (bool): No escribir las salidas si la validación encuentra errores
+        simular (bool): Transformar y validar sin escribir nada
+        streaming (bool): Leer y transformar el libro por lotes (ver leer_y_transformar)
+
+    Returns:
+        Optional[pd.DataFrame]: Datos transformados o None si hubo un error
+    """
+    from src.cache import CacheHojas
+    from src.salidas import crear_salida, escribir_salidas
+    from src.scraper import IndecScraper
+    from src.validacion import validar
+
+    try:
+        destinos = [crear_salida(salida) for salida in salidas or ["csv"]]
+        scraper = IndecScraper(cache_hojas=CacheHojas())
+        descarga = leer_libro_local(entrada) if entrada else descargar_libro(scraper)
+        if descarga is None:
+            return None
+        df, _ = leer_y_transformar(scraper, descarga, hojas, workers, perfil, streaming)
+        if df is None:
+            return None
+
+        reporte = validar(df)
+        if reporte.bloquea_publicacion and bloquear_invalidos:
+            logging.error("Datos inválidos: no se escriben las salidas")
+            return None
+        if simular:
+            for destino in destinos:
+                logging.info(f"Simulación: se escribirían {len(df)} filas en {destino!r}")
+            return df
+        escribir_salidas(df, destinos)
+        return df
+    except Exception as e:
+        logging.error(f"Error en la transformación: {str(e)}")
+        return None
+
+
+def descubrir(estrategia: str = "auto", ruta_fecha: Optional[str] = None, simular: bool = False) -> bool:
+    """
+    Busca la URL del Excel y la fecha del próximo informe y las muestra.
+
+    Args:
+        estrategia (str): Estrategia de descubrimiento ('auto', 'http' o 'navegador')
+        ruta_fecha (Optional[str]): Archivo donde guardar la fecha del próximo informe
+        simular (bool): No escribir ruta_fecha
+
+    Returns:
+        bool: True si se encontró la URL del Excel
+    """
+    from src.cache import escribir_atomico
+    from src.scraper import IndecScraper
+
+    scraper = IndecScraper(estrategia_descubrimiento=estrategia)
+    with scraper:
+        url = scraper.obtener_url_excel()
+        fecha = scraper.obtener_fecha_proximo_informe()
+    print(f"excel: {url}\nproximo_informe: {fecha}")
+    if fecha and ruta_fecha and not simular:
+        escribir_atomico(ruta_fecha, f"{fecha}\n".encode("utf-8"))
+    return url is not None
+
+
+def descargar(url: Optional[str] = None, ruta: Optional[str] = None, simular: bool = False) -> bool:
+    """
+    Descarga el Excel a la caché de descargas (petición condicional) y, si se
+    indica, lo copia a `ruta`. En simulación solo averigua con un HEAD si cambió.
+
+    Args:
+        url (Optional[str]): URL del Excel (si es None se busca en la página del INDEC)
+        ruta (Optional[str]): Archivo donde copiar el libro descargado
+        simular (bool): Sondear sin descargar
+
+    Returns:
+        bool: True si se pudo descargar (o sondear)
+    """
+    from src.cache import CacheDescargas
+    from src.scraper import IndecScraper
+
+    scraper = IndecScraper(cache_descargas=CacheDescargas())
+    if simular:
+        url = url or descubrir_url(scraper)
+        if not url:
+            return False
+        cambio = scraper.sondear_excel(url)
+        print(f"{url}: {'cambió' if cambio else 'sin cambios' if cambio is False else 'no se puede saber sin descargar'}")
+        return True
+
+    descarga = descargar_libro(scraper, url)
+    if descarga is None:
+        return False
+    if ruta:
+        descarga.copiar(ruta)
+    print(f"{ruta or descarga.url}: {descarga.tamano} bytes, sha256 {descarga.sha256[:12]}"
+          + (" (ya procesado)" if descarga.ya_procesada else ""))
+    return True
+
+
+def publicar(ruta_bandeja: str = "data/publicaciones.sqlite", limite: float = 600.0, simular: bool = False) -> bool:
+    """Publica la bandeja de salida; si falla (por ejemplo, sin credenciales) los mensajes quedan pendientes."""
+    from src.publicar import publicar_pendientes
+
+    try:
+        publicar_pendientes(ruta_bandeja, limite, simular)
+        return True
+    except Exception as e:
+        logging.error(f"Error al publicar la bandeja de salida: {str(e)}")
+        return False
+
+
+def especificaciones_salida(salidas: Optional[List[str]], formato: Optional[str]) -> List[str]:
+    """Combina --out y --format en especificaciones de crear_salida ('formato:ruta', 'formato' o ruta)."""
+    if formato is None:
+        return salidas or []
+    if not salidas:
+        return [formato]
+    return [f"{formato}:{ruta}" for ruta in salidas]
+
+
+def crear_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        description="Scraping, transformación y publicación de precios del INDEC",
+        epilog="Sin subcomando se ejecuta 'all'.",
+    )
+
+    metricas = argparse.ArgumentParser(add_help=False)
+    metricas.add_argument("--reporte", default=None, help="Archivo JSON con el reporte de tiempos por etapa")
+    metricas.add_argument("--prometheus", default=None,
+                          help="Archivo .prom con las métricas por etapa (textfile collector de node_exporter)")
+    metricas.add_argument("--dry-run", action="store_true", dest="simular",
+                          help="Mostrar qué se haría sin escribir datos ni publicar")
+
+    procesamiento = argparse.ArgumentParser(add_help=False)
+    procesamiento.add_argument("--sheets", "--hojas", nargs="*", default=None, dest="hojas",
+                               help="Hojas a procesar (todas las compatibles por defecto)")
+    procesamiento.add_argument("--workers", type=int, default=None, help="Procesos para transformar hojas")
+    procesamiento.add_argument("--out", "--salida", action="append", default=None, dest="salidas",
+                               help="Salida: formato[:ruta] o ruta (repetible; formatos: csv, csv.gz, parquet, "
+                                    "sqlite, jsonl y los registrados en src.salidas)")
+    procesamiento.add_argument("--format", default=None, dest="formato",
+                               help="Formato de las rutas de --out (por defecto, según la extensión)")
+
+    transformacion = argparse.ArgumentParser(add_help=False)
+    transformacion.add_argument("--input", default=None, dest="entrada",
+                                help="Libro XLS/XLSX local a procesar (no usa la red)")
+    transformacion.add_argument("--profile", nargs="?", const=".cache/perfil", default=None, metavar="CARPETA",
+                                help="Guardar un perfil de cProfile (pstats) de la transformación de cada hoja")
+    transformacion.add_argument("--ignorar-validacion", action="store_true",
+                                help="Guardar y publicar aunque la validación encuentre errores")
+    transformacion.add_argument("--streaming", action="store_true",
+                                help="Leer el libro fila por fila y transformarlo por lotes (libros muy grandes; "
+                                     "ignora --workers y --profile)")
+
+    comandos = parser.add_subparsers(dest="comando", metavar="{" + ",".join(COMANDOS) + "}")
+
+    discover = comandos.add_parser("discover", parents=[metricas],
+                                   help="Buscar la URL del Excel y la fecha del próximo informe")
+    discover.add_argument("--estrategia", default="auto",
+                          help="auto (HTTP con el navegador como respaldo), http o navegador")
+    discover.add_argument("--out", default=None, dest="ruta",
+                          help="Archivo donde guardar la fecha del próximo informe (por ejemplo next_date.txt)")
+
+    fetch = comandos.add_parser("fetch", parents=[metricas], help="Descargar el Excel (con caché condicional)")
+    fetch.add_argument("--url", default=None, help="URL del Excel (por defecto, la publicada en la página)")
+    fetch.add_argument("--out", default=None, dest="ruta", help="Archivo donde copiar el libro descargado")
+
+    comandos.add_parser("transform", parents=[metricas, procesamiento, transformacion],
+                        help="Transformar un libro y escribir el resultado, sin almacén ni publicación")
+
+    publish = comandos.add_parser("publish", parents=[metricas], help="Publicar los mensajes pendientes")
+    publish.add_argument("--bandeja", default="data/publicaciones.sqlite", help="Archivo de la bandeja de salida")
+    publish.add_argument("--limite", type=float, default=600.0, help="Segundos máximos esperando reintentos")
+
+    backfill = comandos.add_parser("backfill", parents=[metricas, procesamiento],
+                                   help="Ingesta histórica de varios libros (URLs o archivos locales)")
+    backfill.add_argument("fuentes", nargs="+", help="URLs o rutas locales de los libros XLS")
+    backfill.add_argument("--directorio", default=".cache/backfill", help="Estado y resultados parciales")
+    backfill.add_argument("--descargas", type=int, default=4, help="Descargas simultáneas")
+
+    todo = comandos.add_parser("all", parents=[metricas, procesamiento, transformacion],
+                               help="Descubrir, descargar, transformar, guardar y publicar")
+    todo.add_argument("--no-publish", action="store_true", dest="sin_publicar",
+                      help="Dejar el mensaje en la bandeja de salida sin publicarlo")
+    return parser
+
+
+def ejecutar(args: argparse.Namespace) -> bool:
+    """Ejecuta el subcomando; devuelve False si falló."""
+    if args.comando == "discover":
+        return descubrir(args.estrategia, args.ruta, args.simular)
+    if args.comando == "fetch":
+        return descargar(args.url, args.ruta, args.simular)
+    if args.comando == "transform":
+        return transformar(
+            args.entrada, args.hojas, args.workers, especificaciones_salida(args.salidas, args.formato),
+            args.profile, not args.ignorar_validacion, args.simular, args.streaming,
+        ) is not None
+    if args.comando == "publish":
+        return publicar(args.bandeja, args.limite, args.simular)
+    if args.comando == "backfill":
+        from src.backfill import Backfill
+
+        proceso = Backfill(args.directorio, args.descargas, args.workers, args.hojas)
+        if args.simular:
+            for _, fuente in proceso.pendientes(args.fuentes):
+                print(fuente)
+            return True
+        salidas = especificaciones_salida(args.salidas, args.formato) or ["data/historico_procesado.csv"]
+        return proceso.ejecutar(args.fuentes, salidas) is not None
+
+    resultado = run(args.hojas, args.workers, salidas=especificaciones_salida(args.salidas, args.formato),
+                    perfil=args.profile, bloquear_invalidos=not args.ignorar_validacion, entrada=args.entrada,
+                    simular=args.simular, streaming=args.streaming)
+    if not resultado.exito:
+        # Sin publicar: la bandeja queda como estaba y el código de salida indica la falla
+        return False
+    if not args.sin_publicar and not args.simular:
+        publicar()
+    return True
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    configurar_logging()
+    argv = sys.argv[1:] if argv is None else argv
+    if not argv or argv[0] not in COMANDOS + ("-h", "--help"):
+        argv = ["all"] + argv
+    parser = crear_parser()
+    args = parser.parse_args(argv)
+
+    perfilador = Perfilador()
+    with activar(perfilador):
+        try:
+            exito = ejecutar(args)
+        except ValueError as e:
+            # Opciones que se validan al usarlas (formato de salida, estrategia)
+            parser.error(str(e))
+    perfilador.registrar_log()
+    if args.reporte:
+        perfilador.guardar_reporte(args.reporte)
+    if args.prometheus:
+        perfilador.guardar_prometheus(args.prometheus)
+    if not exito:
+        raise SystemExit(1)
+
 
 if __name__ == "__main__":
-    run()
+    main()
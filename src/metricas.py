@@ -0,0 +1,258 @@
+from collections import deque
+from contextlib import contextmanager
+from functools import wraps
+from typing import Any, Callable, Deque, Dict, Iterator, List, Optional
+import cProfile
+import json
+import logging
+import os
+import threading
+import time
+
+from src.cache import escribir_atomico
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+# Formato de los logs de todos los comandos
+FORMATO_LOG = '%(asctime)s - %(levelname)s - %(message)s'
+
+# Prefijo de las métricas de Prometheus
+PREFIJO_PROMETHEUS = "indec_etapa"
+
+
+def configurar_logging(nivel: int = logging.INFO) -> None:
+    """
+    Configura el logging del proceso (formato, nivel y warnings de Python como
+    logs). La llaman los puntos de entrada de cada comando, una vez: importar
+    un módulo de src no modifica la configuración del proceso que lo importa.
+
+    Args:
+        nivel (int): Nivel mínimo de los mensajes
+    """
+    logging.basicConfig(level=nivel, format=FORMATO_LOG)
+    logging.captureWarnings(True)
+
+
+def rss_pico_mb() -> Optional[float]:
+    """Pico de memoria residente del proceso en MiB (None si no se puede medir)."""
+    if resource is None:
+        return None
+    pico = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux informa KiB; macOS, bytes
+    return pico / (2**20 if os.uname().sysname == "Darwin" else 2**10)
+
+
+def contar_filas(valor: Any) -> Optional[int]:
+    """Filas de un DataFrame, o la suma de las filas de un dict de DataFrames (None si no lo es)."""
+    if isinstance(valor, dict):
+        filas = [f for f in map(contar_filas, valor.values()) if f is not None]
+        return sum(filas) if filas else None
+    if hasattr(valor, "shape") and hasattr(valor, "columns"):
+        return len(valor)
+    return None
+
+
+class Perfilador:
+    """
+    Registro liviano de tiempos por etapa del pipeline.
+
+    Cada etapa guarda tiempo de reloj y de CPU, el pico de memoria residente del
+    proceso al terminar y las filas de entrada y salida. Las etapas pueden
+    anidarse (la cadena de TransformadorDatos llama a cada etapa desde la
+    anterior): 'segundos' incluye a las etapas internas y 'segundos_propios' no.
+    Si una etapa llama a otra sin haber informado sus filas de salida, se
+    toman las de entrada de la etapa interna, que es lo que le entregó.
+    """
+
+    def __init__(self, maximo: Optional[int] = None):
+        """
+        Args:
+            maximo (Optional[int]): Cantidad de etapas a conservar (las más recientes);
+                sin límite si es None
+        """
+        self.inicio = time.time()
+        self.etapas: Deque[Dict] = deque(maxlen=maximo)
+        self._local = threading.local()
+
+    def _pila(self) -> List[Dict]:
+        if not hasattr(self._local, "pila"):
+            self._local.pila = []
+        return self._local.pila
+
+    @contextmanager
+    def etapa(self, nombre: str, filas_entrada: Optional[int] = None) -> Iterator[Dict]:
+        """
+        Mide un bloque como etapa. El registro entregado admite 'filas_salida'.
+
+        Args:
+            nombre (str): Nombre de la etapa
+            filas_entrada (Optional[int]): Filas que recibe la etapa
+        """
+        pila = self._pila()
+        if pila and pila[-1]["filas_salida"] is None:
+            pila[-1]["filas_salida"] = filas_entrada
+        registro = {
+            "etapa": nombre,
+            "pid": os.getpid(),
+            "inicio": time.time(),
+            "filas_entrada": filas_entrada,
+            "filas_salida": None,
+            "_internas": 0.0,
+        }
+        pila.append(registro)
+        inicio, inicio_cpu = time.perf_counter(), time.process_time()
+        try:
+            yield registro
+        except Exception as e:
+            registro["error"] = str(e)
+            raise
+        finally:
+            pila.pop()
+            registro["segundos"] = time.perf_counter() - inicio
+            registro["cpu"] = time.process_time() - inicio_cpu
+            registro["segundos_propios"] = registro["segundos"] - registro.pop("_internas")
+            registro["rss_pico_mb"] = rss_pico_mb()
+            if pila:
+                pila[-1]["_internas"] += registro["segundos"]
+            self.etapas.append(registro)
+
+    def agregar(self, etapas: List[Dict]) -> None:
+        """Incorpora etapas medidas en otro proceso (por ejemplo, en el pool de hojas)."""
+        self.etapas.extend(etapas)
+
+    def resumen(self) -> Dict[str, Dict]:
+        """Totales por nombre de etapa (llamadas, segundos, CPU, filas y pico de memoria)."""
+        resumen: Dict[str, Dict] = {}
+        for registro in self.etapas:
+            total = resumen.setdefault(registro["etapa"], {
+                "llamadas": 0, "segundos": 0.0, "segundos_propios": 0.0, "cpu": 0.0,
+                "filas_entrada": 0, "filas_salida": 0, "rss_pico_mb": 0.0, "errores": 0,
+            })
+            total["llamadas"] += 1
+            for campo in ("segundos", "segundos_propios", "cpu"):
+                total[campo] += registro[campo]
+            for campo in ("filas_entrada", "filas_salida"):
+                total[campo] += registro[campo] or 0
+            total["rss_pico_mb"] = max(total["rss_pico_mb"], registro["rss_pico_mb"] or 0.0)
+            total["errores"] += "error" in registro
+        return resumen
+
+    def reporte(self) -> Dict:
+        """Reporte completo de la corrida."""
+        return {
+            "inicio": self.inicio,
+            "duracion": time.time() - self.inicio,
+            "rss_pico_mb": rss_pico_mb(),
+            "resumen": self.resumen(),
+            "etapas": sorted(self.etapas, key=lambda registro: registro["inicio"]),
+        }
+
+    def guardar_reporte(self, ruta: str) -> None:
+        """Escribe el reporte de la corrida en JSON."""
+        escribir_atomico(ruta, json.dumps(self.reporte(), indent=2, ensure_ascii=False).encode("utf-8"))
+        logging.info(f"Reporte de ejecución guardado en {ruta}")
+
+    def guardar_prometheus(self, ruta: str) -> None:
+        """
+        Escribe las métricas por etapa en el formato de texto de Prometheus, para
+        el textfile collector de node_exporter.
+        """
+        metricas = [
+            ("segundos", "gauge", "Tiempo de reloj de la etapa en la última corrida"),
+            ("segundos_propios", "gauge", "Tiempo de reloj sin las etapas internas"),
+            ("cpu", "gauge", "Tiempo de CPU de la etapa"),
+            ("filas_entrada", "gauge", "Filas recibidas por la etapa"),
+            ("filas_salida", "gauge", "Filas entregadas por la etapa"),
+            ("rss_pico_mb", "gauge", "Pico de memoria residente del proceso al terminar la etapa"),
+            ("errores", "gauge", "Ejecuciones de la etapa que terminaron con error"),
+        ]
+        resumen = self.resumen()
+        lineas = []
+        for campo, tipo, ayuda in metricas:
+            nombre = f"{PREFIJO_PROMETHEUS}_{campo}"
+            lineas.append(f"# HELP {nombre} {ayuda}")
+            lineas.append(f"# TYPE {nombre} {tipo}")
+            for etapa, total in resumen.items():
+                lineas.append(f'{nombre}{{etapa="{etapa}"}} {float(total[campo]):g}')
+        lineas.append(f"# TYPE {PREFIJO_PROMETHEUS}_ultima_corrida_timestamp gauge")
+        lineas.append(f"{PREFIJO_PROMETHEUS}_ultima_corrida_timestamp {self.inicio:.0f}")
+        escribir_atomico(ruta, ("\n".join(lineas) + "\n").encode("utf-8"))
+        logging.info(f"Métricas de Prometheus guardadas en {ruta}")
+
+    def registrar_log(self) -> None:
+        """Informa por log el resumen por etapa, de la más lenta a la más rápida."""
+        for etapa, total in sorted(self.resumen().items(), key=lambda item: -item[1]["segundos_propios"]):
+            logging.info(
+                f"Etapa {etapa}: {total['segundos_propios']:.2f}s propios de {total['segundos']:.2f}s "
+                f"(CPU {total['cpu']:.2f}s, {total['llamadas']} llamada(s), "
+                f"filas {total['filas_entrada']} -> {total['filas_salida']}, RSS pico {total['rss_pico_mb']:.0f} MiB)"
+            )
+
+
+# Perfilador al que informan las etapas instrumentadas de este proceso (acotado,
+# para que los procesos de larga duración no acumulen registros)
+_actual = Perfilador(maximo=1000)
+
+
+def perfilador_actual() -> Perfilador:
+    return _actual
+
+
+@contextmanager
+def activar(perfilador: Perfilador) -> Iterator[Perfilador]:
+    """Hace que las etapas instrumentadas informen a `perfilador` dentro del bloque."""
+    global _actual
+    anterior, _actual = _actual, perfilador
+    try:
+        yield perfilador
+    finally:
+        _actual = anterior
+
+
+def medir_etapa(nombre: str) -> Callable:
+    """
+    Decorador que mide una función o método como etapa del perfilador actual.
+    Las filas de entrada son las del primer argumento DataFrame (o, en un
+    método, las de self.df); las de salida, las del resultado.
+    """
+    def decorador(funcion: Callable) -> Callable:
+        @wraps(funcion)
+        def envoltura(*args, **kwargs):
+            filas_entrada = None
+            for argumento in list(args) + list(kwargs.values()):
+                filas_entrada = contar_filas(argumento)
+                if filas_entrada is not None:
+                    break
+            if filas_entrada is None and args:
+                filas_entrada = contar_filas(getattr(args[0], "df", None))
+
+            with _actual.etapa(nombre, filas_entrada) as registro:
+                resultado = funcion(*args, **kwargs)
+                if registro["filas_salida"] is None:
+                    registro["filas_salida"] = contar_filas(resultado)
+                return resultado
+        return envoltura
+    return decorador
+
+
+@contextmanager
+def perfil_cprofile(ruta: Optional[str]) -> Iterator[None]:
+    """
+    Perfila el bloque con cProfile y guarda las estadísticas (pstats) en `ruta`.
+    Sin ruta no hace nada.
+    """
+    if not ruta:
+        yield
+        return
+    perfil = cProfile.Profile()
+    perfil.enable()
+    try:
+        yield
+    finally:
+        perfil.disable()
+        os.makedirs(os.path.dirname(ruta) or ".", exist_ok=True)
+        perfil.dump_stats(ruta)
+        logging.info(f"Perfil de cProfile guardado en {ruta} (ver con python -m pstats {ruta})")
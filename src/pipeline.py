@@ -0,0 +1,90 @@
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Optional, Tuple
+import logging
+import os
+import time
+
+import pandas as pd
+
+from src.metricas import Perfilador, activar, configurar_logging, medir_etapa, perfil_cprofile, perfilador_actual
+from src.transformaciones import TransformadorDatos, compactar
+
+
+def transformar_hoja(hoja: str, df: pd.DataFrame, estrategia_relleno: str = "adjacent_mean",
+                     perfil: Optional[str] = None) -> Tuple[str, pd.DataFrame, Dict]:
+    """
+    Aplica la cadena de TransformadorDatos a una hoja. Se ejecuta en los procesos
+    del pool, por eso devuelve sus propios tiempos (y los de cada etapa) para
+    informarlos desde el proceso principal.
+
+    Args:
+        hoja (str): Nombre de la hoja
+        df (pd.DataFrame): Hoja leída del Excel
+        estrategia_relleno (str): Estrategia de relleno de precios faltantes
+        perfil (Optional[str]): Carpeta donde guardar el perfil de cProfile de la hoja
+
+    Returns:
+        Tuple[str, pd.DataFrame, Dict]: Nombre de la hoja, datos transformados y tiempos
+    """
+    inicio, inicio_cpu = time.perf_counter(), time.process_time()
+    ruta_perfil = os.path.join(perfil, f"transformar_{hoja}.pstats") if perfil else None
+    with activar(Perfilador()) as perfilador, perfil_cprofile(ruta_perfil):
+        df_transformado = TransformadorDatos(df, estrategia_relleno).identificar_encabezados()
+    for etapa in perfilador.etapas:
+        etapa["hoja"] = hoja
+    tiempos = {
+        "pid": os.getpid(),
+        "segundos": time.perf_counter() - inicio,
+        "cpu": time.process_time() - inicio_cpu,
+        "filas": len(df_transformado),
+        "etapas": list(perfilador.etapas),
+    }
+    return hoja, df_transformado, tiempos
+
+
+@medir_etapa("pipeline.transformar_hojas")
+def transformar_hojas(hojas: Dict[str, pd.DataFrame], workers: Optional[int] = None,
+                      estrategia_relleno: str = "adjacent_mean", perfil: Optional[str] = None) -> pd.DataFrame:
+    """
+    Transforma cada hoja en paralelo con un ProcessPoolExecutor y une los
+    resultados en un único DataFrame compacto con la columna 'sheet'.
+
+    Args:
+        hojas (Dict[str, pd.DataFrame]): Hojas leídas del Excel, por nombre
+        workers (Optional[int]): Procesos del pool (por defecto, uno por hoja hasta
+            la cantidad de CPUs); con 1 las hojas se transforman en este proceso
+        estrategia_relleno (str): Estrategia de relleno de precios faltantes
+        perfil (Optional[str]): Carpeta donde guardar un perfil de cProfile por hoja
+
+    Returns:
+        pd.DataFrame: Datos transformados de todas las hojas
+    """
+    workers = workers or min(len(hojas), os.cpu_count() or 1)
+    inicio = time.perf_counter()
+
+    if workers <= 1 or len(hojas) <= 1:
+        resultados = [transformar_hoja(hoja, df, estrategia_relleno, perfil) for hoja, df in hojas.items()]
+    else:
+        # Los procesos creados con spawn (macOS, Windows) no heredan la configuración
+        # del logging: se les aplica la del proceso principal
+        nivel = logging.getLogger().getEffectiveLevel()
+        with ProcessPoolExecutor(max_workers=workers, initializer=configurar_logging, initargs=(nivel,)) as pool:
+            futuros = [pool.submit(transformar_hoja, hoja, df, estrategia_relleno, perfil) for hoja, df in hojas.items()]
+            resultados = [futuro.result() for futuro in futuros]
+
+    partes = []
+    for hoja, df_transformado, tiempos in resultados:
+        logging.info(
+            f"Hoja {hoja} transformada en {tiempos['segundos']:.2f}s "
+            f"(CPU {tiempos['cpu']:.2f}s, proceso {tiempos['pid']}, {tiempos['filas']} filas)"
+        )
+        perfilador_actual().agregar(tiempos["etapas"])
+        partes.append(df_transformado.assign(sheet=hoja))
+
+    # Unidades y hojas difieren entre partes: se recalculan sus categorías al unir
+    df_total = compactar(pd.concat(partes, ignore_index=True))
+    logging.info(
+        f"{len(hojas)} hojas transformadas en {time.perf_counter() - inicio:.2f}s "
+        f"con {workers} proceso(s): {len(df_total)} filas"
+    )
+    return df_total
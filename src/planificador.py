@@ -0,0 +1,275 @@
+from datetime import datetime, timedelta, timezone
+from typing import Any, Callable, Dict, Optional
+import argparse
+import json
+import logging
+import random
+import time
+
+from src.cache import CacheDescargas, escribir_atomico
+from src.metricas import configurar_logging
+
+# Hora oficial argentina (UTC-3, sin horario de verano)
+ZONA_INDEC = timezone(timedelta(hours=-3))
+
+# Hora habitual de publicación de los informes del INDEC
+HORA_PUBLICACION = (16, 0)
+
+DIA = 24 * 3600
+
+
+class FuenteIndec:
+    """
+    Consultas al sitio del INDEC que hace el planificador: la fecha del próximo
+    informe, el enlace al Excel y si el Excel cambió. Todo por HTTP (sin
+    navegador) y con un scraper nuevo en cada consulta, porque IndecScraper
+    memoiza las páginas que ya descargó; el cliente HTTP (y sus conexiones
+    abiertas) se comparte entre consultas. Cada petición tiene un plazo, así un
+    servidor caído no retiene el sondeo con reintentos más allá de ese tiempo.
+    """
+
+    def __init__(self, cache_descargas: Optional[CacheDescargas] = None, estrategia_descubrimiento: str = "http",
+                 plazo_http: float = 60.0):
+        """
+        Args:
+            cache_descargas (Optional[CacheDescargas]): Caché de descargas compartida con run()
+            estrategia_descubrimiento (str): Estrategia de IndecScraper para la fecha y el enlace
+            plazo_http (float): Segundos máximos de cada petición contando los reintentos
+        """
+        self.cache_descargas = cache_descargas or CacheDescargas()
+        self.estrategia_descubrimiento = estrategia_descubrimiento
+        self.plazo_http = plazo_http
+        self._cliente_http = None
+
+    def _scraper(self):
+        from src.cliente_http import ClienteHTTP
+        from src.scraper import CABECERAS_HTTP, IndecScraper
+        if self._cliente_http is None:
+            self._cliente_http = ClienteHTTP(cabeceras=CABECERAS_HTTP, plazo=self.plazo_http)
+        return IndecScraper(estrategia_descubrimiento=self.estrategia_descubrimiento,
+                            cache_descargas=self.cache_descargas, cliente_http=self._cliente_http)
+
+    def fecha_proximo_informe(self) -> Optional[str]:
+        return self._scraper().obtener_fecha_proximo_informe()
+
+    def url_excel(self) -> Optional[str]:
+        return self._scraper().obtener_url_excel()
+
+    def hay_novedades(self, url: str) -> bool:
+        """
+        Indica si el Excel tiene contenido sin procesar: primero con un HEAD
+        condicional y, si el servidor no permite saberlo, con un GET condicional
+        (que deja el archivo en la caché para run()).
+        """
+        scraper = self._scraper()
+        cambio = scraper.sondear_excel(url)
+        if cambio is not None:
+            return cambio
+        descarga = scraper.descargar_excel(url)
+        return descarga is not None and not descarga.ya_procesada
+
+
+def ejecutar_pipeline(publicar: bool = False) -> bool:
+    """
+    Ejecuta run() y, opcionalmente, publica la bandeja de salida.
+
+    Args:
+        publicar (bool): Publicar los mensajes encolados después de procesar
+
+    Returns:
+        bool: True si se procesaron datos nuevos
+    """
+    from src.main import run
+
+    if run().df is None:
+        return False
+    if publicar:
+        import asyncio
+        from src.publicar import BandejaSalida, ClienteTwitter, PublicadorAsync
+
+        try:
+            asyncio.run(PublicadorAsync(BandejaSalida(), ClienteTwitter()).drenar(600.0))
+        except Exception as e:
+            logging.error(f"Error al publicar la bandeja de salida: {str(e)}")
+    return True
+
+
+class Planificador:
+    """
+    Proceso de larga duración que espera la publicación del INDEC y procesa el
+    Excel apenas aparece.
+
+    Guarda en un archivo de estado la fecha del próximo informe y duerme hasta
+    poco antes de la hora de publicación de ese día. Desde ahí sondea el Excel
+    con peticiones condicionales baratas, cada espera_inicial hasta la hora de
+    publicación y con espera exponencial (y jitter) después, y ejecuta el
+    pipeline solo cuando el contenido cambió.
+    Después de procesar vuelve a consultar la fecha del informe siguiente.
+    Mientras duerme revisa la fecha una vez por día, por si el INDEC la mueve.
+
+    El reloj, la espera y la fuente de datos son inyectables, así se puede
+    simular un mes completo sin red.
+    """
+
+    def __init__(self, fuente: Optional[Any] = None, ejecutar: Callable[[], bool] = ejecutar_pipeline,
+                 ruta_estado: str = ".cache/planificador.json", reloj: Callable[[], float] = time.time,
+                 dormir: Callable[[float], None] = time.sleep, anticipacion: float = 3600.0,
+                 espera_inicial: float = 300.0, espera_maxima: float = 1800.0, espera_sin_fecha: float = 6 * 3600.0,
+                 dias_ventana: int = 3, aleatorio: Callable[[], float] = random.random):
+        """
+        Args:
+            fuente: Objeto con fecha_proximo_informe(), url_excel() y hay_novedades(url)
+                (por defecto, FuenteIndec)
+            ejecutar (Callable[[], bool]): Procesa los datos nuevos; devuelve True si lo logró
+            ruta_estado (str): Archivo JSON con el estado del planificador
+            reloj (Callable[[], float]): Hora actual en segundos (epoch)
+            dormir (Callable[[float], None]): Espera la cantidad de segundos indicada
+            anticipacion (float): Segundos antes de la hora de publicación en que se empieza a sondear
+            espera_inicial (float): Espera entre sondeos hasta la hora de publicación, y la
+                primera después de ella
+            espera_maxima (float): Tope de la espera entre sondeos
+            espera_sin_fecha (float): Espera antes de reintentar si no se conoce la fecha del
+                informe, y entre sondeos pasada la ventana
+            dias_ventana (int): Días después de la fecha anunciada en que se sigue sondeando con
+                espera creciente
+            aleatorio (Callable[[], float]): Número en [0, 1) para el jitter
+        """
+        self.fuente = fuente or FuenteIndec()
+        self.ejecutar = ejecutar
+        self.ruta_estado = ruta_estado
+        self.reloj = reloj
+        self.dormir = dormir
+        self.anticipacion = anticipacion
+        self.espera_inicial = espera_inicial
+        self.espera_maxima = espera_maxima
+        self.espera_sin_fecha = espera_sin_fecha
+        self.dias_ventana = dias_ventana
+        self.aleatorio = aleatorio
+        self.estado = self._cargar_estado()
+
+    def _cargar_estado(self) -> Dict:
+        try:
+            with open(self.ruta_estado, encoding="utf-8") as archivo:
+                return json.load(archivo)
+        except (OSError, ValueError):
+            return {}
+
+    def _guardar_estado(self) -> None:
+        escribir_atomico(self.ruta_estado, json.dumps(self.estado, indent=2).encode("utf-8"))
+
+    def inicio_sondeo(self, fecha: str) -> float:
+        """Momento (epoch) en que se empieza a sondear para un informe del día `fecha`."""
+        dia = datetime.strptime(fecha, "%Y-%m-%d")
+        publicacion = dia.replace(hour=HORA_PUBLICACION[0], minute=HORA_PUBLICACION[1], tzinfo=ZONA_INDEC)
+        return publicacion.timestamp() - self.anticipacion
+
+    def _actualizar_fecha(self, ahora: float) -> Optional[str]:
+        """Consulta la fecha del próximo informe y la guarda si es una fecha nueva."""
+        fecha = self.fuente.fecha_proximo_informe()
+        self.estado["fecha_consultada"] = ahora
+        if fecha and fecha != self.estado.get("proxima_fecha"):
+            logging.info(f"Próximo informe: {fecha} (antes: {self.estado.get('proxima_fecha')})")
+            self.estado["proxima_fecha"] = fecha
+            self.estado["espera"] = None
+        self._guardar_estado()
+        return fecha
+
+    def _esperar_sondeo(self, ahora: float) -> float:
+        """
+        Siguiente espera entre sondeos: fija hasta la hora de publicación,
+        exponencial (con jitter) desde ahí y espera_sin_fecha pasada la ventana.
+        """
+        publicacion = self.inicio_sondeo(self.estado["proxima_fecha"]) + self.anticipacion
+        anterior = self.estado.get("espera")
+        if ahora < publicacion or anterior is None:
+            espera = self.espera_inicial
+        else:
+            espera = min(anterior * 2, self.espera_maxima)
+        if ahora >= publicacion + self.dias_ventana * DIA:
+            espera = self.espera_sin_fecha
+        self.estado["espera"] = espera
+        self._guardar_estado()
+        # Jitter de ±10% para no sondear siempre en el mismo segundo
+        return espera * (0.9 + 0.2 * self.aleatorio())
+
+    def paso(self) -> float:
+        """
+        Ejecuta un paso del planificador: actualizar la fecha, esperar o sondear.
+
+        Returns:
+            float: Segundos a dormir antes del próximo paso
+        """
+        ahora = self.reloj()
+        fecha = self.estado.get("proxima_fecha")
+        procesada = self.estado.get("fecha_procesada")
+        consultada = self.estado.get("fecha_consultada") or 0.0
+
+        # La fecha se vuelve a consultar si no se conoce, si ya se procesó ese informe
+        # o si pasó un día desde la última consulta
+        if fecha is None or fecha == procesada or ahora - consultada >= DIA:
+            fecha = self._actualizar_fecha(ahora) or fecha
+            if fecha is None or fecha == procesada:
+                logging.info("La fecha del próximo informe todavía no está publicada")
+                return self.espera_sin_fecha
+
+        inicio = self.inicio_sondeo(fecha)
+        if ahora < inicio:
+            espera = min(inicio - ahora, DIA)
+            logging.info(f"Informe del {fecha}: se sondeará en {(inicio - ahora) / 3600:.1f} horas")
+            return espera
+
+        url = self.fuente.url_excel()
+        self.estado["sondeos"] = self.estado.get("sondeos", 0) + 1
+        if url and self.fuente.hay_novedades(url):
+            logging.info(f"Hay datos nuevos en {url}: ejecutando el pipeline")
+            if self.ejecutar():
+                self.estado.update(fecha_procesada=fecha, ultima_ejecucion=ahora, espera=None, sondeos=0)
+                self._guardar_estado()
+                return 0.0
+            logging.error("El pipeline no procesó los datos nuevos; se reintentará")
+        espera = self._esperar_sondeo(ahora)
+        logging.info(f"Sin datos nuevos para el informe del {fecha}: próximo sondeo en {espera / 60:.0f} minutos")
+        return espera
+
+    def ejecutar_siempre(self, pasos: Optional[int] = None) -> None:
+        """
+        Repite paso() y duerme lo indicado entre pasos. Un error en un paso se
+        registra y se reintenta después de espera_inicial.
+
+        Args:
+            pasos (Optional[int]): Cantidad de pasos a ejecutar (sin límite si es None)
+        """
+        hechos = 0
+        while pasos is None or hechos < pasos:
+            try:
+                espera = self.paso()
+            except Exception as e:
+                logging.error(f"Error en el planificador: {str(e)}")
+                espera = self.espera_inicial
+            hechos += 1
+            if espera > 0 and (pasos is None or hechos < pasos):
+                self.dormir(espera)
+
+
+def main() -> None:
+    configurar_logging()
+    parser = argparse.ArgumentParser(description="Planificador que espera cada informe del INDEC y lo procesa")
+    parser.add_argument("--estado", default=".cache/planificador.json", help="Archivo de estado")
+    parser.add_argument("--publicar", action="store_true", help="Publicar la bandeja de salida después de procesar")
+    parser.add_argument("--una-vez", action="store_true", help="Ejecutar un solo paso y terminar (para cron)")
+    parser.add_argument("--anticipacion", type=float, default=60.0,
+                        help="Minutos antes de las 16:00 (hora argentina) en que se empieza a sondear")
+    parser.add_argument("--espera-maxima", type=float, default=30.0, help="Minutos máximos entre sondeos")
+    args = parser.parse_args()
+
+    planificador = Planificador(
+        ejecutar=lambda: ejecutar_pipeline(args.publicar),
+        ruta_estado=args.estado,
+        anticipacion=args.anticipacion * 60,
+        espera_maxima=args.espera_maxima * 60,
+    )
+    planificador.ejecutar_siempre(1 if args.una_vez else None)
+
+
+if __name__ == "__main__":
+    main()
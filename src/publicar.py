@@ -1,111 +1,437 @@
-import os
-import tweepy
-import pandas as pd
+from contextlib import closing
+from typing import Callable, Dict, List, Optional
+import argparse
+import asyncio
 import logging
-from dotenv import load_dotenv
+import os
+import random
+import sqlite3
+import time
+
+from src.metricas import configurar_logging, medir_etapa, perfilador_actual
+
+# Variables de entorno con las credenciales de la API de Twitter
+VARIABLES_CREDENCIALES = ("API_KEY", "API_SECRET", "ACCESS_TOKEN", "ACCESS_SECRET")
+
+ESQUEMA = """
+CREATE TABLE IF NOT EXISTS publicaciones (
+    clave TEXT PRIMARY KEY,
+    texto TEXT NOT NULL,
+    estado TEXT NOT NULL DEFAULT 'pendiente',
+    intentos INTEGER NOT NULL DEFAULT 0,
+    proximo_intento REAL NOT NULL DEFAULT 0,
+    ultimo_error TEXT,
+    id_externo TEXT,
+    creado REAL NOT NULL,
+    publicado REAL
+);
+CREATE INDEX IF NOT EXISTS idx_publicaciones_estado ON publicaciones (estado, proximo_intento);
+"""
+
 
-# Configurar logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(levelname)s - %(message)s'
-)
+class LimiteExcedido(Exception):
+    """La API rechazó la publicación por límite de uso; se puede reintentar después de `espera` segundos."""
 
-# Cargar variables de entorno (para pruebas locales)
-load_dotenv()
+    def __init__(self, espera: float, mensaje: str = "Límite de publicaciones excedido"):
+        super().__init__(mensaje)
+        self.espera = espera
+
+
+class ErrorPermanente(Exception):
+    """La API rechazó la publicación por un motivo que no se resuelve reintentando."""
+
+
+def credenciales() -> Dict[str, str]:
+    """
+    Lee las credenciales de Twitter del entorno (o del archivo .env).
+
+    Returns:
+        Dict[str, str]: Valor de cada variable de VARIABLES_CREDENCIALES
+
+    Raises:
+        KeyError: Si falta alguna variable
+    """
+    # Cargar variables de entorno (para pruebas locales); dotenv solo hace falta para publicar
+    from dotenv import load_dotenv
+
+    load_dotenv()
+    try:
+        return {variable: os.environ[variable] for variable in VARIABLES_CREDENCIALES}
+    except KeyError as e:
+        logging.error(f"Error: La variable de entorno {e} no está configurada.")
+        raise
+
+
+def componer_tweet(cubo, sheet="Nacional"):
+    """
+    Arma el texto del tweet con las variaciones ya calculadas en el cubo analítico
+    para el último mes de la hoja (plantilla 'tweet' de src.reportes).
+    Args:
+        cubo: CuboAnalitico actualizado con la última ingesta
+        sheet: Hoja de la que se toman los datos
+    Returns:
+        str: Texto del tweet, o None si el cubo no tiene datos de la hoja
+    """
+    from src.reportes import renderizar, resumenes_mensuales
 
-# Acceder a las variables de entorno
-try:
-    api_key = os.environ["API_KEY"]  # Clave de la API
-    api_secret = os.environ["API_SECRET"]  # Secreto de la API
-    access_token = os.environ["ACCESS_TOKEN"]  # Token de acceso
-    access_secret = os.environ["ACCESS_SECRET"]  # Secreto del token de acceso
-except KeyError as e:
-    logging.error(f"Error: La variable de entorno {e} no está configurada.")
-    raise
+    ultimo_mes = cubo.ultimo_mes(sheet)
+    if ultimo_mes is None:
+        return None
+    resumenes = resumenes_mensuales(cubo, sheet, ultimo_mes)
+    if not resumenes:
+        return None
+    return renderizar(resumenes[-1], ["tweet"])["tweet"]
 
 
-def publicar_tweet(df_transformado):
+@medir_etapa("publicar.encolar")
+def encolar_tweet(cubo, bandeja: "BandejaSalida", sheet: str = "Nacional") -> bool:
     """
-    Publica un tweet con la información del DataFrame
+    Arma el tweet del último mes y lo deja en la bandeja de salida. La clave de
+    idempotencia es la hoja y el mes, así un mes nunca se encola dos veces; si
+    el mensaje del mes sigue pendiente y el INDEC revisó los datos, se
+    reemplaza su texto.
+
     Args:
-        df_transformado: DataFrame con los datos procesados
+        cubo: CuboAnalitico actualizado con la última ingesta
+        bandeja (BandejaSalida): Bandeja donde se encola el mensaje
+        sheet (str): Hoja de la que se toman los datos
+
     Returns:
-        bool: True si el tweet se publicó correctamente, False en caso contrario
+        bool: True si se encoló un mensaje nuevo
     """
-    if df_transformado is None:
+    tweet_text = componer_tweet(cubo, sheet) if cubo is not None else None
+    if tweet_text is None:
         logging.error("No hay datos disponibles para publicar")
         return False
-
-    # Autenticación en API v2
-    client = tweepy.Client(
-        consumer_key=api_key,
-        consumer_secret=api_secret,
-        access_token=access_token,
-        access_token_secret=access_secret,
-    )
-
-    # Preparar los datos para el tweet
-    df_transformado["Date"] = pd.to_datetime(df_transformado["Date"])
-    ultimo_mes = df_transformado["Date"].max()
-    mes_anterior = ultimo_mes - pd.DateOffset(months=1)
-
-    # Filtrar datos solo del último mes y del mes anterior
-    df_filtered = df_transformado[
-        df_transformado["Date"].dt.to_period("M").isin([mes_anterior.to_period("M"), ultimo_mes.to_period("M")])
-    ]
-
-    # Calcular promedio de precios por región y fecha
-    df_promedios = df_filtered.groupby(["Región", "Date"])["Price"].mean().reset_index()
-
-    # Ordenar y calcular la variación porcentual del último mes para cada región
-    df_promedios = df_promedios.sort_values(by=["Región", "Date"])
-    df_promedios["Variación"] = df_promedios.groupby("Región")["Price"].pct_change() * 100
-
-    # Filtrar solo los valores del último mes para las regiones
-    df_final = df_promedios[df_promedios["Date"] == ultimo_mes]
-
-    # Calcular la variación IPC promedio de todos los productos seleccionados (por región)
-    inflacion_promedio = df_final["Variación"].mean()
-
-    # Ordenar df_final por la variación en orden descendente
-    df_final = df_final.sort_values(by="Variación", ascending=False)
-
-    # Obtener el producto seleccionado con mayor alza y mayor baja a nivel general (último mes)
-    # Se utilizan los datos filtrados para el último mes a nivel de "Productos seleccionados"
-    df_productos = df_filtered.groupby(["Productos seleccionados", "Date"])["Price"].mean().reset_index()
-    df_productos = df_productos.sort_values(by=["Productos seleccionados", "Date"])
-    df_productos["Variación"] = df_productos.groupby("Productos seleccionados")["Price"].pct_change() * 100
-    df_productos_final = df_productos[df_productos["Date"] == ultimo_mes]
-    mayor_alza_producto = df_productos_final.loc[df_productos_final["Variación"].idxmax()]
-    mayor_baja_producto = df_productos_final.loc[df_productos_final["Variación"].idxmin()]
-
-    # Obtener el último mes en formato de texto
-    ultimo_mes_str = ultimo_mes.strftime("%B %Y") \
-        .replace("January", "Enero").replace("February", "Febrero") \
-        .replace("March", "Marzo").replace("April", "Abril") \
-        .replace("May", "Mayo").replace("June", "Junio") \
-        .replace("July", "Julio").replace("August", "Agosto") \
-        .replace("September", "Septiembre").replace("October", "Octubre") \
-        .replace("November", "Noviembre").replace("December", "Diciembre")
-
-    tweet_text = f"INDEC CANASTA IPC {ultimo_mes_str}: {inflacion_promedio:.2f}% \n"
-    tweet_text += "\n📊Región:\n"
-    for _, row in df_final.iterrows():
-        emoji = "📉" if row["Variación"] < 0 else "📈"
-        tweet_text += f"🔹 {row['Región']}: {row['Variación']:.2f}% \n"
-
-    # Agregar información sobre la variación de productos (último mes)
-    tweet_text += f"\n📈Cambios:\n"
-    tweet_text += f"🔼: {mayor_alza_producto['Productos seleccionados']} +{mayor_alza_producto['Variación']:.2f}%\n"
-    tweet_text += f"🔽: {mayor_baja_producto['Productos seleccionados']} {mayor_baja_producto['Variación']:.2f}%\n"
-    tweet_text += "\n🤖Github/Mauricioarcez"
-
-    # Publicar el tweet
-    try:
-        response = client.create_tweet(text=tweet_text)
-        print(f"✅ Tweet publicado: https://twitter.com/user/status/{response.data['id']}")
+    clave = f"tweet:{sheet}:{cubo.ultimo_mes(sheet).strftime('%Y-%m')}"
+    if bandeja.encolar(clave, tweet_text):
         return True
-    except Exception as e:
-        print(f"❌ Error al publicar el tweet: {e}")
+    bandeja.reemplazar_pendiente(clave, tweet_text)
+    return False
+
+
+class BandejaSalida:
+    """
+    Bandeja de salida persistente (SQLite) de los mensajes a publicar.
+
+    Cada mensaje tiene una clave de idempotencia: encolar dos veces la misma
+    clave no hace nada, y un mensaje publicado no vuelve a enviarse. Antes de
+    llamar a la API el mensaje pasa a 'enviando'; si el proceso se interrumpe
+    en ese punto no se reintenta automáticamente, porque no se sabe si llegó a
+    publicarse (ver reencolar).
+    """
+
+    def __init__(self, ruta: str = "data/publicaciones.sqlite", reloj: Callable[[], float] = time.time):
+        """
+        Args:
+            ruta (str): Archivo de la base SQLite
+            reloj (Callable[[], float]): Hora actual en segundos (inyectable para pruebas)
+        """
+        self.ruta = ruta
+        self.reloj = reloj
+        os.makedirs(os.path.dirname(ruta) or ".", exist_ok=True)
+        with closing(self._conectar()) as con, con:
+            con.executescript(ESQUEMA)
+
+    def _conectar(self) -> sqlite3.Connection:
+        con = sqlite3.connect(self.ruta)
+        con.row_factory = sqlite3.Row
+        return con
+
+    def encolar(self, clave: str, texto: str) -> bool:
+        """
+        Agrega un mensaje si su clave no existe.
+
+        Returns:
+            bool: True si el mensaje es nuevo
+        """
+        with closing(self._conectar()) as con, con:
+            cursor = con.execute(
+                "INSERT OR IGNORE INTO publicaciones (clave, texto, creado) VALUES (?, ?, ?)",
+                (clave, texto, self.reloj()),
+            )
+        if cursor.rowcount:
+            logging.info(f"Mensaje {clave} encolado para publicar")
+            return True
+        logging.info(f"El mensaje {clave} ya estaba en la bandeja de salida; no se encola de nuevo")
+        return False
+
+    def reemplazar_pendiente(self, clave: str, texto: str) -> bool:
+        """
+        Cambia el texto de un mensaje que todavía no se envió (los publicados no se tocan).
+
+        Returns:
+            bool: True si el texto cambió
+        """
+        with closing(self._conectar()) as con, con:
+            cursor = con.execute(
+                "UPDATE publicaciones SET texto = ? WHERE clave = ? AND estado = 'pendiente' AND texto != ?",
+                (texto, clave, texto),
+            )
+        if cursor.rowcount:
+            logging.info(f"Texto del mensaje pendiente {clave} actualizado con los datos revisados")
+            return True
         return False
 
+    def pendientes(self) -> List[sqlite3.Row]:
+        """Mensajes pendientes, listos o no para reintentar, del más viejo al más nuevo."""
+        with closing(self._conectar()) as con:
+            return con.execute(
+                "SELECT * FROM publicaciones WHERE estado = 'pendiente' ORDER BY proximo_intento, creado"
+            ).fetchall()
+
+    def estado(self, clave: str) -> Optional[sqlite3.Row]:
+        with closing(self._conectar()) as con:
+            return con.execute("SELECT * FROM publicaciones WHERE clave = ?", (clave,)).fetchone()
+
+    def _actualizar(self, clave: str, **campos) -> None:
+        with closing(self._conectar()) as con, con:
+            con.execute(
+                f"UPDATE publicaciones SET {', '.join(f'{campo} = ?' for campo in campos)} WHERE clave = ?",
+                list(campos.values()) + [clave],
+            )
+
+    def marcar_enviando(self, clave: str) -> bool:
+        """Toma un mensaje pendiente para enviarlo; False si otro proceso ya lo tomó."""
+        with closing(self._conectar()) as con, con:
+            cursor = con.execute(
+                "UPDATE publicaciones SET estado = 'enviando', intentos = intentos + 1 "
+                "WHERE clave = ? AND estado = 'pendiente'",
+                (clave,),
+            )
+        return bool(cursor.rowcount)
+
+    def marcar_publicado(self, clave: str, id_externo: Optional[str]) -> None:
+        self._actualizar(clave, estado="publicado", id_externo=id_externo, publicado=self.reloj(), ultimo_error=None)
+
+    def reprogramar(self, clave: str, espera: float, error: str, contar_intento: bool = True) -> None:
+        """Devuelve un mensaje a pendiente para reintentarlo dentro de `espera` segundos."""
+        with closing(self._conectar()) as con, con:
+            con.execute(
+                "UPDATE publicaciones SET estado = 'pendiente', proximo_intento = ?, ultimo_error = ?, "
+                "intentos = intentos - ? WHERE clave = ?",
+                (self.reloj() + espera, error, 0 if contar_intento else 1, clave),
+            )
+
+    def marcar_fallido(self, clave: str, error: str) -> None:
+        self._actualizar(clave, estado="fallido", ultimo_error=error)
+
+    def reencolar(self, clave: str) -> None:
+        """Vuelve a poner como pendiente un mensaje fallido o interrumpido (decisión manual)."""
+        self._actualizar(clave, estado="pendiente", proximo_intento=0)
+
+
+class ClienteTwitter:
+    """Publica en Twitter con la API v2 (tweepy se importa recién al crear el cliente)."""
+
+    def __init__(self, claves: Optional[Dict[str, str]] = None):
+        """
+        Args:
+            claves (Optional[Dict[str, str]]): Credenciales; por defecto, las del entorno
+        """
+        import tweepy
+
+        self._tweepy = tweepy
+        claves = claves or credenciales()
+        # Autenticación en API v2
+        self._client = tweepy.Client(
+            consumer_key=claves["API_KEY"],
+            consumer_secret=claves["API_SECRET"],
+            access_token=claves["ACCESS_TOKEN"],
+            access_token_secret=claves["ACCESS_SECRET"],
+        )
+
+    def publicar(self, texto: str) -> str:
+        """
+        Publica un tweet.
+
+        Returns:
+            str: Identificador del tweet
+
+        Raises:
+            LimiteExcedido: Si la API respondió 429
+            ErrorPermanente: Si la API rechazó el tweet (400, 401, 403)
+        """
+        try:
+            response = self._client.create_tweet(text=texto)
+        except self._tweepy.TooManyRequests as e:
+            reinicio = float(e.response.headers.get("x-rate-limit-reset", 0) or 0)
+            raise LimiteExcedido(max(reinicio - time.time(), 60.0)) from e
+        except (self._tweepy.BadRequest, self._tweepy.Unauthorized, self._tweepy.Forbidden) as e:
+            raise ErrorPermanente(str(e)) from e
+        return str(response.data["id"])
+
+
+class ClienteFalso:
+    """
+    Cliente que no publica nada: guarda los textos recibidos. Permite simular
+    fallos transitorios y límites de uso para probar la bandeja sin tweepy.
+    """
+
+    def __init__(self, fallos: int = 0, limites: int = 0, espera_limite: float = 60.0):
+        """
+        Args:
+            fallos (int): Cantidad de llamadas iniciales que fallan con un error transitorio
+            limites (int): Cantidad de llamadas (después de los fallos) que responden límite excedido
+            espera_limite (float): Espera informada en cada límite excedido
+        """
+        self.fallos = fallos
+        self.limites = limites
+        self.espera_limite = espera_limite
+        self.publicados: List[str] = []
+
+    def publicar(self, texto: str) -> str:
+        if self.fallos:
+            self.fallos -= 1
+            raise ConnectionError("Fallo simulado")
+        if self.limites:
+            self.limites -= 1
+            raise LimiteExcedido(self.espera_limite)
+        self.publicados.append(texto)
+        return f"falso-{len(self.publicados)}"
+
+
+class PublicadorAsync:
+    """
+    Vacía la bandeja de salida con un worker asyncio.
+
+    Los mensajes se publican de a uno. Ante un error transitorio se reintenta con
+    espera exponencial (con jitter) hasta max_intentos; ante un límite de uso se
+    pausa el worker hasta el reinicio informado por la API, sin contar el intento.
+    Los errores permanentes marcan el mensaje como fallido.
+    """
+
+    def __init__(self, bandeja: BandejaSalida, cliente, max_intentos: int = 5, espera_base: float = 2.0,
+                 espera_maxima: float = 900.0, dormir: Callable = asyncio.sleep):
+        """
+        Args:
+            bandeja (BandejaSalida): Bandeja de salida a vaciar
+            cliente: Objeto con publicar(texto) -> id (ClienteTwitter o ClienteFalso)
+            max_intentos (int): Intentos por mensaje antes de marcarlo como fallido
+            espera_base (float): Espera en segundos después del primer fallo
+            espera_maxima (float): Tope de la espera entre intentos
+            dormir (Callable): Corrutina de espera (inyectable para pruebas)
+        """
+        self.bandeja = bandeja
+        self.cliente = cliente
+        self.max_intentos = max_intentos
+        self.espera_base = espera_base
+        self.espera_maxima = espera_maxima
+        self.dormir = dormir
+        # Hora (según el reloj de la bandeja) hasta la que la API no acepta publicaciones
+        self.pausa_hasta = 0.0
+
+    def _espera(self, intentos: int) -> float:
+        return min(self.espera_maxima, self.espera_base * 2 ** (intentos - 1)) * random.uniform(0.5, 1.0)
+
+    async def _enviar(self, mensaje: sqlite3.Row) -> None:
+        clave = mensaje["clave"]
+        if not self.bandeja.marcar_enviando(clave):
+            return
+        intentos = mensaje["intentos"] + 1
+        loop = asyncio.get_running_loop()
+        try:
+            id_externo = await loop.run_in_executor(None, self.cliente.publicar, mensaje["texto"])
+        except LimiteExcedido as e:
+            logging.warning(f"Límite de publicaciones excedido; se pausa la publicación {e.espera:.0f}s")
+            self.pausa_hasta = max(self.pausa_hasta, self.bandeja.reloj() + e.espera)
+            self.bandeja.reprogramar(clave, e.espera, str(e), contar_intento=False)
+        except ErrorPermanente as e:
+            logging.error(f"❌ Error permanente al publicar {clave}: {str(e)}")
+            self.bandeja.marcar_fallido(clave, str(e))
+        except Exception as e:
+            if intentos >= self.max_intentos:
+                logging.error(f"❌ Error al publicar {clave} ({intentos} intentos): {str(e)}")
+                self.bandeja.marcar_fallido(clave, str(e))
+            else:
+                espera = self._espera(intentos)
+                logging.warning(f"Error al publicar {clave} (intento {intentos}): {str(e)}; reintento en {espera:.1f}s")
+                self.bandeja.reprogramar(clave, espera, str(e))
+        else:
+            logging.info(f"✅ {clave} publicado: https://twitter.com/user/status/{id_externo}")
+            self.bandeja.marcar_publicado(clave, id_externo)
+
+    async def drenar(self, limite: Optional[float] = None) -> Dict[str, int]:
+        """
+        Publica los mensajes pendientes, esperando los reintentos programados.
+
+        Args:
+            limite (Optional[float]): Segundos máximos de espera; los mensajes cuyo
+                reintento queda más allá siguen pendientes para la próxima corrida
+
+        Returns:
+            Dict[str, int]: Mensajes publicados, fallidos y pendientes al terminar
+        """
+        inicio = self.bandeja.reloj()
+        publicados_antes = self._contar("publicado")
+        fallidos_antes = self._contar("fallido")
+        while True:
+            pendientes = self.bandeja.pendientes()
+            if not pendientes:
+                break
+            ahora = self.bandeja.reloj()
+            proximo = pendientes[0]
+            # Tras un límite de uso ningún mensaje se envía antes del reinicio de la API
+            listo = max(proximo["proximo_intento"], self.pausa_hasta)
+            if listo > ahora:
+                espera = listo - ahora
+                if limite is not None and ahora + espera - inicio > limite:
+                    logging.info(f"{len(pendientes)} mensajes quedan pendientes para la próxima corrida")
+                    break
+                await self.dormir(espera)
+                continue
+            await self._enviar(proximo)
+
+        resumen = {
+            "publicados": self._contar("publicado") - publicados_antes,
+            "fallidos": self._contar("fallido") - fallidos_antes,
+            "pendientes": len(self.bandeja.pendientes()),
+        }
+        logging.info(
+            f"Bandeja de salida: {resumen['publicados']} publicados, {resumen['fallidos']} fallidos, "
+            f"{resumen['pendientes']} pendientes"
+        )
+        return resumen
+
+    def _contar(self, estado: str) -> int:
+        with closing(self.bandeja._conectar()) as con:
+            return con.execute("SELECT COUNT(*) FROM publicaciones WHERE estado = ?", (estado,)).fetchone()[0]
+
+
+def publicar_pendientes(ruta_bandeja: str = "data/publicaciones.sqlite", limite: float = 600.0,
+                        simular: bool = False) -> None:
+    """
+    Publica los mensajes pendientes de la bandeja de salida.
+
+    Args:
+        ruta_bandeja (str): Archivo de la bandeja de salida
+        limite (float): Segundos máximos esperando reintentos
+        simular (bool): Mostrar los mensajes pendientes sin publicarlos (no lee credenciales)
+    """
+    bandeja = BandejaSalida(ruta_bandeja)
+    pendientes = bandeja.pendientes()
+    if not pendientes:
+        logging.info("No hay mensajes pendientes de publicar")
+        return
+    if simular:
+        for mensaje in pendientes:
+            print(f"[{mensaje['clave']}]\n{mensaje['texto']}\n")
+        return
+    with perfilador_actual().etapa("publicar.drenar", len(pendientes)):
+        asyncio.run(PublicadorAsync(bandeja, ClienteTwitter()).drenar(limite))
+
+
+def main() -> None:
+    configurar_logging()
+    parser = argparse.ArgumentParser(description="Publica los mensajes pendientes de la bandeja de salida")
+    parser.add_argument("--bandeja", default="data/publicaciones.sqlite", help="Archivo de la bandeja de salida")
+    parser.add_argument("--limite", type=float, default=600.0, help="Segundos máximos esperando reintentos")
+    parser.add_argument("--simular", action="store_true", help="Mostrar los mensajes pendientes sin publicarlos")
+    args = parser.parse_args()
+
+    publicar_pendientes(args.bandeja, args.limite, args.simular)
+    perfilador_actual().registrar_log()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,376 @@
+from dataclasses import dataclass
+from functools import lru_cache
+from string import Formatter
+from typing import Any, Callable, Dict, Iterable, List, Mapping, Optional, Tuple
+import argparse
+import html
+import json
+import logging
+import os
+import time
+
+import numpy as np
+import pandas as pd
+
+from src.cache import escribir_atomico
+from src.metricas import configurar_logging, medir_etapa
+
+# Nombres de los meses por idioma: tabla fija, sin depender del locale del sistema ni de strftime
+MESES = {
+    "es": ("Enero", "Febrero", "Marzo", "Abril", "Mayo", "Junio", "Julio", "Agosto",
+           "Septiembre", "Octubre", "Noviembre", "Diciembre"),
+    "en": ("January", "February", "March", "April", "May", "June", "July", "August",
+           "September", "October", "November", "December"),
+}
+
+# Largo máximo de un tweet (en caracteres ponderados, ver largo_tweet)
+LIMITE_TWEET = 280
+
+# Plantillas de cada formato de texto. Cada una tiene un encabezado, una fila por
+# región (ordenadas de mayor a menor variación), los cambios de productos y un pie.
+# Campos: sheet, mes, periodo, promedio, region, variacion, alza, var_alza, baja, var_baja
+PLANTILLAS: Dict[str, Dict[str, str]] = {
+    "tweet": {
+        "encabezado": "INDEC CANASTA IPC {mes}: {promedio:.2f}% \n\n📊Región:\n",
+        "region": "🔹 {region}: {variacion:.2f}% \n",
+        "cambios": "\n📈Cambios:\n🔼: {alza} +{var_alza:.2f}%\n🔽: {baja} {var_baja:.2f}%\n",
+        "pie": "\n🤖Github/Mauricioarcez",
+    },
+    "markdown": {
+        "encabezado": "## INDEC canasta IPC {mes} ({sheet})\n\n"
+                      "Variación mensual promedio: **{promedio:.2f}%**\n\n"
+                      "| Región | Variación mensual |\n| --- | ---: |\n",
+        "region": "| {region} | {variacion:.2f}% |\n",
+        "cambios": "\n- Mayor alza: {alza} (+{var_alza:.2f}%)\n- Mayor baja: {baja} ({var_baja:.2f}%)\n",
+        "pie": "",
+    },
+    "html": {
+        "encabezado": '<table class="ipc-regiones" data-periodo="{periodo}">\n'
+                      "<caption>INDEC canasta IPC {mes} ({sheet}): {promedio:.2f}%</caption>\n"
+                      "<thead><tr><th>Región</th><th>Variación mensual</th></tr></thead>\n<tbody>\n",
+        "region": "<tr><td>{region}</td><td>{variacion:.2f}%</td></tr>\n",
+        "cambios": "</tbody>\n<tfoot>\n<tr><td>Mayor alza: {alza}</td><td>+{var_alza:.2f}%</td></tr>\n"
+                   "<tr><td>Mayor baja: {baja}</td><td>{var_baja:.2f}%</td></tr>\n</tfoot>\n",
+        "pie": "</table>\n",
+    },
+}
+
+# Escape de los textos (regiones, productos, hoja) de cada formato
+ESCAPES: Dict[str, Callable[[str], str]] = {
+    "markdown": lambda texto: texto.replace("|", "\\|"),
+    "html": html.escape,
+}
+
+# Formatos disponibles y extensión de sus archivos
+FORMATOS = {"tweet": ".txt", "hilo": ".hilo.txt", "markdown": ".md", "html": ".html", "json": ".json"}
+
+
+def nombre_mes(fecha: pd.Timestamp, idioma: str = "es") -> str:
+    """
+    Mes y año en texto (por ejemplo, 'Diciembre 2024').
+
+    Args:
+        fecha (pd.Timestamp): Cualquier día del mes
+        idioma (str): Clave de MESES
+
+    Returns:
+        str: Nombre del mes y año
+    """
+    return f"{MESES[idioma][fecha.month - 1]} {fecha.year}"
+
+
+class Plantilla:
+    """
+    Plantilla con campos {nombre:formato}, parseada una sola vez: al renderizar
+    solo se formatea cada campo y se unen las partes. Los campos se validan al
+    compilar, así un error en una plantilla aparece antes de renderizar.
+    """
+
+    def __init__(self, texto: str, campos: Iterable[str]):
+        """
+        Args:
+            texto (str): Plantilla con la sintaxis de str.format (solo campos con nombre)
+            campos (Iterable[str]): Campos permitidos
+
+        Raises:
+            ValueError: Si la plantilla usa un campo desconocido, posicional o con conversión
+        """
+        self.texto = texto
+        self.partes: List[Tuple[str, Optional[str], str]] = []
+        permitidos = set(campos)
+        for literal, campo, especificacion, conversion in Formatter().parse(texto):
+            if campo is not None and (campo not in permitidos or conversion):
+                raise ValueError(f"Campo inválido en la plantilla: {{{campo}}} (disponibles: {sorted(permitidos)})")
+            self.partes.append((literal, campo, especificacion or ""))
+
+    def __call__(self, valores: Mapping[str, Any]) -> str:
+        return "".join(
+            literal if campo is None else literal + format(valores[campo], especificacion)
+            for literal, campo, especificacion in self.partes
+        )
+
+
+CAMPOS = ("sheet", "mes", "periodo", "promedio", "region", "variacion", "alza", "var_alza", "baja", "var_baja")
+
+
+@lru_cache(maxsize=None)
+def compilar(formato: str) -> Dict[str, Plantilla]:
+    """Plantillas compiladas de un formato de texto (una sola vez por proceso)."""
+    if formato not in PLANTILLAS:
+        raise ValueError(f"Formato sin plantilla: {formato}")
+    return {parte: Plantilla(texto, CAMPOS) for parte, texto in PLANTILLAS[formato].items()}
+
+
+@dataclass
+class ResumenMensual:
+    """Datos de un mes de una hoja, ya agregados, con los que se arman todos los formatos."""
+    sheet: str
+    fecha: pd.Timestamp
+    promedio: float
+    regiones: List[Tuple[str, float]]
+    mayor_alza: Tuple[str, float]
+    mayor_baja: Tuple[str, float]
+
+    def valores(self, idioma: str = "es") -> Dict[str, Any]:
+        """Campos de las plantillas comunes a todas las filas."""
+        return {
+            "sheet": self.sheet,
+            "mes": nombre_mes(self.fecha, idioma),
+            "periodo": self.fecha.strftime("%Y-%m"),
+            "promedio": self.promedio,
+            "alza": self.mayor_alza[0],
+            "var_alza": self.mayor_alza[1],
+            "baja": self.mayor_baja[0],
+            "var_baja": self.mayor_baja[1],
+        }
+
+    def to_dict(self, idioma: str = "es") -> Dict:
+        """Versión serializable (JSON); las variaciones faltantes quedan en None."""
+        def numero(valor: float) -> Optional[float]:
+            return None if np.isnan(valor) else round(float(valor), 4)
+
+        return {
+            "sheet": self.sheet,
+            "periodo": self.fecha.strftime("%Y-%m"),
+            "mes": nombre_mes(self.fecha, idioma),
+            "promedio_var_mensual": numero(self.promedio),
+            "regiones": [{"region": region, "var_mensual": numero(variacion)} for region, variacion in self.regiones],
+            "mayor_alza": {"producto": self.mayor_alza[0], "var_mensual": numero(self.mayor_alza[1])},
+            "mayor_baja": {"producto": self.mayor_baja[0], "var_mensual": numero(self.mayor_baja[1])},
+        }
+
+
+@medir_etapa("reportes.resumenes")
+def resumenes_mensuales(cubo, sheet: str = "Nacional", fecha: Optional[str] = None) -> List[ResumenMensual]:
+    """
+    Arma los resúmenes de todos los meses (o de uno) de una hoja con dos lecturas
+    del cubo analítico: variaciones por región y por producto. Se omiten los meses
+    sin variación mensual (el primero de la serie).
+
+    Args:
+        cubo: CuboAnalitico con los promedios y variaciones calculados
+        sheet (str): Hoja de origen
+        fecha (Optional[str]): Mes YYYY-MM-DD (todos si es None)
+
+    Returns:
+        List[ResumenMensual]: Un resumen por mes, del más antiguo al más reciente
+    """
+    regiones = cubo.consultar("region", sheet, fecha)
+    productos = cubo.consultar("producto", sheet, fecha)
+    productos = productos[productos["var_mensual"].notna()]
+    if regiones.empty or productos.empty:
+        return []
+
+    # Regiones de cada mes de mayor a menor variación (las faltantes al final)
+    regiones = regiones.sort_values(["Date", "var_mensual"], ascending=[True, False], na_position="last")
+    promedios = regiones.groupby("Date")["var_mensual"].mean()
+    agrupados = productos.groupby("Date")["var_mensual"]
+    alzas = productos.loc[agrupados.idxmax(), ["Date", "Productos seleccionados", "var_mensual"]].set_index("Date")
+    bajas = productos.loc[agrupados.idxmin(), ["Date", "Productos seleccionados", "var_mensual"]].set_index("Date")
+
+    fechas = regiones["Date"].to_numpy()
+    nombres = regiones["Región"].to_numpy()
+    variaciones = regiones["var_mensual"].to_numpy()
+    cortes = np.flatnonzero(fechas[1:] != fechas[:-1]) + 1
+    inicios = np.concatenate(([0], cortes))
+    finales = np.concatenate((cortes, [len(fechas)]))
+
+    resumenes = []
+    for inicio, final in zip(inicios, finales):
+        mes = pd.Timestamp(fechas[inicio])
+        if mes not in alzas.index:
+            continue
+        resumenes.append(ResumenMensual(
+            sheet=sheet,
+            fecha=mes,
+            promedio=float(promedios[mes]),
+            regiones=list(zip(nombres[inicio:final].tolist(), variaciones[inicio:final].tolist())),
+            mayor_alza=(alzas.at[mes, "Productos seleccionados"], float(alzas.at[mes, "var_mensual"])),
+            mayor_baja=(bajas.at[mes, "Productos seleccionados"], float(bajas.at[mes, "var_mensual"])),
+        ))
+    return resumenes
+
+
+def _texto(resumen: ResumenMensual, formato: str, valores: Dict[str, Any]) -> str:
+    """Renderiza un formato de texto con sus plantillas compiladas."""
+    plantillas = compilar(formato)
+    escapar = ESCAPES.get(formato)
+    if escapar is not None:
+        valores = {campo: escapar(valor) if isinstance(valor, str) else valor for campo, valor in valores.items()}
+    fila = plantillas["region"]
+    filas = "".join(
+        fila({"region": escapar(region) if escapar else region, "variacion": variacion})
+        for region, variacion in resumen.regiones
+    )
+    return plantillas["encabezado"](valores) + filas + plantillas["cambios"](valores) + plantillas["pie"](valores)
+
+
+def largo_tweet(texto: str) -> int:
+    """
+    Largo de un texto como lo cuenta Twitter: los caracteres latinos y la
+    puntuación general pesan 1 y el resto (emojis, CJK) pesa 2.
+    """
+    largo = 0
+    for caracter in texto:
+        codigo = ord(caracter)
+        if codigo <= 0x10FF or 0x2000 <= codigo <= 0x200D or 0x2010 <= codigo <= 0x201F or 0x2032 <= codigo <= 0x2037:
+            largo += 1
+        elif codigo == 0xFE0F:
+            continue  # Selector de variante: no suma
+        else:
+            largo += 2
+    return largo
+
+
+def dividir_hilo(texto: str, limite: int = LIMITE_TWEET) -> List[str]:
+    """
+    Divide un texto en tweets de hasta `limite` caracteres ponderados, cortando
+    entre líneas (y entre palabras si una línea sola no entra). Si hace falta más
+    de un tweet, cada uno termina con su número ('1/3').
+
+    Args:
+        texto (str): Texto completo
+        limite (int): Largo máximo de cada tweet
+
+    Returns:
+        List[str]: Tweets del hilo, en orden
+    """
+    if largo_tweet(texto) <= limite:
+        return [texto]
+    disponible = limite - len("\n99/99")
+    partes: List[str] = []
+    actual = ""
+    for linea in texto.splitlines(keepends=True):
+        while largo_tweet(linea) > disponible:
+            # Una línea más larga que un tweet: se corta en la última palabra que entra
+            corte = len(linea)
+            while largo_tweet(linea[:corte]) > disponible:
+                corte = linea.rfind(" ", 0, corte - 1) if " " in linea[:corte - 1] else corte - 1
+            if actual:
+                partes.append(actual)
+                actual = ""
+            partes.append(linea[:corte])
+            linea = linea[corte:].lstrip(" ")
+        if largo_tweet(actual + linea) > disponible:
+            partes.append(actual)
+            actual = ""
+        actual += linea
+    if actual.strip():
+        partes.append(actual)
+    partes = [parte.strip() for parte in partes if parte.strip()]
+    return [f"{parte}\n{numero}/{len(partes)}" for numero, parte in enumerate(partes, start=1)]
+
+
+def renderizar(resumen: ResumenMensual, formatos: Iterable[str] = FORMATOS, idioma: str = "es") -> Dict[str, Any]:
+    """
+    Renderiza un resumen en varios formatos a la vez (los campos comunes se
+    calculan una sola vez).
+
+    Args:
+        resumen (ResumenMensual): Datos del mes
+        formatos (Iterable[str]): Claves de FORMATOS
+        idioma (str): Idioma del nombre del mes
+
+    Returns:
+        Dict[str, Any]: Por formato, el texto (o la lista de tweets para 'hilo')
+    """
+    valores = resumen.valores(idioma)
+    salida: Dict[str, Any] = {}
+    for formato in formatos:
+        if formato == "json":
+            salida[formato] = json.dumps(resumen.to_dict(idioma), ensure_ascii=False)
+        elif formato == "hilo":
+            tweet = salida.get("tweet") or _texto(resumen, "tweet", valores)
+            salida[formato] = dividir_hilo(tweet)
+        elif formato in PLANTILLAS:
+            salida[formato] = _texto(resumen, formato, valores)
+        else:
+            raise ValueError(f"Formato de reporte desconocido: {formato} (disponibles: {', '.join(FORMATOS)})")
+    return salida
+
+
+@medir_etapa("reportes.renderizar")
+def renderizar_historial(resumenes: List[ResumenMensual], formatos: Iterable[str] = FORMATOS,
+                         idioma: str = "es") -> List[Dict[str, Any]]:
+    """Renderiza todos los meses en todos los formatos (ver renderizar)."""
+    formatos = list(formatos)
+    return [renderizar(resumen, formatos, idioma) for resumen in resumenes]
+
+
+def guardar_reportes(resumenes: List[ResumenMensual], reportes: List[Dict[str, Any]], directorio: str) -> int:
+    """
+    Escribe un archivo por mes y formato ('<hoja>_<AAAA-MM><extensión>'), de forma atómica.
+
+    Returns:
+        int: Archivos escritos
+    """
+    escritos = 0
+    for resumen, reporte in zip(resumenes, reportes):
+        base = os.path.join(directorio, f"{resumen.sheet}_{resumen.fecha.strftime('%Y-%m')}")
+        for formato, contenido in reporte.items():
+            if formato == "hilo":
+                contenido = "\n\n---\n\n".join(contenido)
+            escribir_atomico(base + FORMATOS[formato], contenido.encode("utf-8"))
+            escritos += 1
+    return escritos
+
+
+def main() -> None:
+    configurar_logging()
+    parser = argparse.ArgumentParser(description="Genera los reportes mensuales desde el cubo analítico")
+    parser.add_argument("--almacen", default="data/precios.sqlite", help="Base SQLite con el cubo analítico")
+    parser.add_argument("--sheet", default="Nacional", help="Hoja de origen")
+    parser.add_argument("--formato", nargs="+", choices=list(FORMATOS), default=list(FORMATOS),
+                        help="Formatos a generar")
+    parser.add_argument("--desde", default=None, help="Primer mes (AAAA-MM)")
+    parser.add_argument("--hasta", default=None, help="Último mes (AAAA-MM)")
+    parser.add_argument("--idioma", choices=list(MESES), default="es", help="Idioma de los nombres de los meses")
+    parser.add_argument("--salida", default=None,
+                        help="Carpeta donde escribir un archivo por mes y formato (sin ella se muestra el último mes)")
+    args = parser.parse_args()
+
+    from src.analitica import CuboAnalitico
+
+    inicio = time.perf_counter()
+    resumenes = [
+        resumen for resumen in resumenes_mensuales(CuboAnalitico(args.almacen), args.sheet)
+        if (args.desde is None or resumen.fecha >= pd.Timestamp(args.desde))
+        and (args.hasta is None or resumen.fecha <= pd.Timestamp(args.hasta))
+    ]
+    if not resumenes:
+        logging.error(f"No hay meses con variaciones para la hoja {args.sheet}")
+        raise SystemExit(1)
+
+    if args.salida is None:
+        for formato, contenido in renderizar(resumenes[-1], args.formato, args.idioma).items():
+            texto = "\n\n---\n\n".join(contenido) if formato == "hilo" else contenido
+            print(f"[{formato}]\n{texto}\n")
+        return
+    reportes = renderizar_historial(resumenes, args.formato, args.idioma)
+    escritos = guardar_reportes(resumenes, reportes, args.salida)
+    logging.info(f"{escritos} reportes de {len(resumenes)} meses escritos en {args.salida} "
+                 f"en {time.perf_counter() - inicio:.2f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,353 @@
+from concurrent.futures import Future, ThreadPoolExecutor
+from contextlib import closing
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Type
+import gzip
+import logging
+import os
+import queue
+import sqlite3
+import time
+
+import pandas as pd
+
+from src.cache import ruta_atomica
+from src.metricas import medir_etapa
+
+# Formatos de salida registrados, por nombre
+SALIDAS: Dict[str, Type["Salida"]] = {}
+
+
+def registrar_salida(formato: str) -> Callable[[Type["Salida"]], Type["Salida"]]:
+    """Decorador que registra una clase de salida con el nombre de formato dado."""
+    def registrar(clase: Type["Salida"]) -> Type["Salida"]:
+        clase.formato = formato
+        SALIDAS[formato] = clase
+        return clase
+    return registrar
+
+
+def _tipos_portables(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Copia del DataFrame para formatos sin tipos propios (JSON, SQLite): fechas
+    como texto YYYY-MM-DD, categorías como texto y float32 como float64 con su
+    representación decimal más corta (141.29 y no 141.2899932861).
+    """
+    df = df.copy()
+    for columna in df.columns:
+        tipo = df[columna].dtype
+        if pd.api.types.is_datetime64_any_dtype(tipo):
+            df[columna] = df[columna].dt.strftime("%Y-%m-%d")
+        elif isinstance(tipo, pd.CategoricalDtype):
+            df[columna] = df[columna].astype("object")
+        elif tipo == "float32":
+            df[columna] = pd.to_numeric(df[columna].astype(str), errors="coerce")
+    return df
+
+
+class Salida:
+    """
+    Destino de escritura del DataFrame procesado.
+
+    Cada formato implementa escribir(df, ruta) y, si puede escribir de a
+    partes, escribir_lotes(lotes, ruta); la escritura se hace sobre un
+    temporal del mismo directorio que se renombra al final (ver guardar y
+    guardar_lotes), por lo que un error nunca deja el archivo de destino a
+    medio escribir.
+    """
+
+    formato = ""
+    extension = ""
+
+    def __init__(self, ruta: str):
+        """
+        Args:
+            ruta (str): Archivo de destino
+        """
+        self.ruta = ruta
+
+    def escribir(self, df: pd.DataFrame, ruta: str) -> None:
+        raise NotImplementedError
+
+    def escribir_lotes(self, lotes: Iterator[pd.DataFrame], ruta: str) -> None:
+        """Escribe los lotes en orden. Por defecto los une y usa escribir (sin acotar la memoria)."""
+        self.escribir(pd.concat(list(lotes), ignore_index=True), ruta)
+
+    def guardar(self, df: pd.DataFrame) -> Dict:
+        """
+        Escribe el DataFrame de forma atómica.
+
+        Returns:
+            Dict: Ruta, segundos y bytes escritos
+        """
+        inicio = time.perf_counter()
+        with ruta_atomica(self.ruta) as temporal:
+            self.escribir(df, temporal)
+        return {
+            "ruta": self.ruta,
+            "segundos": time.perf_counter() - inicio,
+            "bytes": os.path.getsize(self.ruta),
+        }
+
+    def guardar_lotes(self, lotes: Iterable[pd.DataFrame]) -> Dict:
+        """
+        Escribe una secuencia de lotes de forma atómica: si la secuencia o la
+        escritura fallan, el archivo de destino queda como estaba.
+
+        Returns:
+            Dict: Ruta, segundos, bytes y filas escritas
+        """
+        inicio = time.perf_counter()
+        filas = 0
+
+        def contar() -> Iterator[pd.DataFrame]:
+            nonlocal filas
+            for lote in lotes:
+                filas += len(lote)
+                yield lote
+
+        with ruta_atomica(self.ruta) as temporal:
+            self.escribir_lotes(contar(), temporal)
+        return {
+            "ruta": self.ruta,
+            "segundos": time.perf_counter() - inicio,
+            "bytes": os.path.getsize(self.ruta),
+            "filas": filas,
+        }
+
+    def __repr__(self) -> str:
+        return f"{self.formato}:{self.ruta}"
+
+
+@registrar_salida("csv")
+class SalidaCSV(Salida):
+    extension = ".csv"
+
+    def escribir(self, df: pd.DataFrame, ruta: str) -> None:
+        df.to_csv(ruta, index=False, encoding="utf-8")
+
+    def escribir_lotes(self, lotes: Iterator[pd.DataFrame], ruta: str) -> None:
+        with open(ruta, "w", encoding="utf-8", newline="") as archivo:
+            for numero, lote in enumerate(lotes):
+                lote.to_csv(archivo, index=False, header=numero == 0)
+
+
+@registrar_salida("csv.gz")
+class SalidaCSVGzip(Salida):
+    extension = ".csv.gz"
+
+    def escribir(self, df: pd.DataFrame, ruta: str) -> None:
+        df.to_csv(ruta, index=False, encoding="utf-8", compression="gzip")
+
+    def escribir_lotes(self, lotes: Iterator[pd.DataFrame], ruta: str) -> None:
+        with gzip.open(ruta, "wt", encoding="utf-8", newline="") as archivo:
+            for numero, lote in enumerate(lotes):
+                lote.to_csv(archivo, index=False, header=numero == 0)
+
+
+@registrar_salida("parquet")
+class SalidaParquet(Salida):
+    extension = ".parquet"
+
+    def escribir(self, df: pd.DataFrame, ruta: str) -> None:
+        df.to_parquet(ruta, index=False)
+
+    def escribir_lotes(self, lotes: Iterator[pd.DataFrame], ruta: str) -> None:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        escritor = None
+        try:
+            for lote in lotes:
+                tabla = pa.Table.from_pandas(lote, preserve_index=False)
+                if escritor is None:
+                    escritor = pq.ParquetWriter(ruta, tabla.schema)
+                escritor.write_table(tabla.cast(escritor.schema))
+        finally:
+            if escritor is not None:
+                escritor.close()
+
+
+@registrar_salida("sqlite")
+class SalidaSQLite(Salida):
+    extension = ".sqlite"
+
+    def __init__(self, ruta: str, tabla: str = "precios"):
+        """
+        Args:
+            ruta (str): Archivo de la base SQLite
+            tabla (str): Tabla donde se escriben los datos (se reemplaza completa)
+        """
+        super().__init__(ruta)
+        self.tabla = tabla
+
+    def escribir(self, df: pd.DataFrame, ruta: str) -> None:
+        with closing(sqlite3.connect(ruta)) as con, con:
+            _tipos_portables(df).to_sql(self.tabla, con, index=False, if_exists="replace")
+
+    def escribir_lotes(self, lotes: Iterator[pd.DataFrame], ruta: str) -> None:
+        with closing(sqlite3.connect(ruta)) as con, con:
+            for numero, lote in enumerate(lotes):
+                _tipos_portables(lote).to_sql(self.tabla, con, index=False,
+                                              if_exists="replace" if numero == 0 else "append")
+
+
+@registrar_salida("jsonl")
+class SalidaJSONL(Salida):
+    extension = ".jsonl"
+
+    def escribir(self, df: pd.DataFrame, ruta: str) -> None:
+        _tipos_portables(df).to_json(ruta, orient="records", lines=True, force_ascii=False)
+
+    def escribir_lotes(self, lotes: Iterator[pd.DataFrame], ruta: str) -> None:
+        with open(ruta, "w", encoding="utf-8") as archivo:
+            for lote in lotes:
+                texto = _tipos_portables(lote).to_json(orient="records", lines=True, force_ascii=False)
+                archivo.write(texto if texto.endswith("\n") else texto + "\n")
+
+
+def crear_salida(especificacion: str, nombre_base: str = "data/precios_procesado") -> Salida:
+    """
+    Crea una salida a partir de una especificación de línea de comandos:
+    'formato:ruta', 'formato' (ruta por defecto con nombre_base) o una ruta
+    cuya extensión identifica el formato.
+
+    Args:
+        especificacion (str): Por ejemplo 'parquet:data/precios.parquet', 'jsonl' o 'data/precios.csv.gz'
+        nombre_base (str): Ruta sin extensión usada cuando solo se indica el formato
+
+    Returns:
+        Salida: Instancia del formato registrado
+
+    Raises:
+        ValueError: Si el formato no está registrado
+    """
+    formato, separador, ruta = especificacion.partition(":")
+    if separador and formato in SALIDAS:
+        return SALIDAS[formato](ruta)
+    if especificacion in SALIDAS:
+        clase = SALIDAS[especificacion]
+        return clase(nombre_base + clase.extension)
+    # Inferir el formato por la extensión (la más larga primero: .csv.gz antes que .gz)
+    for clase in sorted(SALIDAS.values(), key=lambda c: -len(c.extension)):
+        if especificacion.endswith(clase.extension):
+            return clase(especificacion)
+    raise ValueError(f"Formato de salida desconocido: {especificacion} (disponibles: {', '.join(SALIDAS)})")
+
+
+@medir_etapa("salidas.escribir")
+def escribir_salidas(df: pd.DataFrame, salidas: List[Salida], workers: Optional[int] = None) -> Dict[str, Dict]:
+    """
+    Escribe el mismo DataFrame en varias salidas a la vez con un pool de hilos.
+    Si una salida falla se registra el error y las demás se escriben igual.
+
+    Args:
+        df (pd.DataFrame): Datos a escribir (no se modifica)
+        salidas (List[Salida]): Destinos
+        workers (Optional[int]): Hilos del pool (por defecto, uno por salida)
+
+    Returns:
+        Dict[str, Dict]: Resultado de cada salida (ruta, segundos y bytes, o error)
+    """
+    resultados: Dict[str, Dict] = {}
+    if not salidas:
+        return resultados
+
+    def guardar(salida: Salida) -> Dict:
+        try:
+            return salida.guardar(df)
+        except Exception as e:
+            return {"ruta": salida.ruta, "error": str(e)}
+
+    inicio = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=workers or len(salidas)) as pool:
+        for salida, resultado in zip(salidas, pool.map(guardar, salidas)):
+            resultados[repr(salida)] = resultado
+            if "error" in resultado:
+                logging.error(f"Error al escribir la salida {salida!r}: {resultado['error']}")
+            else:
+                logging.info(
+                    f"Salida {salida!r}: {resultado['bytes'] / 1024:.1f} KiB en {resultado['segundos']:.2f}s"
+                )
+    logging.info(f"{len(salidas)} salidas procesadas en {time.perf_counter() - inicio:.2f}s")
+    return resultados
+
+
+def _poner(cola: queue.Queue, futuro: Future, elemento: Any) -> bool:
+    """Encola un elemento para una salida; devuelve False si la salida ya terminó (por un error)."""
+    while not futuro.done():
+        try:
+            cola.put(elemento, timeout=0.1)
+            return True
+        except queue.Full:
+            continue
+    return False
+
+
+@medir_etapa("salidas.escribir_lotes")
+def escribir_salidas_lotes(lotes: Iterable[pd.DataFrame], salidas: List[Salida],
+                           capacidad: int = 2) -> Dict[str, Dict]:
+    """
+    Escribe una secuencia de lotes en varias salidas a la vez, con un hilo por
+    salida y una cola acotada para cada una, así en memoria hay a lo sumo unos
+    pocos lotes. Si una salida falla se registra el error y las demás siguen;
+    si falla la secuencia de lotes, ninguna salida reemplaza su archivo.
+
+    Args:
+        lotes (Iterable[pd.DataFrame]): Lotes a escribir, en orden
+        salidas (List[Salida]): Destinos
+        capacidad (int): Lotes en espera por salida
+
+    Returns:
+        Dict[str, Dict]: Resultado de cada salida (ruta, segundos, bytes y filas, o error)
+
+    Raises:
+        Exception: El error de la secuencia de lotes, si lo hubo
+    """
+    resultados: Dict[str, Dict] = {}
+    if not salidas:
+        return resultados
+    colas = [queue.Queue(maxsize=capacidad) for _ in salidas]
+
+    def consumir(cola: queue.Queue) -> Iterator[pd.DataFrame]:
+        while True:
+            lote = cola.get()
+            if lote is None:
+                return
+            if isinstance(lote, BaseException):
+                raise RuntimeError(f"Lotes interrumpidos: {str(lote)}")
+            yield lote
+
+    def guardar(salida: Salida, cola: queue.Queue) -> Dict:
+        try:
+            return salida.guardar_lotes(consumir(cola))
+        except Exception as e:
+            return {"ruta": salida.ruta, "error": str(e)}
+
+    inicio = time.perf_counter()
+    error = None
+    with ThreadPoolExecutor(max_workers=len(salidas)) as pool:
+        futuros = [pool.submit(guardar, salida, cola) for salida, cola in zip(salidas, colas)]
+        try:
+            for lote in lotes:
+                activos = [_poner(cola, futuro, lote) for cola, futuro in zip(colas, futuros)]
+                if not any(activos):
+                    break
+        except Exception as e:
+            error = e
+        for cola, futuro in zip(colas, futuros):
+            _poner(cola, futuro, error)
+
+    for salida, futuro in zip(salidas, futuros):
+        resultado = futuro.result()
+        resultados[repr(salida)] = resultado
+        if "error" in resultado:
+            logging.error(f"Error al escribir la salida {salida!r}: {resultado['error']}")
+        else:
+            logging.info(
+                f"Salida {salida!r}: {resultado['filas']} filas, {resultado['bytes'] / 1024:.1f} KiB "
+                f"en {resultado['segundos']:.2f}s"
+            )
+    logging.info(f"{len(salidas)} salidas procesadas por lotes en {time.perf_counter() - inicio:.2f}s")
+    if error is not None:
+        raise error
+    return resultados
@@ -1,111 +1,694 @@
-from playwright.sync_api import sync_playwright, TimeoutError as PlaywrightTimeoutError
-from typing import Optional
+from contextlib import contextmanager
+from html.parser import HTMLParser
+from typing import TYPE_CHECKING, Callable, Dict, Iterator, List, Optional, Set, Tuple
+from urllib.parse import urljoin
 import logging
-import pandas as pd
-import requests
 import io
 import os
 import re
+import tempfile
+import time
+
+from src.cache import CacheDescargas, Descarga, Fuente, copiar_con_hash, sha256_archivo, sha256_bytes
+from src.metricas import medir_etapa
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+    from src.cache_hojas import CacheHojas
+    from src.cliente_http import ClienteHTTP, Progreso, RespuestaDescarga
+
+# Estrategias para descubrir el enlace del Excel y la fecha del próximo informe:
+# 'auto' prueba HTTP + parser HTML y recurre al navegador solo si falla.
+ESTRATEGIAS_DESCUBRIMIENTO = ("auto", "http", "navegador")
+
+CABECERAS_HTTP = {
+    'User-Agent': 'Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0 Safari/537.36'
+}
+
+# Fecha del próximo informe (ejemplo: "Próximo informe técnico: 13/2/25")
+PATRON_FECHA_INFORME = re.compile(r'Próximo informe técnico:\s*(\d{1,2})\/(\d{1,2})\/(\d{2,4})')
+
+# URLs de fragmentos que el JS de la página carga por XHR (jQuery .load/.get/.ajax o fetch)
+PATRON_FRAGMENTOS = re.compile(r'''(?:url\s*:|\.load\(|\.get\(|\.post\(|fetch\()\s*['"]([^'"]+)['"]''')
+MAX_FRAGMENTOS = 10
+
+
+class _ExtractorHTML(HTMLParser):
+    """Recolecta los enlaces (href y texto), el texto visible y los scripts de un HTML."""
+
+    def __init__(self, url: str):
+        super().__init__(convert_charrefs=True)
+        self.url = url
+        self.enlaces: List[Tuple[str, str]] = []
+        self.textos: List[str] = []
+        self.scripts: List[str] = []
+        self._href: Optional[str] = None
+        self._texto_enlace: List[str] = []
+        self._en_script = False
+
+    def handle_starttag(self, tag, attrs):
+        if tag == 'a':
+            self._href = dict(attrs).get('href')
+            self._texto_enlace = []
+        elif tag == 'script':
+            self._en_script = True
+
+    def handle_endtag(self, tag):
+        if tag == 'a' and self._href is not None:
+            self.enlaces.append((self._href, " ".join("".join(self._texto_enlace).split())))
+            self._href = None
+        elif tag == 'script':
+            self._en_script = False
+
+    def handle_data(self, data):
+        if self._en_script:
+            self.scripts.append(data)
+            return
+        self.textos.append(data)
+        if self._href is not None:
+            self._texto_enlace.append(data)
+
+    @property
+    def texto(self) -> str:
+        """Texto visible con los espacios normalizados."""
+        return " ".join(" ".join(self.textos).split())
+
+
+class SesionNavegador:
+    """
+    Sesión de Playwright reutilizable. Lanza Chromium recién en el primer uso,
+    renderiza cada URL una sola vez y la mantiene abierta para que todas las
+    extracciones trabajen sobre el mismo render.
+
+    Puede usarse como context manager para asegurar el cierre del navegador.
+    """
+    ARGS_CHROMIUM = ['--disable-gpu', '--no-sandbox', '--disable-dev-shm-usage']
+
+    def __init__(self, timeout: int = 30000):
+        """
+        Args:
+            timeout (int): Tiempo máximo de carga de cada página en milisegundos
+        """
+        self.timeout = timeout
+        self._playwright = None
+        self._browser = None
+        self._context = None
+        self._paginas: Dict[str, object] = {}
+        self._html: Dict[str, str] = {}
+        self._esperados: Dict[str, Set[str]] = {}
+
+    def __enter__(self) -> "SesionNavegador":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.cerrar()
+
+    @medir_etapa("navegador.iniciar")
+    def _iniciar(self) -> None:
+        """Lanza el navegador si todavía no está en ejecución."""
+        if self._context is not None:
+            return
+        # Playwright se importa recién al lanzar el navegador: los comandos que no lo
+        # usan (transformar un libro local, publicar) no pagan su importación
+        from playwright.sync_api import sync_playwright
+
+        logging.info("Iniciando navegador...")
+        self._playwright = sync_playwright().start()
+        try:
+            self._browser = self._playwright.chromium.launch(headless=True, args=self.ARGS_CHROMIUM)
+            self._context = self._browser.new_context(viewport={'width': 1280, 'height': 720})
+        except Exception:
+            self.cerrar()
+            raise
+
+    def pagina(self, url: str):
+        """
+        Devuelve la página renderizada de la URL, cargándola solo la primera vez.
+
+        Args:
+            url (str): URL a abrir
+
+        Returns:
+            Page: Página de Playwright ya cargada
+        """
+        if url not in self._paginas:
+            self._iniciar()
+            page = self._context.new_page()
+            logging.info(f"Abriendo la página {url}...")
+            page.goto(url, timeout=self.timeout)
+            self._paginas[url] = page
+        return self._paginas[url]
+
+    def html(self, url: str, esperar: Optional[str] = None, timeout: int = 10000) -> str:
+        """
+        Devuelve el DOM renderizado de la URL, cacheado tras la primera lectura.
+        Si se indica un selector que todavía no se esperó en esa página, se espera
+        a que aparezca y se vuelve a leer el DOM (el contenido que carga el JS
+        puede no estar en la lectura anterior).
+
+        Args:
+            url (str): URL a leer
+            esperar (Optional[str]): Selector que debe estar presente antes de leer
+            timeout (int): Tiempo máximo de espera del selector en milisegundos
+
+        Returns:
+            str: HTML renderizado de la página
+        """
+        page = self.pagina(url)
+        esperados = self._esperados.setdefault(url, set())
+        if esperar is not None and esperar not in esperados:
+            page.wait_for_selector(esperar, timeout=timeout)
+            esperados.add(esperar)
+            self._html.pop(url, None)
+        if url not in self._html:
+            self._html[url] = page.content()
+        return self._html[url]
+
+    def cerrar(self) -> None:
+        """Cierra las páginas, el contexto y el navegador si están abiertos."""
+        try:
+            if self._context is not None:
+                self._context.close()
+            if self._browser is not None:
+                self._browser.close()
+            if self._playwright is not None:
+                self._playwright.stop()
+        except Exception as e:
+            logging.warning(f"Error al cerrar el navegador: {str(e)}")
+        finally:
+            self._playwright = None
+            self._browser = None
+            self._context = None
+            self._paginas.clear()
+            self._html.clear()
+            self._esperados.clear()
 
-# Configurar logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(levelname)s - %(message)s'
-)
 
 class IndecScraper:
-    def __init__(self):
+    def __init__(
+        self,
+        sesion: Optional[SesionNavegador] = None,
+        estrategia_descubrimiento: str = "auto",
+        timeout_http: float = 15,
+        cache_descargas: Optional[CacheDescargas] = None,
+        cache_hojas: Optional["CacheHojas"] = None,
+        cliente_http: Optional["ClienteHTTP"] = None,
+        progreso_descarga: Optional["Progreso"] = None,
+    ):
+        """
+        Args:
+            sesion (Optional[SesionNavegador]): Sesión de navegador compartida. Si no se
+                indica y el scraper no se usa como context manager, cada método abre y
+                cierra su propio navegador (modo de una sola llamada).
+            estrategia_descubrimiento (str): 'auto' (HTTP con el navegador como respaldo),
+                'http' (solo HTTP) o 'navegador' (solo Playwright)
+            timeout_http (float): Tiempo máximo de conexión y de espera entre bloques de
+                cada petición HTTP, en segundos (si no se indica cliente_http)
+            cache_descargas (Optional[CacheDescargas]): Caché en disco para descargas
+                condicionales del Excel
+            cache_hojas (Optional[CacheHojas]): Memo de hojas ya parseadas, por hash del libro
+            cliente_http (Optional[ClienteHTTP]): Cliente HTTP compartido (con pool de conexiones
+                y reintentos); por defecto, uno propio con timeout_http
+            progreso_descarga (Optional[Progreso]): Callback de progreso de la descarga del Excel
+                (por defecto, se informa por log cada 25%, con un callback nuevo por descarga)
+        """
+        if estrategia_descubrimiento not in ESTRATEGIAS_DESCUBRIMIENTO:
+            raise ValueError(f"Estrategia de descubrimiento desconocida: {estrategia_descubrimiento}")
         self.url_indec = "https://www.indec.gob.ar/indec/web/Nivel4-Tema-3-5-31"
         self.base_url = "https://www.indec.gob.ar"  
         self.texto_buscado = "Índice de precios al consumidor. Precios promedio de un conjunto de elementos de la canasta del IPC, según regiones"
+        self.estrategia_descubrimiento = estrategia_descubrimiento
+        self.timeout_http = timeout_http
+        self._sesion = sesion
+        self._sesion_propia = False
+        self.cache_descargas = cache_descargas
+        self.cache_hojas = cache_hojas
+        self._cliente_http = cliente_http
+        self.progreso_descarga = progreso_descarga
+        self._documentos_http: Dict[str, _ExtractorHTML] = {}
+        # Descargas sin caché: quedan en un directorio temporal que se borra junto con el scraper
+        self._temporales: Optional[tempfile.TemporaryDirectory] = None
+
+    @property
+    def _http(self) -> "ClienteHTTP":
+        """Cliente HTTP, creado al primer uso: leer un libro local no importa requests."""
+        if self._cliente_http is None:
+            from src.cliente_http import ClienteHTTP
+            self._cliente_http = ClienteHTTP(timeout=self.timeout_http, cabeceras=CABECERAS_HTTP)
+        return self._cliente_http
+
+    def __enter__(self) -> "IndecScraper":
+        if self._sesion is None:
+            self._sesion = SesionNavegador()
+            self._sesion_propia = True
+        return self
+
+    def __exit__(self, *exc) -> None:
+        if self._sesion_propia:
+            self._sesion.cerrar()
+            self._sesion = None
+            self._sesion_propia = False
+
+    @contextmanager
+    def _usar_sesion(self) -> Iterator[SesionNavegador]:
+        """Entrega la sesión compartida o, si no hay, una temporal de una sola llamada."""
+        if self._sesion is not None:
+            yield self._sesion
+        else:
+            with SesionNavegador() as sesion:
+                yield sesion
     
+    def _descubrir(self, que: str, por_http: Callable[[], Optional[str]],
+                   por_navegador: Callable[[], Optional[str]]) -> Optional[str]:
+        """
+        Aplica la estrategia de descubrimiento y registra qué camino resolvió y cuánto tardó.
+
+        Args:
+            que (str): Descripción de lo que se busca, para los logs
+            por_http (Callable): Extracción por HTTP + parser HTML
+            por_navegador (Callable): Extracción con Playwright
+
+        Returns:
+            Optional[str]: Resultado del primer camino exitoso o None
+        """
+        tiempo_http = None
+        if self.estrategia_descubrimiento in ("auto", "http"):
+            inicio = time.perf_counter()
+            resultado = por_http()
+            tiempo_http = time.perf_counter() - inicio
+            if resultado is not None:
+                logging.info(f"{que}: resuelto por HTTP en {tiempo_http:.2f}s (sin navegador)")
+                return resultado
+            if self.estrategia_descubrimiento == "http":
+                logging.warning(f"{que}: no encontrado por HTTP ({tiempo_http:.2f}s)")
+                return None
+            logging.info(f"{que}: no encontrado por HTTP ({tiempo_http:.2f}s), usando el navegador")
+
+        inicio = time.perf_counter()
+        resultado = por_navegador()
+        tiempo_navegador = time.perf_counter() - inicio
+        logging.info(
+            f"{que}: navegador en {tiempo_navegador:.2f}s"
+            + (f" (+{tiempo_http:.2f}s del intento HTTP)" if tiempo_http is not None else "")
+        )
+        return resultado
+
+    def _documento_http(self, url: str) -> _ExtractorHTML:
+        """Descarga y parsea una URL una sola vez por scraper."""
+        if url not in self._documentos_http:
+            response = self._http.get(url)
+            response.raise_for_status()
+            # Sin charset explícito requests asume ISO-8859-1; detectar la codificación real
+            if 'charset' not in response.headers.get('Content-Type', '').lower():
+                response.encoding = response.apparent_encoding
+            documento = _ExtractorHTML(url)
+            documento.feed(response.text)
+            documento.close()
+            self._documentos_http[url] = documento
+        return self._documentos_http[url]
+
+    def _urls_fragmentos(self, documento: _ExtractorHTML) -> List[str]:
+        """Encuentra, en los scripts de la página, las URLs que se cargan por XHR."""
+        urls = []
+        for candidata in PATRON_FRAGMENTOS.findall("\n".join(documento.scripts)):
+            url = urljoin(documento.url, candidata)
+            if url.startswith(self.base_url) and not url.endswith(('.js', '.css')) and url not in urls:
+                urls.append(url)
+        return urls[:MAX_FRAGMENTOS]
+
+    def _documentos_estaticos(self) -> Iterator[_ExtractorHTML]:
+        """Recorre la página estática y, si hace falta, los fragmentos que carga su JS."""
+        import requests
+
+        principal = self._documento_http(self.url_indec)
+        yield principal
+        for url in self._urls_fragmentos(principal):
+            try:
+                yield self._documento_http(url)
+            except requests.RequestException as e:
+                logging.warning(f"No se pudo obtener el fragmento {url}: {str(e)}")
+
+    def _buscar_http(self, extraer: Callable[[_ExtractorHTML], Optional[str]]) -> Optional[str]:
+        """Aplica la extracción sobre los documentos estáticos hasta encontrar un resultado."""
+        import requests
+
+        try:
+            for documento in self._documentos_estaticos():
+                resultado = extraer(documento)
+                if resultado is not None:
+                    return resultado
+        except requests.RequestException as e:
+            logging.warning(f"Error al descargar la página del INDEC por HTTP: {str(e)}")
+        return None
+
+    def _extraer_url_excel(self, documento: _ExtractorHTML) -> Optional[str]:
+        """Busca en un documento el enlace cuyo texto contiene texto_buscado."""
+        for href, texto in documento.enlaces:
+            if href and self.texto_buscado in texto:
+                return urljoin(documento.url, href)
+        return None
+
+    def _extraer_fecha_informe(self, documento: _ExtractorHTML) -> Optional[str]:
+        """Busca en un documento la fecha del próximo informe."""
+        return self._formatear_fecha(documento.texto)
+
+    @staticmethod
+    def _formatear_fecha(texto: Optional[str]) -> Optional[str]:
+        """
+        Extrae la fecha del próximo informe de un texto.
+
+        Args:
+            texto (Optional[str]): Texto que contiene "Próximo informe técnico: D/M/AA"
+
+        Returns:
+            Optional[str]: Fecha en formato YYYY-MM-DD o None si no se encuentra
+        """
+        fecha_match = PATRON_FECHA_INFORME.search(texto or "")
+        if not fecha_match:
+            return None
+        dia, mes, anio = fecha_match.groups()
+        # Convertir año de dos dígitos a cuatro dígitos
+        if len(anio) == 2:
+            anio = '20' + anio
+        # Formatear fecha en YYYY-MM-DD
+        return f"{anio}-{int(mes):02d}-{int(dia):02d}"
+
+    @medir_etapa("scraper.obtener_url_excel")
     def obtener_url_excel(self) -> Optional[str]:
         """
         Obtiene la URL del archivo Excel del INDEC.
         
+        Returns:
+            Optional[str]: URL del archivo Excel o None si no se encuentra
+        """
+        return self._descubrir(
+            "Enlace al archivo Excel",
+            lambda: self._buscar_http(self._extraer_url_excel),
+            self._url_excel_navegador,
+        )
+
+    def _url_excel_navegador(self) -> Optional[str]:
+        """
+        Obtiene la URL del archivo Excel renderizando la página con Playwright.
+        
         Returns:
             Optional[str]: URL del archivo Excel o None si no se encuentra
         """
         try:
-            with sync_playwright() as p:
-                browser = p.chromium.launch(
-                    headless=True,
-                    args=['--disable-gpu', '--no-sandbox', '--disable-dev-shm-usage']
-                )
-                
-                context = browser.new_context(viewport={'width': 1280, 'height': 720})
-                page = context.new_page()
-                
-                logging.info("Abriendo la página del INDEC...")
-                page.goto(self.url_indec, timeout=30000)
-                
+            # Dentro del try: sin Playwright instalado se registra el error y se devuelve None
+            from playwright.sync_api import TimeoutError as PlaywrightTimeoutError
+
+            with self._usar_sesion() as sesion:
                 logging.info("Esperando a que el contenedor cargue...")
                 selector = "div.contSH.hide[id='1']"
                 try:
-                    page.wait_for_selector(selector, timeout=10000)
+                    documento = self._documento_navegador(sesion, selector)
                 except PlaywrightTimeoutError:
                     logging.error(f"Tiempo de espera agotado esperando el selector: {selector}")
                     return None
-                
+
                 logging.info("Buscando el enlace del archivo Excel...")
-                enlace_excel = page.locator(f"xpath=//a[contains(text(), '{self.texto_buscado}')]")
-                
-                try:
-                    url_relativa = enlace_excel.get_attribute("href")
-                    if url_relativa:
-                        url_completa = f"{self.base_url}{url_relativa}"
-                        logging.info(f"Enlace al archivo Excel encontrado: {url_completa}")
-                        return url_completa
-                    else:
-                        logging.warning("No se encontró el enlace al archivo Excel.")
-                        return None
-                except Exception as e:
-                    logging.error(f"Error al obtener el atributo href: {str(e)}")
-                    return None
-                finally:
-                    context.close()
-                    browser.close()
+                url_completa = self._extraer_url_excel(documento)
+                if url_completa:
+                    logging.info(f"Enlace al archivo Excel encontrado: {url_completa}")
+                else:
+                    logging.warning("No se encontró el enlace al archivo Excel.")
+                return url_completa
         except Exception as e:
             logging.error(f"Error durante la ejecución: {str(e)}")
             return None
 
-    def obtener_datos_nacional(self, url: str) -> Optional[pd.DataFrame]:
+    def _documento_navegador(self, sesion: SesionNavegador, esperar: str) -> _ExtractorHTML:
         """
-        Descarga y lee el archivo Excel, extrayendo los datos de la hoja Nacional.
-        
+        Parsea el DOM renderizado (cacheado por la sesión) con el mismo extractor
+        que la página estática, así ambos caminos buscan enlaces y fechas igual.
+        """
+        documento = _ExtractorHTML(self.url_indec)
+        documento.feed(sesion.html(self.url_indec, esperar))
+        documento.close()
+        return documento
+
+    @medir_etapa("scraper.descargar_excel")
+    def descargar_excel(self, url: str) -> Optional[Descarga]:
+        """
+        Descarga el archivo Excel. Con caché configurada envía una petición
+        condicional (ETag / Last-Modified) y reutiliza el cuerpo guardado si el
+        servidor responde 304; la descarga indica si su contenido ya fue procesado.
+
         Args:
             url (str): URL del archivo Excel
-            
+
         Returns:
-            Optional[pd.DataFrame]: DataFrame con los datos de la hoja Nacional o None si hay error
+            Optional[Descarga]: Contenido descargado o None si hay error
         """
+        from src.cliente_http import progreso_en_log
+
         try:
-            logging.info("Descargando archivo Excel...")
-            response = requests.get(url)
-            
-            if response.status_code == 200:
-                excel_data = pd.read_excel(
-                    io.BytesIO(response.content), 
-                    sheet_name=None,
-                    engine='xlrd'
-                )
-                
-                hojas = list(excel_data.keys())
-                logging.info(f"Hojas encontradas: {hojas}")
-                
-                if 'Nacional' in excel_data:
-                    return excel_data['Nacional']
-                else:
-                    logging.warning("No se encontró la hoja Nacional en el archivo Excel")
+            cabeceras = self.cache_descargas.cabeceras_condicionales(url) if self.cache_descargas else {}
+            logging.info("Descargando archivo Excel..." if not cabeceras else "Verificando cambios en el archivo Excel...")
+            progreso = self.progreso_descarga or progreso_en_log("Descarga del Excel")
+            response = self._http.descargar(url, cabeceras, progreso=progreso)
+
+            if response.estado == 304 and self.cache_descargas:
+                response.cerrar()
+                descarga = self.cache_descargas.leer(url)
+                if descarga is not None:
+                    logging.info("El archivo Excel no cambió desde la última descarga (304)")
+                    return descarga
+                # Caché inválida: repetir sin cabeceras condicionales
+                response = self._http.descargar(url, progreso=progreso)
+
+            with response:
+                if response.estado != 200:
+                    logging.error(f"Error al descargar el archivo: {response.estado}")
                     return None
-            else:
-                logging.error(f"Error al descargar el archivo: {response.status_code}")
-                return None
+                descarga = self._guardar_descarga(url, response)
+            logging.info(f"Archivo Excel descargado ({descarga.tamano} bytes, sha256 {descarga.sha256[:12]})")
+            return descarga
+        except Exception as e:
+            logging.error(f"Error al descargar el archivo Excel: {str(e)}")
+            return None
+
+    def _guardar_descarga(self, url: str, response: "RespuestaDescarga") -> Descarga:
+        """
+        Copia por bloques el cuerpo descargado a la caché de descargas o, si no
+        hay, al directorio temporal del scraper: el libro se lee después desde
+        disco sin tenerlo entero en memoria.
+        """
+        if self.cache_descargas:
+            return self.cache_descargas.guardar(
+                url,
+                response.archivo,
+                etag=response.cabeceras.get("ETag"),
+                last_modified=response.cabeceras.get("Last-Modified"),
+            )
+        if self._temporales is None:
+            self._temporales = tempfile.TemporaryDirectory(prefix="indec-")
+        ruta = os.path.join(self._temporales.name, f"{sha256_bytes(url.encode('utf-8'))[:32]}.bin")
+        return Descarga(url=url, contenido=None, sha256=copiar_con_hash(response.archivo, ruta), ruta=ruta)
+
+    def sondear_excel(self, url: str) -> Optional[bool]:
+        """
+        Averigua con una petición HEAD condicional, sin descargar el cuerpo, si
+        el archivo Excel cambió respecto del guardado en la caché de descargas.
+
+        Args:
+            url (str): URL del archivo Excel
+
+        Returns:
+            Optional[bool]: True si cambió (o no está en caché), False si no cambió y
+                None si el servidor no permite saberlo (sin HEAD, ETag ni Last-Modified)
+        """
+        import requests
+
+        entrada = self.cache_descargas.entrada(url) if self.cache_descargas else None
+        if entrada is None:
+            return True
+        try:
+            response = self._http.head(
+                url, headers=self.cache_descargas.cabeceras_condicionales(url), allow_redirects=True,
+            )
+        except requests.RequestException as e:
+            logging.warning(f"Error al sondear el archivo Excel: {str(e)}")
+            return None
+        if response.status_code == 304:
+            return False
+        if response.status_code != 200:
+            logging.info(f"El servidor no respondió al HEAD ({response.status_code})")
+            return None
+
+        etag, last_modified = response.headers.get("ETag"), response.headers.get("Last-Modified")
+        if etag and entrada.get("etag"):
+            return etag != entrada["etag"]
+        if last_modified and entrada.get("last_modified"):
+            return last_modified != entrada["last_modified"]
+        return None
+
+    def marcar_procesado(self, descarga: Descarga) -> None:
+        """
+        Registra en la caché que el contenido de la descarga fue procesado con éxito.
+
+        Args:
+            descarga (Descarga): Descarga procesada
+        """
+        if self.cache_descargas:
+            self.cache_descargas.marcar_procesado(descarga.url, descarga.sha256)
+
+    def _abrir_libro(self, fuente: Fuente) -> "pd.ExcelFile":
+        """
+        Abre el libro sin parsear sus hojas: con xlrd en modo on_demand para XLS y
+        con openpyxl (solo lectura) para XLSX.
+
+        Args:
+            fuente (Fuente): Ruta o contenido del archivo Excel
+
+        Returns:
+            pd.ExcelFile: Libro abierto
+        """
+        # pandas se importa recién al leer un libro: descubrir y sondear no lo necesitan
+        import pandas as pd
+
+        if isinstance(fuente, bytes):
+            if fuente[:2] == b'PK':
+                return pd.ExcelFile(io.BytesIO(fuente), engine='openpyxl')
+            import xlrd
+            return pd.ExcelFile(xlrd.open_workbook(file_contents=fuente, on_demand=True), engine='xlrd')
+
+        with open(fuente, "rb") as archivo:
+            if archivo.read(2) == b'PK':
+                return pd.ExcelFile(fuente, engine='openpyxl')
+        import xlrd
+        return pd.ExcelFile(xlrd.open_workbook(fuente, on_demand=True), engine='xlrd')
+
+    @medir_etapa("scraper.leer_hojas")
+    def leer_hojas(self, fuente: Fuente, hojas: Optional[List[str]] = None,
+                   sha256: Optional[str] = None) -> Dict[str, "pd.DataFrame"]:
+        """
+        Lee solo las hojas pedidas de un archivo Excel ya descargado. Las hojas se
+        buscan primero en la caché de hojas (por hash del libro) y solo se parsean
+        las que faltan.
+
+        Args:
+            fuente (Fuente): Ruta o contenido del archivo Excel
+            hojas (Optional[List[str]]): Nombres de las hojas a leer (todas si es None)
+            sha256 (Optional[str]): Hash del contenido, si ya se conoce
+
+        Returns:
+            Dict[str, pd.DataFrame]: Hojas encontradas, por nombre
+        """
+        resultado = {}
+        libro = None
+        try:
+            if hojas is None:
+                libro = self._abrir_libro(fuente)
+                hojas = libro.sheet_names
+
+            if self.cache_hojas:
+                sha256 = sha256 or (sha256_bytes(fuente) if isinstance(fuente, bytes) else sha256_archivo(fuente))
+                for hoja in hojas:
+                    df = self.cache_hojas.obtener(sha256, hoja)
+                    if df is not None:
+                        logging.info(f"Hoja {hoja} leída de la caché")
+                        resultado[hoja] = df
+
+            pendientes = [hoja for hoja in hojas if hoja not in resultado]
+            if not pendientes:
+                return resultado
+
+            libro = libro or self._abrir_libro(fuente)
+            logging.info(f"Hojas encontradas: {libro.sheet_names}")
+            for hoja in pendientes:
+                if hoja not in libro.sheet_names:
+                    logging.warning(f"No se encontró la hoja {hoja} en el archivo Excel")
+                    continue
+                resultado[hoja] = libro.parse(hoja)
+                if self.cache_hojas:
+                    self.cache_hojas.guardar(sha256, hoja, resultado[hoja])
+            return resultado
+        finally:
+            if libro is not None:
+                libro.close()
+
+    def leer_hojas_compatibles(self, fuente: Fuente, hojas: Optional[List[str]] = None,
+                               sha256: Optional[str] = None) -> Dict[str, "pd.DataFrame"]:
+        """
+        Lee las hojas pedidas (o todas) y conserva solo las que TransformadorDatos
+        sabe procesar.
+
+        Args:
+            fuente (Fuente): Ruta o contenido del archivo Excel
+            hojas (Optional[List[str]]): Nombres de las hojas a leer (todas si es None)
+            sha256 (Optional[str]): Hash del contenido, si ya se conoce
+
+        Returns:
+            Dict[str, pd.DataFrame]: Hojas compatibles, por nombre
+        """
+        from src.transformaciones import TransformadorDatos
+
+        try:
+            compatibles = {}
+            for hoja, df in self.leer_hojas(fuente, hojas, sha256).items():
+                if TransformadorDatos.es_hoja_compatible(df):
+                    compatibles[hoja] = df
+                else:
+                    logging.info(f"Hoja {hoja} omitida: no tiene el formato de precios por región")
+            logging.info(f"Hojas a procesar: {list(compatibles)}")
+            return compatibles
         except Exception as e:
             logging.error(f"Error al procesar el archivo Excel: {str(e)}")
+            return {}
+
+    def leer_hoja_nacional(self, fuente: Fuente, sha256: Optional[str] = None) -> Optional["pd.DataFrame"]:
+        """
+        Lee la hoja Nacional de un archivo Excel ya descargado.
+
+        Args:
+            fuente (Fuente): Ruta o contenido del archivo Excel
+            sha256 (Optional[str]): Hash del contenido, si ya se conoce
+
+        Returns:
+            Optional[pd.DataFrame]: DataFrame con los datos de la hoja Nacional o None si hay error
+        """
+        try:
+            return self.leer_hojas(fuente, ['Nacional'], sha256).get('Nacional')
+        except Exception as e:
+            logging.error(f"Error al procesar el archivo Excel: {str(e)}")
+            return None
+
+    @medir_etapa("scraper.obtener_datos_nacional")
+    def obtener_datos_nacional(self, url: str) -> Optional["pd.DataFrame"]:
+        """
+        Descarga y lee el archivo Excel, extrayendo los datos de la hoja Nacional.
+        
+        Args:
+            url (str): URL del archivo Excel
+            
+        Returns:
+            Optional[pd.DataFrame]: DataFrame con los datos de la hoja Nacional o None si hay error
+        """
+        descarga = self.descargar_excel(url)
+        if descarga is None:
             return None
+        return self.leer_hoja_nacional(descarga.fuente, descarga.sha256)
 
-    def guardar_csv(self, df: pd.DataFrame, nombre_archivo: str) -> None:
+    def obtener_datos(self, url: str, hojas: Optional[List[str]] = None) -> Dict[str, "pd.DataFrame"]:
+        """
+        Descarga el archivo Excel y devuelve todas sus hojas compatibles, o las pedidas.
+
+        Args:
+            url (str): URL del archivo Excel
+            hojas (Optional[List[str]]): Nombres de las hojas a leer (todas si es None)
+
+        Returns:
+            Dict[str, pd.DataFrame]: Hojas compatibles, por nombre (vacío si hay error)
+        """
+        descarga = self.descargar_excel(url)
+        if descarga is None:
+            return {}
+        return self.leer_hojas_compatibles(descarga.fuente, hojas, descarga.sha256)
+
+    def guardar_csv(self, df: "pd.DataFrame", nombre_archivo: str) -> None:
         """
         Guarda un DataFrame en un archivo CSV.
         
@@ -113,63 +696,50 @@ class IndecScraper:
             df (pd.DataFrame): DataFrame a guardar
             nombre_archivo (str): Ruta completa del archivo CSV de salida
         """
+        from src.salidas import SalidaCSV
+
         try:
-            # Asegurar que el directorio existe
-            os.makedirs(os.path.dirname(nombre_archivo), exist_ok=True)
-            
-            df.to_csv(nombre_archivo, index=False, encoding='utf-8')
+            SalidaCSV(nombre_archivo).guardar(df)
             logging.info(f"Datos guardados en {nombre_archivo}")
         except Exception as e:
             logging.error(f"Error al guardar CSV: {str(e)}")
 
+    @medir_etapa("scraper.obtener_fecha_proximo_informe")
     def obtener_fecha_proximo_informe(self) -> Optional[str]:
         """
         Obtiene la fecha del próximo informe técnico del INDEC.
         
+        Returns:
+            Optional[str]: Fecha en formato YYYY-MM-DD o None si no se encuentra
+        """
+        fecha = self._descubrir(
+            "Fecha del próximo informe",
+            lambda: self._buscar_http(self._extraer_fecha_informe),
+            self._fecha_informe_navegador,
+        )
+        if fecha:
+            logging.info(f"Próximo informe programado para: {fecha}")
+        return fecha
+
+    def _fecha_informe_navegador(self) -> Optional[str]:
+        """
+        Obtiene la fecha del próximo informe renderizando la página con Playwright.
+        
         Returns:
             Optional[str]: Fecha en formato YYYY-MM-DD o None si no se encuentra
         """
         try:
-            with sync_playwright() as p:
-                browser = p.chromium.launch(
-                    headless=True,
-                    args=['--disable-gpu', '--no-sandbox', '--disable-dev-shm-usage']
-                )
-                
-                context = browser.new_context(viewport={'width': 1280, 'height': 720})
-                page = context.new_page()
-                
+            with self._usar_sesion() as sesion:
                 logging.info("Buscando fecha del próximo informe...")
-                page.goto(self.url_indec, timeout=30000)
-                
-                # Buscar el texto que contiene la fecha del próximo informe
-                proximo_informe = page.locator("text=/Próximo informe técnico: \d{1,2}\/\d{1,2}\/\d{2,4}/")
-                
-                try:
-                    texto = proximo_informe.text_content()
-                    # Extraer la fecha del texto (ejemplo: "Próximo informe técnico: 13/2/25")
-                    fecha_match = re.search(r'(\d{1,2})\/(\d{1,2})\/(\d{2,4})', texto)
-                    
-                    if fecha_match:
-                        dia, mes, anio = fecha_match.groups()
-                        # Convertir año de dos dígitos a cuatro dígitos
-                        if len(anio) == 2:
-                            anio = '20' + anio
-                        # Formatear fecha en YYYY-MM-DD
-                        fecha = f"{anio}-{int(mes):02d}-{int(dia):02d}"
-                        logging.info(f"Próximo informe programado para: {fecha}")
-                        return fecha
-                    else:
-                        logging.warning("No se encontró la fecha del próximo informe")
-                        return None
-                    
-                except Exception as e:
-                    logging.error(f"Error al extraer la fecha: {str(e)}")
-                    return None
-                finally:
-                    context.close()
-                    browser.close()
-                
+                # Esperar al texto con la fecha, que carga el JS de la página
+                documento = self._documento_navegador(
+                    sesion, r"text=/Próximo informe técnico: \d{1,2}\/\d{1,2}\/\d{2,4}/"
+                )
+                fecha = self._extraer_fecha_informe(documento)
+                if not fecha:
+                    logging.warning("No se encontró la fecha del próximo informe")
+                return fecha
+
         except Exception as e:
             logging.error(f"Error al buscar fecha del próximo informe: {str(e)}")
             return None
@@ -0,0 +1,366 @@
+from contextlib import closing
+from itertools import islice
+from typing import Dict, Iterator, List, Optional, Tuple
+import argparse
+import io
+import logging
+import time
+
+import numpy as np
+import pandas as pd
+
+from src.cache import Fuente
+from src.metricas import configurar_logging, medir_etapa
+from src.salidas import SALIDAS, crear_salida, escribir_salidas_lotes
+from src.transformaciones import (
+    ESTRATEGIAS_RELLENO, PRODUCTOS_VALIDOS, REGIONES_VALIDAS, DisposicionHoja, TransformadorDatos,
+    compactar, detectar_disposicion, fechas_disposicion,
+)
+
+# Textos que pd.read_excel lee como nulos (sus na_values por defecto)
+VALORES_NULOS = frozenset([
+    "", "#N/A", "#N/A N/A", "#NA", "-1.#IND", "-1.#QNAN", "-NaN", "-nan", "1.#IND", "1.#QNAN",
+    "<NA>", "N/A", "NA", "NULL", "NaN", "None", "n/a", "nan", "null",
+])
+
+def _es_xlsx(fuente: Fuente) -> bool:
+    if isinstance(fuente, bytes):
+        return fuente[:2] == b"PK"
+    with open(fuente, "rb") as archivo:
+        return archivo.read(2) == b"PK"
+
+
+def _abrir_xlsx(fuente: Fuente):
+    import openpyxl
+    archivo = io.BytesIO(fuente) if isinstance(fuente, bytes) else fuente
+    return openpyxl.load_workbook(archivo, read_only=True, data_only=True, keep_links=False)
+
+
+def _abrir_xls(fuente: Fuente):
+    import xlrd
+    if isinstance(fuente, bytes):
+        return xlrd.open_workbook(file_contents=fuente, on_demand=True)
+    return xlrd.open_workbook(fuente, on_demand=True)
+
+
+def _valor(valor):
+    """Normaliza una celda como pd.read_excel: números enteros como int y textos nulos como NaN."""
+    if valor is None:
+        return np.nan
+    if isinstance(valor, float) and valor.is_integer():
+        return int(valor)
+    if isinstance(valor, str) and valor in VALORES_NULOS:
+        return np.nan
+    return valor
+
+
+def _filas_xlsx(fuente: Fuente, hoja: str) -> Iterator[List]:
+    from openpyxl.cell.cell import TYPE_ERROR
+
+    libro = _abrir_xlsx(fuente)
+    try:
+        hoja_libro = libro[hoja]
+        hoja_libro.reset_dimensions()
+        for fila in hoja_libro.rows:
+            yield [np.nan if celda.data_type == TYPE_ERROR else _valor(celda.value) for celda in fila]
+    finally:
+        libro.close()
+
+
+def _filas_xls(fuente: Fuente, hoja: str) -> Iterator[List]:
+    from xlrd import XL_CELL_BOOLEAN, XL_CELL_DATE, XL_CELL_ERROR, xldate
+
+    libro = _abrir_xls(fuente)
+    try:
+        hoja_libro = libro.sheet_by_name(hoja)
+        for numero in range(hoja_libro.nrows):
+            fila = []
+            for valor, tipo in zip(hoja_libro.row_values(numero), hoja_libro.row_types(numero)):
+                if tipo == XL_CELL_DATE:
+                    valor = xldate.xldate_as_datetime(valor, libro.datemode)
+                elif tipo == XL_CELL_ERROR:
+                    valor = np.nan
+                elif tipo == XL_CELL_BOOLEAN:
+                    valor = bool(valor)
+                fila.append(_valor(valor))
+            yield fila
+    finally:
+        libro.release_resources()
+
+
+def nombres_hojas(fuente: Fuente) -> List[str]:
+    """Nombres de las hojas del libro, sin leer su contenido."""
+    if _es_xlsx(fuente):
+        libro = _abrir_xlsx(fuente)
+        try:
+            return list(libro.sheetnames)
+        finally:
+            libro.close()
+    libro = _abrir_xls(fuente)
+    try:
+        return libro.sheet_names()
+    finally:
+        libro.release_resources()
+
+
+def iterar_filas(fuente: Fuente, hoja: str) -> Iterator[List]:
+    """
+    Recorre las filas de una hoja de a una, con los mismos valores que tendría
+    el DataFrame de pd.read_excel. La primera fila se omite, porque read_excel
+    la usa como encabezado de columnas.
+
+    Con XLSX se usa openpyxl en modo solo lectura, que no carga la hoja
+    completa; con XLS, xlrd en modo on_demand carga solo la hoja pedida.
+
+    Args:
+        fuente (Fuente): Ruta o contenido del libro
+        hoja (str): Nombre de la hoja
+
+    Returns:
+        Iterator[List]: Valores de cada fila (de largo variable)
+    """
+    filas = _filas_xlsx(fuente, hoja) if _es_xlsx(fuente) else _filas_xls(fuente, hoja)
+    with closing(filas):
+        next(filas, None)
+        yield from filas
+
+
+class TransformadorStreaming(TransformadorDatos):
+    """
+    Transformación por lotes de una hoja, para libros muy grandes.
+
+    Lee la hoja fila por fila, detecta la disposición en las primeras filas y
+    entrega los datos en formato largo, validados y compactados, en lotes de
+    alrededor de tamano_lote filas. Cada lote contiene filas completas de la
+    hoja (series enteras), así el relleno de precios faltantes da lo mismo que
+    sobre la hoja completa.
+
+    La hoja se recorre dos veces: la primera (inspeccionar) junta las series
+    para numerar los product_id, las unidades y el precio máximo, de modo que
+    todos los lotes tienen los mismos tipos y códigos que el resultado de
+    TransformadorDatos. La memoria queda acotada por el tamaño del lote y no
+    por el del libro. Los lotes salen ordenados por fecha dentro de cada lote;
+    el conjunto de filas es el mismo que el de TransformadorDatos.
+    """
+
+    def __init__(self, fuente: Fuente, hoja: str, estrategia_relleno: str = "adjacent_mean",
+                 tamano_lote: int = 50000, filas_cabecera: int = 60):
+        """
+        Args:
+            fuente (Fuente): Ruta o contenido del libro
+            hoja (str): Nombre de la hoja
+            estrategia_relleno (str): Estrategia para rellenar precios faltantes
+            tamano_lote (int): Filas aproximadas de cada lote (en formato largo)
+            filas_cabecera (int): Filas iniciales donde buscar la disposición de la hoja
+        """
+        super().__init__(pd.DataFrame(), estrategia_relleno)
+        self.fuente = fuente
+        self.hoja = hoja
+        self.tamano_lote = tamano_lote
+        self.filas_cabecera = filas_cabecera
+        self.columnas: List = []
+        self.fechas: List[str] = []
+        self.series: Dict[Tuple, int] = {}
+        self.unidades: List = []
+        self.precio_maximo = 0.0
+
+    def _cabecera(self, filas: int) -> pd.DataFrame:
+        with closing(iterar_filas(self.fuente, self.hoja)) as filas_hoja:
+            return pd.DataFrame(list(islice(filas_hoja, filas)), dtype=object)
+
+    def es_compatible(self, filas: int = 30) -> bool:
+        """Indica si la hoja tiene los encabezados esperados en sus primeras filas."""
+        return TransformadorDatos.es_hoja_compatible(self._cabecera(filas), filas)
+
+    def detectar(self) -> DisposicionHoja:
+        """
+        Detecta la disposición de la hoja en sus primeras filas y calcula las
+        fechas de las columnas de datos.
+
+        Returns:
+            DisposicionHoja: Disposición detectada (la última fila válida es la de la cabecera)
+
+        Raises:
+            ValueError: Si la cabecera no alcanza para detectar la disposición
+        """
+        cabecera = self._cabecera(self.filas_cabecera)
+        self.disposicion = detectar_disposicion(cabecera)
+        columnas_meses = self.disposicion.columnas_meses
+        if not columnas_meses:
+            raise ValueError("No se encontró un mes válido")
+        self.columnas = list(cabecera.loc[self.disposicion.fila_encabezados].iloc[:3])
+        self.fechas = list(
+            fechas_disposicion(self.disposicion, cabecera.loc[self.disposicion.fila_meses].iloc[columnas_meses])
+            .strftime("%Y-%m-%d")
+        )
+        logging.info(
+            f"Hoja {self.hoja}: encabezados en la fila {self.disposicion.fila_encabezados}, "
+            f"{len(self.fechas)} meses desde {self.fechas[0]}"
+        )
+        return self.disposicion
+
+    def _lotes_anchos(self) -> Iterator[pd.DataFrame]:
+        """Filas de datos con región y producto válidos, en lotes con el formato de la hoja."""
+        if self.disposicion is None:
+            self.detectar()
+        posiciones = [0, 1, 2] + self.disposicion.columnas_meses
+        ancho = max(posiciones) + 1
+        columna_region = self.columnas.index("Región")
+        columna_producto = self.columnas.index("Productos seleccionados")
+        filas_por_lote = max(1, self.tamano_lote // len(self.fechas))
+
+        lote: List[List] = []
+        with closing(iterar_filas(self.fuente, self.hoja)) as filas:
+            for fila in islice(filas, self.disposicion.fila_meses + 1, None):
+                fila = fila + [np.nan] * (ancho - len(fila))
+                valores = [fila[posicion] for posicion in posiciones]
+                if valores[columna_region] in REGIONES_VALIDAS and valores[columna_producto] in PRODUCTOS_VALIDOS:
+                    lote.append(valores)
+                if len(lote) >= filas_por_lote:
+                    yield pd.DataFrame(lote, columns=self.columnas + self.fechas, dtype=object)
+                    lote = []
+        if lote:
+            yield pd.DataFrame(lote, columns=self.columnas + self.fechas, dtype=object)
+
+    def _melt(self, ancho: pd.DataFrame) -> pd.DataFrame:
+        largo = pd.melt(ancho, id_vars=ancho.columns[:3], var_name='Date', value_name='Price')
+        largo["Price"] = pd.to_numeric(largo["Price"], errors="coerce")
+        return largo
+
+    @staticmethod
+    def _claves(ancho: pd.DataFrame) -> List[Tuple]:
+        return list(zip(ancho["Productos seleccionados"], ancho["Región"], ancho["Unidad de medida"]))
+
+    @medir_etapa("streaming.inspeccionar")
+    def inspeccionar(self) -> Dict:
+        """
+        Primera pasada: numera las series como lo hace validar_dataframe (por
+        producto, región y unidad) y junta las unidades y el precio máximo.
+
+        Returns:
+            Dict: Series, unidades y precio máximo de la hoja
+        """
+        claves = set()
+        unidades = set()
+        duplicadas = 0
+        for ancho in self._lotes_anchos():
+            for clave in self._claves(ancho):
+                duplicadas += clave in claves
+                claves.add(clave)
+            unidades.update(ancho["Unidad de medida"].dropna())
+            precios = self._melt(ancho)["Price"].round(2).abs()
+            if precios.notna().any():
+                self.precio_maximo = max(self.precio_maximo, float(precios.max()))
+
+        if duplicadas:
+            logging.warning(f"Hoja {self.hoja}: {duplicadas} series repetidas; se rellenan por separado")
+        # Las series con claves nulas no se numeran (igual que en groupby().ngroup())
+        numeradas = sorted(clave for clave in claves if not any(pd.isna(valor) for valor in clave))
+        self.series = {clave: numero for numero, clave in enumerate(numeradas, start=1)}
+        self.unidades = sorted(unidades)
+        logging.info(f"Hoja {self.hoja}: {len(claves)} series, {len(self.unidades)} unidades")
+        return {"series": self.series, "unidades": self.unidades, "precio_maximo": self.precio_maximo}
+
+    @medir_etapa("streaming.procesar_lote")
+    def _procesar_lote(self, ancho: pd.DataFrame, categorias: Optional[Dict[str, List]],
+                       precio_maximo: Optional[float], hoja: Optional[str]) -> pd.DataFrame:
+        ids = np.array([self.series.get(clave, np.nan) for clave in self._claves(ancho)])
+        largo = self._melt(ancho)
+        # melt apila las columnas de fechas: cada serie aparece una vez por fecha
+        largo["product_id"] = np.tile(ids, len(self.fechas))
+        largo = self.fill_missing_with_adjacent(largo)
+        largo["Price"] = largo["Price"].round(2)
+        largo["Date"] = pd.to_datetime(largo["Date"], errors="coerce")
+        if hoja is not None:
+            largo = largo.assign(sheet=hoja)
+        return compactar(largo, categorias, precio_maximo)
+
+    def lotes(self, categorias: Optional[Dict[str, List]] = None,
+              precio_maximo: Optional[float] = None, hoja: Optional[str] = None) -> Iterator[pd.DataFrame]:
+        """
+        Segunda pasada: entrega los datos transformados por lotes.
+
+        Args:
+            categorias (Optional[Dict[str, List]]): Categorías de unidad y hoja (por
+                defecto, las de esta hoja; ver compactar)
+            precio_maximo (Optional[float]): Precio máximo del conjunto (por defecto, el de esta hoja)
+            hoja (Optional[str]): Valor de la columna 'sheet' (sin columna si es None)
+
+        Returns:
+            Iterator[pd.DataFrame]: Lotes con las columnas de TransformadorDatos
+        """
+        if not self.series:
+            self.inspeccionar()
+        categorias = categorias or {"Unidad de medida": self.unidades}
+        precio_maximo = self.precio_maximo if precio_maximo is None else precio_maximo
+        for ancho in self._lotes_anchos():
+            yield self._procesar_lote(ancho, categorias, precio_maximo, hoja)
+
+
+def transformar_libro_streaming(fuente: Fuente, hojas: Optional[List[str]] = None,
+                                estrategia_relleno: str = "adjacent_mean",
+                                tamano_lote: int = 50000) -> Iterator[pd.DataFrame]:
+    """
+    Equivalente por lotes de leer las hojas compatibles y pasarlas por
+    transformar_hojas: entrega lotes con la columna 'sheet', con las mismas
+    categorías y tipos que el DataFrame completo.
+
+    Args:
+        fuente (Fuente): Ruta o contenido del libro
+        hojas (Optional[List[str]]): Hojas a procesar (todas las compatibles si es None)
+        estrategia_relleno (str): Estrategia de relleno de precios faltantes
+        tamano_lote (int): Filas aproximadas de cada lote
+
+    Returns:
+        Iterator[pd.DataFrame]: Lotes transformados, hoja por hoja
+    """
+    disponibles = nombres_hojas(fuente)
+    transformadores = []
+    for hoja in hojas if hojas is not None else disponibles:
+        if hoja not in disponibles:
+            logging.warning(f"No se encontró la hoja {hoja} en el archivo Excel")
+            continue
+        transformador = TransformadorStreaming(fuente, hoja, estrategia_relleno, tamano_lote)
+        if transformador.es_compatible():
+            transformadores.append(transformador)
+        else:
+            logging.info(f"Hoja {hoja} omitida: no tiene el formato de precios por región")
+    logging.info(f"Hojas a procesar: {[t.hoja for t in transformadores]}")
+
+    # Primera pasada por todas las hojas: categorías y precio máximo comunes
+    for transformador in transformadores:
+        transformador.inspeccionar()
+    categorias = {
+        "Unidad de medida": sorted(set().union(*(t.unidades for t in transformadores))),
+        "sheet": sorted(t.hoja for t in transformadores),
+    }
+    precio_maximo = max((t.precio_maximo for t in transformadores), default=0.0)
+
+    for transformador in transformadores:
+        filas = 0
+        for lote in transformador.lotes(categorias, precio_maximo, transformador.hoja):
+            filas += len(lote)
+            yield lote
+        logging.info(f"Hoja {transformador.hoja} transformada por lotes: {filas} filas")
+
+
+def main() -> None:
+    configurar_logging()
+    parser = argparse.ArgumentParser(description="Transformación por lotes de libros de precios del INDEC")
+    parser.add_argument("fuente", help="Ruta del libro XLS o XLSX")
+    parser.add_argument("--hojas", nargs="*", default=None, help="Hojas a procesar (todas las compatibles por defecto)")
+    parser.add_argument("--salida", action="append", default=None,
+                        help=f"Salida: formato[:ruta] o ruta (repetible; formatos: {', '.join(SALIDAS)})")
+    parser.add_argument("--lote", type=int, default=50000, help="Filas aproximadas de cada lote")
+    parser.add_argument("--relleno", choices=ESTRATEGIAS_RELLENO, default="adjacent_mean",
+                        help="Estrategia de relleno de precios faltantes")
+    args = parser.parse_args()
+
+    destinos = [crear_salida(salida) for salida in args.salida or ["data/precios_procesado.csv"]]
+    inicio = time.perf_counter()
+    escribir_salidas_lotes(transformar_libro_streaming(args.fuente, args.hojas, args.relleno, args.lote), destinos)
+    logging.info(f"Transformación por lotes completada en {time.perf_counter() - inicio:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
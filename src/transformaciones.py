@@ -1,26 +1,320 @@
+from dataclasses import dataclass, field
+from functools import lru_cache
+import numpy as np
 import pandas as pd
 import logging
-import warnings
+import re
+from typing import Dict, List, Optional, Sequence, Tuple
 
-# Ignorar todos los warnings
-warnings.filterwarnings('ignore')
+from src.metricas import medir_etapa
+from src.validacion import cargar_reglas
 
-# Configuración de logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(levelname)s - %(message)s'
+# Columnas que identifican una serie de precios (equivalente a product_id)
+COLUMNAS_SERIE = ["Región", "Productos seleccionados", "Unidad de medida"]
+
+# Encabezados que identifican la fila de títulos de una hoja de precios
+ENCABEZADOS = COLUMNAS_SERIE
+
+# Estrategias disponibles para rellenar precios faltantes
+ESTRATEGIAS_RELLENO = ("adjacent_mean", "linear", "ffill", "none")
+
+# Listas de referencia de regiones y productos, leídas una sola vez de config/validacion.json
+_REGLAS = cargar_reglas()
+REGIONES_VALIDAS = _REGLAS["regiones"]
+PRODUCTOS_VALIDOS = _REGLAS["productos"]
+
+# Precio a partir del cual float32 ya no representa los centavos (2**17)
+PRECIO_MAXIMO_FLOAT32 = 131072.0
+
+NOMBRES_MESES = (
+    'Enero', 'Febrero', 'Marzo', 'Abril', 'Mayo', 'Junio', 'Julio',
+    'Agosto', 'Septiembre', 'Octubre', 'Noviembre', 'Diciembre'
 )
 
+# Número de mes de cada nombre, precalculado una sola vez
+MESES_A_NUMEROS = {nombre: numero for numero, nombre in enumerate(NOMBRES_MESES, start=1)}
+
+# Marcadores de año en la fila de encabezados ("Año 2017" o "2017")
+PATRON_ANIO = re.compile(r'^(?:Año\s*)?(\d{4})$')
+
+
+@lru_cache(maxsize=256)
+def mapear_fechas(meses: Tuple[str, ...], marcadores: Tuple[Tuple[int, int], ...]) -> pd.DatetimeIndex:
+    """
+    Convierte la secuencia de meses de la hoja en fechas, de forma vectorizada.
+
+    Cada marcador de año fija el año de la columna de mes en la que cae (o de la
+    siguiente). Entre marcadores el año avanza cada vez que el número de mes no
+    crece respecto de la columna anterior, lo que detecta el cambio de año
+    aunque falten columnas de meses. El resultado se memoiza por firma de
+    encabezados, así las hojas con la misma disposición no repiten el cálculo.
+
+    Args:
+        meses (Tuple[str, ...]): Nombres de mes de cada columna de datos, en orden
+        marcadores (Tuple[Tuple[int, int], ...]): Pares (columna de datos, año) de
+            los marcadores "Año NNNN", con la columna relativa a la primera de datos
+
+    Returns:
+        pd.DatetimeIndex: Primer día del mes de cada columna de datos
+
+    Raises:
+        ValueError: Si no hay marcadores de año o algún mes es desconocido
+    """
+    if not marcadores:
+        raise ValueError("No se encontró una columna con año válido")
+    numeros = np.array([MESES_A_NUMEROS[mes] for mes in meses], dtype="int64")
+
+    # Cantidad acumulada de cambios de año antes de cada columna
+    cambios = np.concatenate(([0], np.cumsum(numeros[1:] <= numeros[:-1])))
+
+    # Marcador de referencia: el último a la izquierda o, si no hay, el primero a la derecha
+    columnas_marcador = np.array([columna for columna, _ in marcadores])
+    anios_marcador = np.array([anio for _, anio in marcadores])
+    posicion = np.searchsorted(columnas_marcador, np.arange(len(numeros)), side="right") - 1
+    posicion = np.clip(posicion, 0, None)
+    columna_ref = np.clip(columnas_marcador[posicion], 0, len(numeros) - 1)
+    anios = anios_marcador[posicion] + cambios - cambios[columna_ref]
+
+    return pd.DatetimeIndex(pd.to_datetime({"year": anios, "month": numeros, "day": 1}))
+
+
+def compactar(df: pd.DataFrame, categorias: Optional[Dict[str, List[str]]] = None,
+              precio_maximo: Optional[float] = None) -> pd.DataFrame:
+    """
+    Convierte los datos transformados al esquema compacto.
+
+    Región y producto pasan a categorías con un diccionario fijo (las listas de
+    validación), de modo que todas las hojas comparten los mismos códigos; la
+    unidad y la hoja, a categorías con los valores presentes. Los precios quedan
+    en float32 y el product_id en int16. Date se mantiene como datetime64, que
+    es lo que usan las etapas siguientes (pandas no admite datetime64[M]).
+
+    Si algún precio supera PRECIO_MAXIMO_FLOAT32, los precios quedan en float64
+    para no perder los centavos. Se puede aplicar más de una vez, por ejemplo
+    después de concatenar hojas.
+
+    Al compactar por lotes, categorias y precio_maximo fijan los valores que se
+    calcularían sobre el conjunto completo, para que todos los lotes tengan
+    los mismos tipos.
+
+    Args:
+        df (pd.DataFrame): Datos transformados
+        categorias (Optional[Dict[str, List[str]]]): Categorías de 'Unidad de medida'
+            y 'sheet' (por defecto, los valores presentes)
+        precio_maximo (Optional[float]): Precio máximo en valor absoluto (por defecto,
+            el de df)
+
+    Returns:
+        pd.DataFrame: Los mismos datos con el esquema compacto
+    """
+    df = df.copy()
+    categorias = categorias or {}
+    df["Región"] = pd.Categorical(df["Región"], categories=REGIONES_VALIDAS)
+    df["Productos seleccionados"] = pd.Categorical(df["Productos seleccionados"], categories=PRODUCTOS_VALIDOS)
+    for columna in ("Unidad de medida", "sheet"):
+        if columna in df.columns:
+            valores = df[columna].astype("object")
+            df[columna] = pd.Categorical(
+                valores, categories=categorias.get(columna, sorted(valores.dropna().unique()))
+            )
+
+    if "Date" in df.columns and not pd.api.types.is_datetime64_any_dtype(df["Date"]):
+        df["Date"] = pd.to_datetime(df["Date"], errors="coerce")
+
+    if "Price" in df.columns:
+        precios = pd.to_numeric(df["Price"], errors="coerce")
+        if precio_maximo is None:
+            precio_maximo = precios.abs().max()
+        if precio_maximo >= PRECIO_MAXIMO_FLOAT32:
+            logging.warning("Precios demasiado altos para float32: se mantienen en float64")
+            # Redondear a centavos: los que venían en float32 de otra hoja recuperan su valor exacto
+            df["Price"] = precios.astype("float64").round(2)
+        else:
+            df["Price"] = precios.astype("float32")
+
+    if "product_id" in df.columns:
+        if df["product_id"].max() > np.iinfo("int16").max:
+            raise ValueError(f"product_id fuera del rango de int16: {df['product_id'].max()}")
+        df["product_id"] = df["product_id"].astype("int16")
+    return df
+
+
+def to_arrow(df: pd.DataFrame):
+    """
+    Exporta un DataFrame compacto como tabla de Arrow.
+
+    Las categorías se exportan como arreglos de diccionario y las columnas
+    numéricas sin nulos comparten el buffer de numpy, sin copiar los datos.
+
+    Args:
+        df (pd.DataFrame): Datos en el esquema compacto
+
+    Returns:
+        pyarrow.Table: Tabla equivalente
+
+    Raises:
+        ImportError: Si pyarrow no está instalado
+    """
+    try:
+        import pyarrow as pa
+    except ImportError as e:
+        raise ImportError("to_arrow requiere pyarrow (pip install pyarrow)") from e
+    return pa.Table.from_pandas(df, preserve_index=False)
+
+
+@dataclass
+class DisposicionHoja:
+    """
+    Ubicación de las partes de una hoja de precios, detectada en una sola pasada.
+    Las filas se expresan con las etiquetas del índice del DataFrame original y
+    las columnas con su posición.
+    """
+    fila_encabezados: int
+    fila_meses: int
+    fila_ultima: int
+    columna_region: int
+    filas_vacias: List[int] = field(default_factory=list)
+    columnas_meses: List[int] = field(default_factory=list)
+    marcadores_anio: Dict[int, int] = field(default_factory=dict)
+
+
+def _matriz_texto(df: pd.DataFrame) -> np.ndarray:
+    """Celdas de la hoja como texto sin espacios en los extremos ('' para las vacías)."""
+    valores = df.to_numpy(dtype=object)
+    return np.char.strip(np.where(pd.isna(valores), "", valores).astype(str))
+
+
+def _buscar_fila_encabezados(texto: np.ndarray) -> Optional[int]:
+    """Posición de la primera fila que contiene los tres encabezados, o None."""
+    contiene = np.ones(texto.shape[0], dtype=bool)
+    for encabezado in ENCABEZADOS:
+        contiene &= (np.char.find(texto, encabezado) >= 0).any(axis=1)
+    posiciones = np.flatnonzero(contiene)
+    return int(posiciones[0]) if len(posiciones) else None
+
+
+def detectar_disposicion(df: pd.DataFrame) -> DisposicionHoja:
+    """
+    Detecta en una pasada vectorizada la fila de encabezados, la fila de meses,
+    las columnas con marcador de año, las filas vacías y la última fila con una
+    región válida.
+
+    Args:
+        df (pd.DataFrame): Hoja tal como se leyó del Excel
+
+    Returns:
+        DisposicionHoja: Disposición detectada
+
+    Raises:
+        ValueError: Si falta alguna de las partes esperadas
+    """
+    texto = _matriz_texto(df)
+    indice = df.index
+
+    fila_encabezados = _buscar_fila_encabezados(texto)
+    if fila_encabezados is None:
+        raise ValueError("No se encontraron los encabezados esperados")
+    encabezados = texto[fila_encabezados]
+    columna_region = int(np.flatnonzero(encabezados == "Región")[0]) if "Región" in encabezados else 0
+
+    debajo = texto[fila_encabezados + 1:]
+    es_mes = np.isin(debajo[:, 3:], NOMBRES_MESES)
+    filas_con_meses = np.flatnonzero(es_mes.any(axis=1))
+    if not len(filas_con_meses):
+        raise ValueError("No se encontró la fila de meses")
+    fila_meses = fila_encabezados + 1 + int(filas_con_meses[0])
+
+    es_region = np.isin(texto[:, columna_region], REGIONES_VALIDAS)
+    es_region[:fila_meses + 1] = False
+    filas_region = np.flatnonzero(es_region)
+    if not len(filas_region):
+        raise ValueError("No se encontraron filas con regiones válidas")
+    fila_ultima = int(filas_region[-1])
+
+    vacias = np.flatnonzero((texto[fila_meses + 1:fila_ultima] == "").all(axis=1)) + fila_meses + 1
+
+    marcadores = {}
+    for columna in range(3, texto.shape[1]):
+        coincidencia = PATRON_ANIO.match(encabezados[columna])
+        if coincidencia:
+            marcadores[columna] = int(coincidencia.group(1))
+
+    return DisposicionHoja(
+        fila_encabezados=indice[fila_encabezados],
+        fila_meses=indice[fila_meses],
+        fila_ultima=indice[fila_ultima],
+        columna_region=columna_region,
+        filas_vacias=list(indice[vacias]),
+        columnas_meses=[int(c) + 3 for c in np.flatnonzero(es_mes[filas_con_meses[0]])],
+        marcadores_anio=marcadores,
+    )
+
+
+def fechas_disposicion(disposicion: DisposicionHoja, meses: Sequence) -> pd.DatetimeIndex:
+    """
+    Fechas de las columnas de datos de una hoja (ver mapear_fechas).
+
+    Args:
+        disposicion (DisposicionHoja): Disposición detectada de la hoja
+        meses (Sequence): Valores de la fila de meses en disposicion.columnas_meses
+
+    Returns:
+        pd.DatetimeIndex: Primer día del mes de cada columna de datos
+    """
+    # Marcadores de año, relativos a la primera columna de datos
+    columnas_meses = np.array(disposicion.columnas_meses)
+    marcadores = tuple(
+        (int(np.searchsorted(columnas_meses, columna)), anio)
+        for columna, anio in sorted(disposicion.marcadores_anio.items())
+        if columna <= columnas_meses[-1]
+    )
+    return mapear_fechas(tuple(str(mes).strip() for mes in meses), marcadores)
+
+
 class TransformadorDatos:
-    def __init__(self, df: pd.DataFrame):
+    def __init__(self, df: pd.DataFrame, estrategia_relleno: str = "adjacent_mean"):
         """
         Inicializa el transformador con el DataFrame a procesar.
         
         Args:
             df (pd.DataFrame): DataFrame a procesar
+            estrategia_relleno (str): Estrategia para rellenar precios faltantes
+                ('adjacent_mean', 'linear', 'ffill' o 'none')
         """
+        if estrategia_relleno not in ESTRATEGIAS_RELLENO:
+            raise ValueError(f"Estrategia de relleno desconocida: {estrategia_relleno}")
         self.df = df
+        self.estrategia_relleno = estrategia_relleno
+        self.disposicion: Optional[DisposicionHoja] = None
+        self.resultado: Optional[pd.DataFrame] = None
+
+    @staticmethod
+    def es_hoja_compatible(df: pd.DataFrame, filas: int = 30) -> bool:
+        """
+        Indica si una hoja tiene, en sus primeras filas, los encabezados que este
+        transformador sabe procesar.
+
+        Args:
+            df (pd.DataFrame): Hoja leída del Excel
+            filas (int): Cantidad de filas iniciales a revisar
 
+        Returns:
+            bool: True si la hoja es compatible
+        """
+        return _buscar_fila_encabezados(_matriz_texto(df.head(filas))) is not None
+
+    def to_arrow(self):
+        """
+        Exporta el resultado de la transformación como tabla de Arrow (ver to_arrow).
+
+        Returns:
+            pyarrow.Table: Tabla con el resultado de la transformación
+        """
+        if self.resultado is None:
+            raise ValueError("No hay resultado para exportar: primero ejecutar identificar_encabezados()")
+        return to_arrow(self.resultado)
+
+    @medir_etapa("transformar.identificar_encabezados")
     def identificar_encabezados(self) -> pd.DataFrame:
         """
         Identifica y establece los encabezados correctos.
@@ -29,51 +323,46 @@ class TransformadorDatos:
             pd.DataFrame: DataFrame con los encabezados correctos
         """
         try:
-            encabezados = ["Región", "Productos seleccionados", "Unidad de medida"]
-            fila_inicio = None
-
-            for i, fila in self.df.iterrows():
-                if all(col in str(fila.values) for col in encabezados):
-                    fila_inicio = i
-                    break
-
-            if fila_inicio is not None:
-                # Filtrar encabezados no nulos
-                encabezados_no_nulos = [
-                    str(col) for col in self.df.iloc[fila_inicio] 
-                    if pd.notna(col) and str(col).strip()
-                ]
-                
-                logging.info(f"""
-                Encabezados encontrados en la fila: {fila_inicio}
-                Encabezados no nulos: {encabezados_no_nulos}
-                """)
-                
-                self.df.columns = self.df.iloc[fila_inicio]
-                self.df = self.df.iloc[fila_inicio + 1:]
-                return self.eliminar_filas_nulas()
-            else:
-                logging.error("No se encontraron los encabezados esperados")
-                raise ValueError("No se encontraron los encabezados esperados")
+            # Detectar de una sola vez la disposición que usan las etapas siguientes
+            self.disposicion = detectar_disposicion(self.df)
+            fila_inicio = self.disposicion.fila_encabezados
+
+            # Filtrar encabezados no nulos
+            encabezados_no_nulos = [
+                str(col) for col in self.df.loc[fila_inicio] 
+                if pd.notna(col) and str(col).strip()
+            ]
+            
+            logging.info(f"""
+            Encabezados encontrados en la fila: {fila_inicio}
+            Encabezados no nulos: {encabezados_no_nulos}
+            """)
+            
+            self.df.columns = self.df.loc[fila_inicio]
+            self.df = self.df.loc[self.disposicion.fila_meses:]
+            return self.eliminar_filas_nulas()
         except Exception as e:
             logging.error(f"Error al identificar encabezados: {str(e)}")
             raise
 
+    @medir_etapa("transformar.eliminar_filas_nulas")
     def eliminar_filas_nulas(self) -> pd.DataFrame:
         """
-        Elimina las filas 3 y 4 del DataFrame que contienen datos nulos.
+        Elimina las filas vacías entre la fila de meses y la última fila de datos,
+        según la disposición detectada.
         
         Returns:
             pd.DataFrame: DataFrame sin las filas eliminadas
         """
         try:
-            self.df = self.df.drop(index=[3, 4])
-            logging.info("Filas nulas eliminadas exitosamente")
+            self.df = self.df.drop(index=self.disposicion.filas_vacias)
+            logging.info(f"Filas nulas eliminadas exitosamente: {self.disposicion.filas_vacias}")
             return self.identificar_ultima_fila_valida()
         except Exception as e:
             logging.error(f"Error al eliminar filas nulas: {str(e)}")
             raise
 
+    @medir_etapa("transformar.identificar_ultima_fila_valida")
     def identificar_ultima_fila_valida(self) -> pd.DataFrame:
         """
         Identifica la última fila válida basada en las regiones válidas y
@@ -83,8 +372,7 @@ class TransformadorDatos:
             pd.DataFrame: DataFrame filtrado hasta la última fila válida
         """
         try:
-            regiones_validas = ['GBA', 'Pampeana', 'Noreste', 'Noroeste', 'Cuyo', 'Patagonia']
-            ultima_fila_valida = self.df[self.df["Región"].isin(regiones_validas)].index[-1]
+            ultima_fila_valida = self.disposicion.fila_ultima
             ultima_fila_info = self.df.loc[ultima_fila_valida]
             
             self.df = self.df.loc[:ultima_fila_valida]
@@ -103,6 +391,7 @@ class TransformadorDatos:
             logging.error(f"Error al identificar última fila válida: {str(e)}")
             raise
 
+    @medir_etapa("transformar.procesar_fechas")
     def procesar_fechas(self) -> pd.DataFrame:
         """
         Procesa las fechas y crea el DataFrame con columnas en formato fecha YYYY-MM-DD.
@@ -111,61 +400,17 @@ class TransformadorDatos:
             pd.DataFrame: DataFrame con las columnas en formato fecha
         """
         try:
-            # Mapeo de meses a números
-            meses_a_numeros = {
-                'Enero': '01', 'Febrero': '02', 'Marzo': '03', 'Abril': '04',
-                'Mayo': '05', 'Junio': '06', 'Julio': '07', 'Agosto': '08',
-                'Septiembre': '09', 'Octubre': '10', 'Noviembre': '11', 'Diciembre': '12'
-            }
-
-            # Obtener los meses de la primera fila
-            meses = self.df.iloc[0, 3:].values
-            
-            # Identificar columnas a mantener (las que no tienen NaN en la primera fila)
-            columnas_validas = [0, 1, 2]  # Mantener las tres primeras columnas
-            for i, mes in enumerate(meses, start=3):
-                if pd.notna(mes) and isinstance(mes, str):
-                    if i < self.df.shape[1]:
-                        columnas_validas.append(i)
-
-            # Filtrar el DataFrame para mantener solo las columnas válidas
-            self.df = self.df.iloc[:, columnas_validas]
-
-            # Obtener los meses nuevamente después del filtrado
-            meses = self.df.iloc[0, 3:].values
-
-            # Detectar año y mes de inicio
-            primer_mes = next((mes.strip() for mes in meses if pd.notna(mes) and isinstance(mes, str)), None)
-            if primer_mes is None:
+            # Columnas de datos: las que tienen un nombre de mes en la fila de meses
+            columnas_meses = self.disposicion.columnas_meses
+            if not columnas_meses:
                 raise ValueError("No se encontró un mes válido")
+            self.df = self.df.iloc[:, [0, 1, 2] + columnas_meses]
 
-            primera_columna = next((col for col in self.df.columns[3:] if 'Año' in str(col) or str(col).isdigit()), None)
-            if primera_columna is None:
-                raise ValueError("No se encontró una columna con año válido")
-
-            if 'Año' in str(primera_columna):
-                año_inicio = int(str(primera_columna).replace('Año ', ''))
-            else:
-                año_inicio = int(primera_columna)
-                
-            mes_inicio = int(meses_a_numeros[primer_mes])
-
-            logging.info(f"Fecha de inicio detectada: {año_inicio}-{mes_inicio:02d}")
-
-            # Crear nuevas columnas con formato de fecha
-            nuevas_columnas = list(self.df.columns[:3])
-            for mes in meses:
-                mes = mes.strip()
-                if mes in meses_a_numeros:
-                    mes_num = int(meses_a_numeros[mes])
-                    if mes_num == 1 and mes_inicio == 12:
-                        año_inicio += 1
-                    mes_inicio = mes_num
-                    fecha = f"{año_inicio}-{mes_num:02d}-01"
-                    nuevas_columnas.append(fecha)
+            fechas = fechas_disposicion(self.disposicion, self.df.iloc[0, 3:].values)
+            logging.info(f"Fecha de inicio detectada: {fechas[0].year}-{fechas[0].month:02d}")
 
             # Asignar las nuevas columnas al DataFrame
-            self.df.columns = nuevas_columnas
+            self.df.columns = list(self.df.columns[:3]) + list(fechas.strftime("%Y-%m-%d"))
             
             return self.realizar_melt()
             
@@ -173,6 +418,7 @@ class TransformadorDatos:
             logging.error(f"Error al procesar fechas: {str(e)}")
             raise
 
+    @medir_etapa("transformar.realizar_melt")
     def realizar_melt(self) -> pd.DataFrame:
         """
         Realiza la transformación melt del DataFrame y elimina la fila de meses.
@@ -207,6 +453,7 @@ class TransformadorDatos:
             logging.error(f"Error al realizar melt: {str(e)}")
             raise
 
+    @medir_etapa("transformar.validar_dataframe")
     def validar_dataframe(self, df_melted: pd.DataFrame) -> pd.DataFrame:
         """
         Realiza validaciones en el DataFrame final y agrega un product_id único.
@@ -219,14 +466,8 @@ class TransformadorDatos:
         """
         try:
             # Listas de valores válidos
-            regiones_validas = ['GBA', 'Pampeana', 'Noreste', 'Noroeste', 'Cuyo', 'Patagonia']
-            productos_validos = [
-                'Pan francés', 'Harina de trigo común', 'Arroz blanco simple',
-                'Fideos secos tipo guisero', 'Carne picada común', 'Pollo entero',
-                'Aceite de girasol', 'Leche fresca entera sachet',
-                'Huevos de gallina', 'Papa', 'Azúcar', 'Detergente líquido',
-                'Lavandina', 'Jabón de tocador'
-            ]
+            regiones_validas = REGIONES_VALIDAS
+            productos_validos = PRODUCTOS_VALIDOS
 
             # Filtrar filas válidas
             filas_validas = df_melted["Región"].isin(regiones_validas) & df_melted["Productos seleccionados"].isin(productos_validos)
@@ -242,6 +483,9 @@ class TransformadorDatos:
             
             # Crear product_id único
             df_melted['product_id'] = df_melted.groupby(['Productos seleccionados', 'Región', 'Unidad de medida']).ngroup() + 1
+
+            # Esquema compacto: categorías, precios float32 y product_id int16
+            df_melted = compactar(df_melted)
             
             # Validaciones adicionales
             logging.info(f"""
@@ -255,56 +499,113 @@ class TransformadorDatos:
             - Valores más altos en Price: \n{df_melted.nlargest(5, 'Price')[['Date', 'Productos seleccionados', 'Price', 'product_id']]}
             """)
 
+            self.resultado = df_melted
             return df_melted
 
         except Exception as e:
             logging.error(f"Error en la validación del DataFrame: {str(e)}")
             raise
 
-    def fill_missing_with_adjacent(self, df_melted: pd.DataFrame) -> pd.DataFrame:
+    @medir_etapa("transformar.fill_missing_with_adjacent")
+    def fill_missing_with_adjacent(self, df_melted: pd.DataFrame, estrategia: Optional[str] = None) -> pd.DataFrame:
         """
         Rellena los valores faltantes en la columna "Price" utilizando los precios
         de los meses adyacentes para el mismo producto, región y unidad.
 
+        Trabaja de forma vectorizada sobre cada serie (producto, región y unidad)
+        ordenada por fecha, a partir de ffill/bfill de las posiciones con precio
+        conocido. Estrategias:
+            - 'adjacent_mean': promedio entre el precio anterior y el siguiente; en
+              huecos de varios meses cada valor se promedia con el recién rellenado,
+              igual que la implementación fila a fila original.
+            - 'linear': interpolación lineal entre el precio anterior y el siguiente.
+            - 'ffill': último precio conocido.
+            - 'none': no rellena.
+        En los extremos de la serie se usa el único precio conocido disponible
+        (salvo 'ffill', que deja sin rellenar los meses iniciales).
+
         Args:
             df_melted (pd.DataFrame): DataFrame en formato melted a procesar
+            estrategia (Optional[str]): Estrategia a usar; por defecto la del transformador
 
         Returns:
             pd.DataFrame: DataFrame con los valores faltantes rellenados
         """
         try:
+            estrategia = estrategia or self.estrategia_relleno
+            if estrategia not in ESTRATEGIAS_RELLENO:
+                raise ValueError(f"Estrategia de relleno desconocida: {estrategia}")
+
             # Ordenar el DataFrame por fecha
             df_melted = df_melted.sort_values(by="Date")
-            
-            # Iterar sobre cada fila con valores faltantes
-            for index, row in df_melted[df_melted["Price"].isna()].iterrows():
-                region = row["Región"]
-                product = row["Productos seleccionados"]
-                unit = row["Unidad de medida"]
-                date = row["Date"]
-                
-                # Filtrar datos del mismo producto y región
-                product_data = df_melted[
-                    (df_melted["Región"] == region) & 
-                    (df_melted["Productos seleccionados"] == product) & 
-                    (df_melted["Unidad de medida"] == unit)
-                ]
-                
-                # Obtener precios adyacentes
-                previous_price = product_data[product_data["Date"] < date]["Price"].dropna().tail(1)
-                next_price = product_data[product_data["Date"] > date]["Price"].dropna().head(1)
-                
-                # Calcular y asignar el valor
-                if not previous_price.empty and not next_price.empty:
-                    df_melted.at[index, "Price"] = (previous_price.iloc[0] + next_price.iloc[0]) / 2
-                elif not previous_price.empty:
-                    df_melted.at[index, "Price"] = previous_price.iloc[0]
-                elif not next_price.empty:
-                    df_melted.at[index, "Price"] = next_price.iloc[0]
-            
-            logging.info("Valores faltantes rellenados exitosamente")
+            faltantes = df_melted["Price"].isna().to_numpy()
+
+            if estrategia == "none" or not faltantes.any():
+                logging.info("Valores faltantes rellenados exitosamente")
+                return df_melted
+
+            # Ordenar cada serie por fecha (orden estable sobre el orden por fecha)
+            grupos = df_melted.groupby(COLUMNAS_SERIE, sort=False, observed=True).ngroup().to_numpy()
+            orden = np.argsort(grupos, kind="stable")
+            grupos = grupos[orden]
+            precios = df_melted["Price"].to_numpy(dtype="float64")[orden]
+
+            # Posición y precio del último/próximo valor conocido dentro de cada serie
+            posiciones = np.arange(len(precios), dtype="float64")
+            conocidos = pd.DataFrame({
+                "pos": np.where(np.isnan(precios), np.nan, posiciones),
+                "precio": precios,
+            })
+            anteriores = conocidos.groupby(grupos).ffill()
+            siguientes = conocidos.groupby(grupos).bfill()
+            pos_anterior = anteriores["pos"].to_numpy()
+            precio_anterior = anteriores["precio"].to_numpy()
+            pos_siguiente = siguientes["pos"].to_numpy()
+            precio_siguiente = siguientes["precio"].to_numpy()
+
+            # Las filas sin serie (claves nulas) no se rellenan, como antes
+            rellenar = np.isnan(precios) & (grupos >= 0)
+            hay_anterior = ~np.isnan(precio_anterior)
+            hay_siguiente = ~np.isnan(precio_siguiente)
+            ambos = rellenar & hay_anterior & hay_siguiente
+
+            valores = precios.copy()
+            if estrategia == "ffill":
+                valores[rellenar] = precio_anterior[rellenar]
+            else:
+                solo_anterior = rellenar & hay_anterior & ~hay_siguiente
+                solo_siguiente = rellenar & ~hay_anterior & hay_siguiente
+                valores[solo_anterior] = precio_anterior[solo_anterior]
+                valores[solo_siguiente] = precio_siguiente[solo_siguiente]
+
+                if estrategia == "linear":
+                    # Solo en los huecos: en el resto de las filas el cociente sería 0/0 o con NaN
+                    fraccion = (posiciones[ambos] - pos_anterior[ambos]) / (pos_siguiente[ambos] - pos_anterior[ambos])
+                    valores[ambos] = (
+                        precio_anterior[ambos]
+                        + (precio_siguiente[ambos] - precio_anterior[ambos]) * fraccion
+                    )
+                else:
+                    # Promedios sucesivos: f_k = (f_{k-1} + siguiente) / 2, con f_0 = anterior
+                    pasos = (posiciones - pos_anterior)[ambos].astype("int64")
+                    acumulado = precio_anterior[ambos]
+                    siguiente = precio_siguiente[ambos]
+                    for paso in range(1, int(pasos.max(initial=0)) + 1):
+                        activos = pasos >= paso
+                        acumulado[activos] = (acumulado[activos] + siguiente[activos]) / 2
+                    valores[ambos] = acumulado
+
+            # Volver al orden por fecha
+            resultado = np.empty_like(valores)
+            resultado[orden] = valores
+            df_melted["Price"] = resultado
+
+            logging.info(
+                f"Valores faltantes rellenados exitosamente "
+                f"({estrategia}: {int(faltantes.sum() - np.isnan(resultado).sum())} de {int(faltantes.sum())})"
+            )
             return df_melted
 
         except Exception as e:
             logging.error(f"Error al rellenar valores faltantes: {str(e)}")
-            raise
\ No newline at end of file
+            raise
@@ -0,0 +1,330 @@
+from dataclasses import dataclass, field
+from functools import lru_cache
+from typing import Dict, List, Optional
+import argparse
+import json
+import logging
+import os
+import time
+
+import numpy as np
+import pandas as pd
+
+from src.cache import escribir_atomico
+from src.metricas import configurar_logging, medir_etapa
+
+# Reglas de validación y listas de referencia (regiones y productos)
+RUTA_REGLAS = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "config", "validacion.json")
+
+SEVERIDADES = ("error", "advertencia")
+
+# Severidad de cada control si las reglas no la indican: los que detectan una
+# hoja mal leída bloquean la corrida; precios fuera de rango y saltos anómalos
+# pueden ser reales (devaluaciones, cambios de presentación) y solo se informan
+SEVERIDAD_POR_DEFECTO = {
+    "esquema": "error",
+    "cobertura": "error",
+    "meses": "error",
+    "precios": "advertencia",
+    "saltos": "advertencia",
+}
+
+# Columnas del DataFrame transformado que usan los controles
+COLUMNAS_REQUERIDAS = ["Región", "Productos seleccionados", "Unidad de medida", "Date", "Price"]
+COLUMNAS_SERIE = ["sheet", "Región", "Productos seleccionados", "Unidad de medida"]
+
+# Filas de ejemplo que se guardan por problema en el reporte
+MAX_EJEMPLOS = 10
+
+
+@lru_cache(maxsize=8)
+def cargar_reglas(ruta: str = RUTA_REGLAS) -> Dict:
+    """
+    Lee las reglas de validación una sola vez por ruta.
+
+    Args:
+        ruta (str): Archivo JSON con 'regiones', 'productos' y 'controles'
+
+    Returns:
+        Dict: Reglas (compartidas: no modificar)
+    """
+    with open(ruta, encoding="utf-8") as archivo:
+        reglas = json.load(archivo)
+    for control, parametros in reglas.get("controles", {}).items():
+        if parametros.get("severidad", "error") not in SEVERIDADES:
+            raise ValueError(f"Severidad desconocida en el control {control}: {parametros['severidad']}")
+    return reglas
+
+
+@dataclass
+class Problema:
+    """Resultado de un control que encontró datos sospechosos."""
+    control: str
+    severidad: str
+    mensaje: str
+    filas: int = 0
+    ejemplos: List[Dict] = field(default_factory=list)
+    marcadas: Optional[pd.DataFrame] = field(default=None, repr=False)
+
+    def to_dict(self) -> Dict:
+        return {"control": self.control, "severidad": self.severidad, "mensaje": self.mensaje,
+                "filas": self.filas, "ejemplos": self.ejemplos}
+
+
+@dataclass
+class ReporteValidacion:
+    """
+    Reporte de la validación de un DataFrame transformado. `marcas` tiene una
+    fila por precio marcado como anómalo (claves de la serie, fecha, precio y
+    control que lo marcó).
+    """
+    filas: int
+    segundos: float
+    problemas: List[Problema]
+    marcas: pd.DataFrame
+
+    @property
+    def errores(self) -> List[Problema]:
+        return [problema for problema in self.problemas if problema.severidad == "error"]
+
+    @property
+    def bloquea_publicacion(self) -> bool:
+        """Indica si algún control con severidad 'error' encontró problemas."""
+        return bool(self.errores)
+
+    def to_dict(self) -> Dict:
+        return {
+            "filas": self.filas,
+            "segundos": round(self.segundos, 4),
+            "bloquea_publicacion": self.bloquea_publicacion,
+            "problemas": [problema.to_dict() for problema in self.problemas],
+            "marcas": int(len(self.marcas)),
+        }
+
+    def guardar(self, ruta: str) -> None:
+        """Escribe el reporte en JSON (de forma atómica)."""
+        contenido = json.dumps(self.to_dict(), indent=2, ensure_ascii=False, default=str)
+        escribir_atomico(ruta, contenido.encode("utf-8"))
+        logging.info(f"Reporte de validación guardado en {ruta}")
+
+
+def _ejemplos(df: pd.DataFrame) -> List[Dict]:
+    """Primeras filas como diccionarios serializables."""
+    muestra = df.head(MAX_EJEMPLOS).copy()
+    for columna in muestra.columns:
+        if pd.api.types.is_datetime64_any_dtype(muestra[columna]):
+            muestra[columna] = muestra[columna].dt.strftime("%Y-%m-%d")
+    return json.loads(muestra.to_json(orient="records", force_ascii=False))
+
+
+def controlar_esquema(df: pd.DataFrame, parametros: Dict) -> List[Problema]:
+    """Columnas requeridas, tipos de fecha y precio, y claves nulas."""
+    faltantes = [columna for columna in COLUMNAS_REQUERIDAS if columna not in df.columns]
+    if faltantes:
+        return [Problema("esquema", "", f"Faltan columnas: {', '.join(faltantes)}")]
+    problemas = []
+    if not pd.api.types.is_datetime64_any_dtype(df["Date"]):
+        problemas.append(Problema("esquema", "", f"Date no es una fecha ({df['Date'].dtype})"))
+    if not pd.api.types.is_numeric_dtype(df["Price"]):
+        problemas.append(Problema("esquema", "", f"Price no es numérico ({df['Price'].dtype})"))
+    nulas = df[COLUMNAS_SERIE[1:] + ["Date"]].isna().any(axis=1).to_numpy()
+    if nulas.any():
+        problemas.append(Problema("esquema", "", "Filas con claves o fecha nulas", int(nulas.sum()),
+                                  _ejemplos(df[nulas])))
+    return problemas
+
+
+def controlar_cobertura(df: pd.DataFrame, parametros: Dict, productos: List[str]) -> List[Problema]:
+    """
+    Proporción de combinaciones región × producto con precio en cada mes de cada
+    hoja, respecto de las regiones de la hoja por todos los productos de referencia.
+    """
+    minima = parametros.get("minima", 0.9)
+    con_precio = df.loc[df["Price"].notna(), ["sheet", "Región", "Productos seleccionados", "Date"]]
+    combinaciones = con_precio.drop_duplicates()
+    observadas = combinaciones.groupby(["sheet", "Date"], observed=True).size()
+    regiones = df.groupby("sheet", observed=True)["Región"].nunique()
+    esperadas = regiones.reindex(observadas.index.get_level_values("sheet")).to_numpy() * len(productos)
+    cobertura = pd.DataFrame({"combinaciones": observadas.to_numpy(), "esperadas": esperadas},
+                             index=observadas.index).reset_index()
+    cobertura["cobertura"] = (cobertura["combinaciones"] / cobertura["esperadas"]).round(4)
+
+    # Meses de la hoja sin ningún precio: cobertura cero
+    todos = df[["sheet", "Date"]].drop_duplicates()
+    vacios = todos.merge(cobertura[["sheet", "Date"]], how="left", indicator=True)
+    vacios = vacios[vacios.pop("_merge") == "left_only"].assign(combinaciones=0, cobertura=0.0)
+    bajas = pd.concat([cobertura[cobertura["cobertura"] < minima], vacios], ignore_index=True)
+    if bajas.empty:
+        return []
+    bajas = bajas.sort_values("cobertura")
+    return [Problema(
+        "cobertura", "",
+        f"{len(bajas)} mes(es) con menos del {minima:.0%} de las combinaciones región × producto "
+        f"(mínimo {bajas['cobertura'].min():.0%})",
+        len(bajas), _ejemplos(bajas),
+    )]
+
+
+def controlar_meses(df: pd.DataFrame, parametros: Dict) -> List[Problema]:
+    """Meses consecutivos por hoja, fechas en el primer día del mes y sin fechas futuras ni duplicadas."""
+    problemas = []
+    fechas = df["Date"]
+    indice = fechas.dt.year.to_numpy() * 12 + fechas.dt.month.to_numpy() - 1
+
+    fuera_de_dia = (fechas.dt.day != 1).to_numpy()
+    if fuera_de_dia.any():
+        problemas.append(Problema("meses", "", "Fechas que no son el primer día del mes",
+                                  int(fuera_de_dia.sum()), _ejemplos(df[fuera_de_dia])))
+
+    hoy = pd.Timestamp.today()
+    limite = hoy.year * 12 + hoy.month - 1 + parametros.get("meses_futuros", 1)
+    futuras = indice > limite
+    if futuras.any():
+        problemas.append(Problema("meses", "", "Fechas posteriores al mes actual (¿columnas corridas?)",
+                                  int(futuras.sum()), _ejemplos(df[futuras])))
+
+    meses = pd.DataFrame({"sheet": df["sheet"].to_numpy(), "indice": indice}).drop_duplicates()
+    meses = meses.sort_values(["sheet", "indice"])
+    hojas = meses["sheet"].to_numpy()
+    salto = np.diff(meses["indice"].to_numpy(), prepend=0)
+    hueco = (salto > 1) & np.concatenate(([False], hojas[1:] == hojas[:-1]))
+    huecos = meses[hueco].assign(meses_faltantes=salto[hueco] - 1)
+    if not huecos.empty:
+        primero = huecos["indice"] - huecos["meses_faltantes"]
+        huecos["desde"] = pd.to_datetime({"year": primero // 12, "month": primero % 12 + 1, "day": 1})
+        problemas.append(Problema(
+            "meses", "", f"{int(huecos['meses_faltantes'].sum())} mes(es) faltantes en la secuencia",
+            len(huecos), _ejemplos(huecos[["sheet", "desde", "meses_faltantes"]]),
+        ))
+
+    duplicadas = df.duplicated(COLUMNAS_SERIE + ["Date"], keep=False).to_numpy()
+    if duplicadas.any():
+        problemas.append(Problema("meses", "", "Precios duplicados para la misma serie y mes",
+                                  int(duplicadas.sum()), _ejemplos(df[duplicadas])))
+    return problemas
+
+
+def controlar_precios(df: pd.DataFrame, parametros: Dict) -> List[Problema]:
+    """Precios fuera del rango [minimo, maximo]."""
+    precios = df["Price"].to_numpy(dtype="float64")
+    fuera = (precios < parametros.get("minimo", 0.01)) | (precios > parametros.get("maximo", np.inf))
+    if not fuera.any():
+        return []
+    filas = df[fuera].assign(control="precios")
+    return [Problema(
+        "precios", "",
+        f"Precios fuera del rango [{parametros.get('minimo', 0.01)}, {parametros.get('maximo', np.inf)}]",
+        len(filas), _ejemplos(filas), filas,
+    )]
+
+
+def controlar_saltos(df: pd.DataFrame, parametros: Dict) -> List[Problema]:
+    """
+    Variaciones mensuales anómalas por serie: z-score robusto (mediana y MAD)
+    del logaritmo de la variación, que además debe superar factor_minimo
+    (por ejemplo, 3 = el precio se triplica o cae a un tercio).
+    """
+    umbral_z = parametros.get("umbral_z", 6.0)
+    factor = np.log(parametros.get("factor_minimo", 3.0))
+
+    series = df.groupby(COLUMNAS_SERIE, sort=False, observed=True).ngroup().to_numpy()
+    orden = np.lexsort((df["Date"].to_numpy(), series))
+    series = series[orden]
+    precios = df["Price"].to_numpy(dtype="float64")[orden]
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        variacion = np.log(precios[1:] / precios[:-1])
+    variacion[series[1:] != series[:-1]] = np.nan
+    variacion = np.concatenate(([np.nan], variacion))
+
+    grupos = pd.Series(variacion).groupby(series)
+    mediana = grupos.transform("median").to_numpy()
+    mad = pd.Series(np.abs(variacion - mediana)).groupby(series).transform("median").to_numpy()
+    with np.errstate(divide="ignore", invalid="ignore"):
+        z = 0.6745 * (variacion - mediana) / mad
+    saltos = (np.abs(z) > umbral_z) & (np.abs(variacion) >= factor)
+    if not saltos.any():
+        return []
+
+    filas = df.iloc[orden[saltos]].assign(
+        anterior=precios[np.flatnonzero(saltos) - 1], factor=np.exp(variacion[saltos]).round(2),
+        z=z[saltos].round(1), control="saltos",
+    )
+    return [Problema(
+        "saltos", "",
+        f"{len(filas)} variación(es) mensual(es) de al menos {parametros.get('factor_minimo', 3.0)}× "
+        f"con z-score robusto mayor a {umbral_z}",
+        len(filas), _ejemplos(filas.sort_values("factor", key=lambda f: -np.abs(np.log(f)))), filas,
+    )]
+
+
+@medir_etapa("validacion.validar")
+def validar(df: pd.DataFrame, reglas: Optional[Dict] = None) -> ReporteValidacion:
+    """
+    Aplica los controles configurados al DataFrame transformado, sin recorrer
+    filas: esquema, cobertura región × producto por mes, secuencia de meses,
+    rango de precios y saltos mensuales por serie.
+
+    Args:
+        df (pd.DataFrame): Datos transformados (con o sin columna 'sheet')
+        reglas (Optional[Dict]): Reglas de validación (por defecto, las de RUTA_REGLAS)
+
+    Returns:
+        ReporteValidacion: Problemas encontrados y precios marcados
+    """
+    inicio = time.perf_counter()
+    reglas = reglas or cargar_reglas()
+    controles = reglas.get("controles", {})
+    if "sheet" not in df.columns:
+        df = df.assign(sheet="Nacional")
+
+    problemas: List[Problema] = []
+    if "esquema" in controles:
+        problemas += _con_severidad(controlar_esquema(df, controles["esquema"]), "esquema", controles["esquema"])
+    if not any(p.control == "esquema" and p.filas == 0 for p in problemas):
+        df = df.dropna(subset=["Date"])
+        for control, funcion in (("cobertura", lambda p: controlar_cobertura(df, p, reglas["productos"])),
+                                 ("meses", lambda p: controlar_meses(df, p)),
+                                 ("precios", lambda p: controlar_precios(df, p)),
+                                 ("saltos", lambda p: controlar_saltos(df, p))):
+            if control in controles:
+                problemas += _con_severidad(funcion(controles[control]), control, controles[control])
+
+    marcadas = [problema.marcadas for problema in problemas if problema.marcadas is not None]
+    marcas = (pd.concat(marcadas, ignore_index=True) if marcadas
+              else pd.DataFrame(columns=COLUMNAS_SERIE + ["Date", "Price", "control"]))
+    reporte = ReporteValidacion(len(df), time.perf_counter() - inicio, problemas, marcas)
+    for problema in problemas:
+        registrar = logging.error if problema.severidad == "error" else logging.warning
+        registrar(f"Validación [{problema.control}]: {problema.mensaje}")
+    logging.info(
+        f"Validación completada en {reporte.segundos * 1000:.0f} ms: {len(reporte.errores)} error(es), "
+        f"{len(problemas) - len(reporte.errores)} advertencia(s)"
+    )
+    return reporte
+
+
+def _con_severidad(problemas: List[Problema], control: str, parametros: Dict) -> List[Problema]:
+    for problema in problemas:
+        problema.severidad = parametros.get("severidad", SEVERIDAD_POR_DEFECTO[control])
+    return problemas
+
+
+def main() -> None:
+    configurar_logging()
+    parser = argparse.ArgumentParser(description="Valida datos transformados (CSV, Parquet o almacén SQLite)")
+    parser.add_argument("datos", help="Archivo de datos transformados")
+    parser.add_argument("--reglas", default=RUTA_REGLAS, help="Archivo JSON de reglas")
+    parser.add_argument("--reporte", default=None, help="Archivo JSON donde guardar el reporte")
+    args = parser.parse_args()
+
+    from src.api import cargar_precios
+    reporte = validar(cargar_precios(args.datos), cargar_reglas(args.reglas))
+    if args.reporte:
+        reporte.guardar(args.reporte)
+    print(json.dumps(reporte.to_dict(), indent=2, ensure_ascii=False, default=str))
+    raise SystemExit(1 if reporte.bloquea_publicacion else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+"""Log de revisiones del almacén entre publicaciones."""
+import logging
+from typing import List
+
+import pandas as pd
+import pytest
+
+from src.almacen import AlmacenPrecios
+
+
+@pytest.fixture(autouse=True)
+def sin_logs():
+    logging.disable(logging.INFO)
+    yield
+    logging.disable(logging.NOTSET)
+
+
+def publicacion(precios: dict, fechas: List[str] = ("2024-01-01", "2024-02-01")) -> pd.DataFrame:
+    return pd.DataFrame([
+        {"sheet": "Nacional", "Región": "GBA", "Productos seleccionados": producto,
+         "Unidad de medida": "1 kg", "Date": fecha, "Price": precio}
+        for producto, precio in precios.items() for fecha in fechas
+    ])
+
+
+def tipos(almacen: AlmacenPrecios, corrida: str) -> List[tuple]:
+    revisiones = almacen.revisiones(corrida)
+    return sorted(zip(revisiones["Productos seleccionados"], revisiones["Date"].dt.strftime("%Y-%m"),
+                      revisiones["tipo"]))
+
+
+def test_revisiones_nuevos_revisados_y_eliminados(tmp_path):
+    almacen = AlmacenPrecios(str(tmp_path / "precios.sqlite"))
+    almacen.guardar(publicacion({"Papa": 10.0, "Azúcar": 5.0}), "c1")
+
+    resumen = almacen.guardar(publicacion({"Papa": 11.0}), "c2")
+
+    assert resumen == {"nuevos": 0, "revisados": 2, "eliminados": 2, "sin_cambios": 0}
+    assert tipos(almacen, "c2") == [
+        ("Azúcar", "2024-01", "eliminado"), ("Azúcar", "2024-02", "eliminado"),
+        ("Papa", "2024-01", "revisado"), ("Papa", "2024-02", "revisado"),
+    ]
+    # Los precios que dejaron de publicarse se conservan, pero no salen en las consultas por defecto
+    assert len(almacen.consultar(incluir_no_publicados=True)) == 4
+    assert almacen.consultar()["Productos seleccionados"].unique().tolist() == ["Papa"]
+
+
+def test_eliminados_se_registran_una_sola_vez(tmp_path):
+    almacen = AlmacenPrecios(str(tmp_path / "precios.sqlite"))
+    almacen.guardar(publicacion({"Papa": 10.0, "Azúcar": 5.0}), "c1")
+    almacen.guardar(publicacion({"Papa": 10.0}), "c2")
+
+    resumen = almacen.guardar(publicacion({"Papa": 10.0}), "c3")
+
+    assert resumen == {"nuevos": 0, "revisados": 0, "eliminados": 0, "sin_cambios": 2}
+    assert almacen.revisiones("c3").empty
+
+
+def test_precio_que_vuelve_a_publicarse(tmp_path):
+    almacen = AlmacenPrecios(str(tmp_path / "precios.sqlite"))
+    almacen.guardar(publicacion({"Papa": 10.0, "Azúcar": 5.0}), "c1")
+    almacen.guardar(publicacion({"Papa": 10.0}), "c2")
+
+    almacen.guardar(publicacion({"Papa": 10.0, "Azúcar": 6.0}), "c3")
+    almacen.guardar(publicacion({"Papa": 10.0}), "c4")
+
+    assert tipos(almacen, "c3") == [("Azúcar", "2024-01", "nuevo"), ("Azúcar", "2024-02", "nuevo")]
+    # Vuelve a estar publicado: si deja de publicarse otra vez se registra de nuevo
+    assert tipos(almacen, "c4") == [("Azúcar", "2024-01", "eliminado"), ("Azúcar", "2024-02", "eliminado")]
+    assert almacen.consultar(productos=["Azúcar"], incluir_no_publicados=True)["Price"].tolist() == [6.0, 6.0]
+
+
+def test_corridas_seguidas_no_comparten_revisiones(tmp_path):
+    almacen = AlmacenPrecios(str(tmp_path / "precios.sqlite"))
+    almacen.guardar(publicacion({"Papa": 10.0}))
+    primera = almacen.revisiones()
+
+    # En el mismo segundo: cada corrida tiene su propio identificador
+    almacen.guardar(publicacion({"Papa": 11.0}))
+    segunda = almacen.revisiones()
+
+    assert primera["corrida"].nunique() == segunda["corrida"].nunique() == 1
+    assert primera["corrida"][0] != segunda["corrida"][0]
+    assert set(primera["tipo"]) == {"nuevo"}
+    assert set(segunda["tipo"]) == {"revisado"}
@@ -0,0 +1,100 @@
+"""El cubo actualizado de forma incremental coincide con reconstruirlo desde el almacén."""
+import logging
+import sqlite3
+from contextlib import closing
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.almacen import AlmacenPrecios
+from src.analitica import CuboAnalitico
+
+REGIONES = ["GBA", "Cuyo", "Patagonia"]
+PRODUCTOS = ["Papa", "Azúcar", "Pan francés"]
+
+
+@pytest.fixture(autouse=True)
+def sin_logs():
+    logging.disable(logging.INFO)
+    yield
+    logging.disable(logging.NOTSET)
+
+
+def publicacion(meses: int, semilla: int = 0, productos=PRODUCTOS) -> pd.DataFrame:
+    rng = np.random.default_rng(semilla)
+    fechas = pd.date_range("2022-01-01", periods=meses, freq="MS")
+    filas = [
+        {"sheet": sheet, "Región": region, "Productos seleccionados": producto, "Unidad de medida": "1 kg",
+         "Date": fecha, "Price": round(float(rng.uniform(100, 1000)), 2)}
+        for sheet in ("Nacional", "GBA") for region in REGIONES for producto in productos for fecha in fechas
+    ]
+    return pd.DataFrame(filas)
+
+
+def leer_cubo(ruta: str) -> pd.DataFrame:
+    with closing(sqlite3.connect(ruta)) as con:
+        df = pd.read_sql_query("SELECT * FROM cubo", con)
+    return df.sort_values(["sheet", "nivel", "region", "producto", "date"]).reset_index(drop=True)
+
+
+def test_incremental_igual_a_reconstruccion(tmp_path):
+    ruta = str(tmp_path / "precios.sqlite")
+    almacen = AlmacenPrecios(ruta)
+    cubo = CuboAnalitico(ruta)
+
+    almacen.guardar(publicacion(24), "c1")
+    cubo.sincronizar(almacen, almacen.revisiones("c1"))
+
+    # Nueva publicación: un mes más, precios viejos revisados, un producto que deja
+    # de publicarse (queda en el almacén pero sale del cubo) y uno nuevo
+    siguiente = publicacion(25, semilla=1, productos=["Papa", "Azúcar", "Fideos secos tipo guisero"])
+    anterior = publicacion(24)
+    claves = ["sheet", "Región", "Productos seleccionados", "Date"]
+    siguiente = siguiente.merge(anterior[claves + ["Price"]], on=claves, how="left", suffixes=("", "_anterior"))
+    revisar = siguiente["Date"].isin(pd.to_datetime(["2022-03-01", "2023-06-01"]))
+    siguiente["Price"] = np.where(revisar | siguiente["Price_anterior"].isna(),
+                                  siguiente["Price"], siguiente["Price_anterior"])
+    almacen.guardar(siguiente.drop(columns="Price_anterior"), "c2")
+    revisiones = almacen.revisiones("c2")
+    assert set(revisiones["tipo"]) == {"nuevo", "revisado", "eliminado"}
+    cubo.sincronizar(almacen, revisiones)
+
+    # Una corrida sin cambios no toca el cubo
+    almacen.guardar(siguiente.drop(columns="Price_anterior"), "c3")
+    assert cubo.sincronizar(almacen, almacen.revisiones("c3")) == {
+        "nuevos": 0, "revisados": 0, "eliminados": 0, "variaciones": 0,
+    }
+
+    ruta_reconstruido = str(tmp_path / "reconstruido.sqlite")
+    CuboAnalitico(ruta_reconstruido).actualizar(almacen.consultar())
+    pd.testing.assert_frame_equal(leer_cubo(ruta), leer_cubo(ruta_reconstruido))
+
+
+def test_precio_que_deja_de_publicarse_sale_del_cubo(tmp_path):
+    ruta = str(tmp_path / "precios.sqlite")
+    almacen = AlmacenPrecios(ruta)
+    cubo = CuboAnalitico(ruta)
+    datos = publicacion(14)
+    almacen.guardar(datos, "c1")
+    cubo.sincronizar(almacen, almacen.revisiones("c1"))
+
+    quitar = ((datos["sheet"] == "Nacional") & (datos["Región"] == "Cuyo")
+              & (datos["Productos seleccionados"] == "Pan francés") & (datos["Date"] == "2023-01-01"))
+    almacen.guardar(datos[~quitar], "c2")
+    resumen = cubo.sincronizar(almacen, almacen.revisiones("c2"))
+
+    assert resumen["eliminados"] == 1
+    cubo_final = leer_cubo(ruta).set_index(["sheet", "nivel", "region", "producto", "date"])
+    restantes = datos[(datos["sheet"] == "Nacional") & (datos["Región"] == "Cuyo")
+                      & (datos["Date"] == "2023-01-01") & ~quitar]
+    assert cubo_final.loc[("Nacional", "region", "Cuyo", "", "2023-01-01"), "promedio"] == pytest.approx(
+        restantes["Price"].mean(), abs=1e-4)
+    assert ("Nacional", "region_producto", "Cuyo", "Pan francés", "2023-01-01") not in cubo_final.index
+    # El mes siguiente se queda sin referencia para la variación mensual
+    assert np.isnan(cubo_final.loc[("Nacional", "region_producto", "Cuyo", "Pan francés", "2023-02-01"),
+                                   "var_mensual"])
+
+    ruta_reconstruido = str(tmp_path / "reconstruido.sqlite")
+    CuboAnalitico(ruta_reconstruido).actualizar(almacen.consultar())
+    pd.testing.assert_frame_equal(leer_cubo(ruta), leer_cubo(ruta_reconstruido))
@@ -0,0 +1,88 @@
+"""Recarga de los datos de la API de consultas."""
+import asyncio
+import json
+import logging
+import os
+import threading
+
+import pandas as pd
+import pytest
+
+from src.api import DatosConsulta, ServidorConsultas
+
+
+@pytest.fixture(autouse=True)
+def sin_logs():
+    logging.disable(logging.INFO)
+    yield
+    logging.disable(logging.NOTSET)
+
+
+def escribir_precios(ruta: str, precio: float, mtime: float) -> None:
+    pd.DataFrame([
+        {"sheet": "Nacional", "Región": "GBA", "Productos seleccionados": "Papa", "Unidad de medida": "1 kg",
+         "Date": fecha, "Price": precio}
+        for fecha in ("2024-01-01", "2024-02-01")
+    ]).to_csv(ruta, index=False)
+    os.utime(ruta, (mtime, mtime))
+
+
+def precios_servidos(servidor: ServidorConsultas) -> list:
+    respuesta = servidor._responder("GET", "/series?producto=Papa", {}, True)
+    return [fila["Price"] for fila in json.loads(respuesta.split(b"\r\n\r\n", 1)[1])]
+
+
+def test_recarga_se_aplica_en_el_event_loop(tmp_path):
+    ruta = str(tmp_path / "precios.csv")
+    escribir_precios(ruta, 10.0, 1_000_000)
+    datos = DatosConsulta(ruta)
+    servidor = ServidorConsultas(datos, intervalo_recarga=0)
+    hilos_aplicar = []
+    aplicar = datos.aplicar
+
+    def registrar(carga):
+        hilos_aplicar.append(threading.current_thread())
+        aplicar(carga)
+
+    datos.aplicar = registrar
+
+    async def escenario():
+        assert precios_servidos(servidor) == [10.0, 10.0]
+        escribir_precios(ruta, 20.0, 2_000_000)
+        # Mientras se recarga se sigue respondiendo (con los datos anteriores o los nuevos)
+        assert precios_servidos(servidor) in ([10.0, 10.0], [20.0, 20.0])
+        assert servidor._recargando or hilos_aplicar
+        for _ in range(500):
+            if not servidor._recargando:
+                break
+            precios_servidos(servidor)
+            await asyncio.sleep(0.01)
+        return threading.current_thread()
+
+    hilo_loop = asyncio.run(escenario())
+
+    assert hilos_aplicar == [hilo_loop]
+    # Ninguna respuesta con los datos anteriores quedó en la caché
+    assert precios_servidos(servidor) == [20.0, 20.0]
+    assert not datos.cambiaron()
+
+
+def test_error_al_recargar_mantiene_los_datos(tmp_path):
+    ruta = str(tmp_path / "precios.csv")
+    escribir_precios(ruta, 10.0, 1_000_000)
+    servidor = ServidorConsultas(DatosConsulta(ruta), intervalo_recarga=0)
+
+    async def escenario():
+        with open(ruta, "w") as archivo:
+            archivo.write("no es un csv de precios\n")
+        os.utime(ruta, (2_000_000, 2_000_000))
+        precios_servidos(servidor)
+        for _ in range(500):
+            if not servidor._recargando:
+                break
+            await asyncio.sleep(0.01)
+        # La recarga falló: se siguen sirviendo los datos anteriores
+        assert not servidor._recargando
+        assert precios_servidos(servidor) == [10.0, 10.0]
+
+    asyncio.run(escenario())
@@ -0,0 +1,63 @@
+"""Escritura atómica de archivos."""
+import os
+import stat
+import sys
+
+import pytest
+
+from src.cache import _leer_umask, escribir_atomico, ruta_atomica, umask_proceso
+
+pytestmark = pytest.mark.skipif(sys.platform == "win32", reason="Permisos POSIX")
+
+
+def permisos(ruta) -> int:
+    return stat.S_IMODE(os.stat(ruta).st_mode)
+
+
+def test_archivo_nuevo_con_permisos_por_defecto(tmp_path):
+    ruta = tmp_path / "salida.csv"
+
+    escribir_atomico(str(ruta), b"a,b\n1,2\n")
+
+    assert ruta.read_bytes() == b"a,b\n1,2\n"
+    # Los mismos permisos que un archivo creado con open()
+    referencia = tmp_path / "referencia.csv"
+    referencia.write_bytes(b"")
+    assert permisos(ruta) == permisos(referencia) == 0o666 & ~umask_proceso()
+
+
+def test_umask_sin_modificarla():
+    anterior = os.umask(0o027)
+    try:
+        # Leída de /proc/self/status en Linux, sin cambiarla
+        assert _leer_umask() == 0o027
+        assert os.umask(0o027) == 0o027
+    finally:
+        os.umask(anterior)
+
+
+def test_conserva_los_permisos_del_archivo_reemplazado(tmp_path):
+    ruta = tmp_path / "estado.json"
+    ruta.write_bytes(b"{}")
+    os.chmod(ruta, 0o640)
+
+    with ruta_atomica(str(ruta)) as temporal:
+        with open(temporal, "wb") as archivo:
+            archivo.write(b'{"a": 1}')
+
+    assert ruta.read_bytes() == b'{"a": 1}'
+    assert permisos(ruta) == 0o640
+
+
+def test_error_no_deja_temporales(tmp_path):
+    ruta = tmp_path / "salida.parquet"
+    ruta.write_bytes(b"anterior")
+
+    with pytest.raises(RuntimeError):
+        with ruta_atomica(str(ruta)) as temporal:
+            with open(temporal, "wb") as archivo:
+                archivo.write(b"a medias")
+            raise RuntimeError("falla al escribir")
+
+    assert ruta.read_bytes() == b"anterior"
+    assert os.listdir(tmp_path) == ["salida.parquet"]
@@ -0,0 +1,110 @@
+"""Reintentos, tope de tamaño y progreso del cliente HTTP frente a un servidor local inestable."""
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from http.server import ThreadingHTTPServer
+
+import pytest
+import requests
+
+from benchmarks.bench_http import CUERPO, ServidorInestable
+from src.cliente_http import ClienteHTTP, DescargaExcedida
+
+
+@pytest.fixture(autouse=True)
+def sin_logs():
+    logging.disable(logging.WARNING)
+    yield
+    logging.disable(logging.NOTSET)
+
+
+@pytest.fixture(scope="module")
+def base():
+    servidor = ThreadingHTTPServer(("127.0.0.1", 0), ServidorInestable)
+    threading.Thread(target=servidor.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{servidor.server_address[1]}"
+    servidor.shutdown()
+    servidor.server_close()
+
+
+@pytest.fixture
+def esperas():
+    return []
+
+
+@pytest.fixture
+def cliente(esperas):
+    with ClienteHTTP(timeout=(1.0, 1.0), espera_base=0.05, dormir=esperas.append, aleatorio=lambda: 0.5) as cliente:
+        yield cliente
+
+
+def test_reintenta_503(base, cliente, esperas):
+    with cliente.descargar(f"{base}/caido/2/reintenta_503.xls") as respuesta:
+        assert respuesta.estado == 200
+        assert respuesta.tamano == len(CUERPO)
+        assert respuesta.archivo.read() == CUERPO
+    assert cliente.registros[-1]["intentos"] == 3
+    # Retry-After: 0 tiene prioridad sobre la espera exponencial
+    assert esperas == [0.0, 0.0]
+
+
+def test_agota_los_reintentos(base, esperas):
+    cliente = ClienteHTTP(reintentos=2, dormir=esperas.append)
+
+    with cliente.descargar(f"{base}/caido/5/agota.xls") as respuesta:
+        assert respuesta.estado == 503
+        assert respuesta.tamano == 0
+    assert cliente.registros[-1]["intentos"] == 3
+
+
+def test_plazo_corta_los_reintentos(base, esperas):
+    cliente = ClienteHTTP(espera_base=5.0, plazo=1.0, dormir=esperas.append, aleatorio=lambda: 1.0)
+
+    # La primera espera (5s) ya supera el plazo: el corte se propaga sin reintentar
+    with pytest.raises(requests.RequestException):
+        cliente.descargar(f"{base}/cortado/1/plazo.xls")
+    assert esperas == []
+
+
+def test_reintenta_cuerpo_cortado(base, cliente, esperas):
+    progreso = []
+
+    with cliente.descargar(f"{base}/cortado/1/cortado.xls",
+                           progreso=lambda recibidos, total: progreso.append((recibidos, total))) as respuesta:
+        assert respuesta.estado == 200
+        assert respuesta.archivo.read() == CUERPO
+    assert cliente.registros[-1]["intentos"] == 2
+    # Espera exponencial con jitter: aleatorio() * espera_base
+    assert esperas == [0.025]
+    # El segundo intento vuelve a informar desde cero y llega al total
+    assert progreso[-1] == (len(CUERPO), len(CUERPO))
+
+
+def test_tope_de_tamano(base):
+    cliente = ClienteHTTP(tamano_maximo=len(CUERPO))
+
+    with pytest.raises(DescargaExcedida):
+        cliente.descargar(f"{base}/grande/0/grande.xls")
+    with cliente.descargar(f"{base}/cortado/0/justo.xls") as respuesta:
+        assert respuesta.tamano == len(CUERPO)
+
+
+def test_retry_after_negativo():
+    cliente = ClienteHTTP()
+    respuesta = requests.Response()
+    respuesta.headers["Retry-After"] = "-5"
+
+    assert cliente._espera(0, respuesta) == 0.0
+
+
+def test_tamano_de_cada_descarga_en_paralelo(base, cliente):
+    def descargar(i: int):
+        url = f"{base}/ok/0/paralelo-{i}.xls" if i % 2 else f"{base}/cortado/0/paralelo-{i}.xls"
+        with cliente.descargar(url) as respuesta:
+            return respuesta.tamano, len(respuesta.archivo.read())
+
+    with ThreadPoolExecutor(8) as pool:
+        tamanos = list(pool.map(descargar, range(32)))
+
+    assert all(tamano == leidos for tamano, leidos in tamanos)
+    assert {tamano for tamano, _ in tamanos} == {1024, len(CUERPO)}
@@ -0,0 +1,91 @@
+"""Resultado de run(), código de salida del comando 'all' y subcomando transform."""
+import logging
+import os
+import subprocess
+import sys
+
+import pandas as pd
+import pytest
+
+from benchmarks.libro_sintetico import generar_libro
+from src import main
+from src.main import ResultadoCorrida, run
+
+
+@pytest.fixture(autouse=True)
+def sin_logs():
+    logging.disable(logging.CRITICAL)
+    yield
+    logging.disable(logging.NOTSET)
+
+
+@pytest.fixture
+def publicaciones(monkeypatch):
+    llamadas = []
+    monkeypatch.setattr(main, "publicar", lambda *args, **kwargs: llamadas.append(args) or True)
+    return llamadas
+
+
+def test_run_con_libro_local(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    generar_libro("libro.xls", anios=2)
+
+    resultado = run(entrada="libro.xls", workers=1, bloquear_invalidos=False)
+
+    assert resultado.exito
+    assert resultado.ruta_almacen == "data/precios.sqlite"
+    assert set(resultado.df["sheet"]) >= {"Nacional", "GBA"}
+    # Sigue desempaquetándose como la tupla (df, ruta_almacen)
+    df, ruta_almacen = resultado
+    assert df is resultado.df and ruta_almacen == "data/precios.sqlite"
+
+
+def test_run_falla_sin_libro(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+
+    assert run(entrada="no_existe.xls") == ResultadoCorrida(exito=False)
+
+
+def test_all_falla_sin_publicar(monkeypatch, publicaciones):
+    monkeypatch.setattr(main, "run", lambda *args, **kwargs: ResultadoCorrida(exito=False))
+
+    with pytest.raises(SystemExit) as salida:
+        main.main(["all"])
+
+    assert salida.value.code == 1
+    assert publicaciones == []
+
+
+def test_all_sin_datos_nuevos_termina_bien(monkeypatch, publicaciones):
+    monkeypatch.setattr(main, "run", lambda *args, **kwargs: ResultadoCorrida(exito=True))
+
+    main.main(["all"])
+
+    assert publicaciones == [()]
+
+
+def test_transform_streaming_da_las_mismas_filas(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    generar_libro("libro.xls", anios=2)
+    claves = ["sheet", "product_id", "Date"]
+
+    main.main(["transform", "--input", "libro.xls", "--workers", "1", "--ignorar-validacion",
+               "--out", "en_memoria.parquet"])
+    main.main(["transform", "--input", "libro.xls", "--streaming", "--ignorar-validacion",
+               "--out", "por_lotes.parquet"])
+
+    esperado = pd.read_parquet("en_memoria.parquet").sort_values(claves, ignore_index=True)
+    obtenido = pd.read_parquet("por_lotes.parquet").sort_values(claves, ignore_index=True)
+    pd.testing.assert_frame_equal(obtenido, esperado)
+
+
+def test_transform_local_no_importa_requests(tmp_path):
+    generar_libro(str(tmp_path / "libro.xls"), anios=1)
+    codigo = (
+        "import sys; from src import main; "
+        "main.main(['transform', '--input', 'libro.xls', '--workers', '1', '--ignorar-validacion']); "
+        "sys.exit('requests' in sys.modules)"
+    )
+    entorno = dict(os.environ, PYTHONPATH=os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+    assert subprocess.run([sys.executable, "-c", codigo], cwd=tmp_path, env=entorno).returncode == 0
@@ -0,0 +1,148 @@
+"""Espera entre sondeos del planificador mientras el INDEC no publica el informe."""
+import logging
+from datetime import datetime
+from typing import List, Optional
+
+import pytest
+
+from src.planificador import DIA, ZONA_INDEC, Planificador
+
+FECHA = "2024-03-14"
+PUBLICACION = datetime(2024, 3, 14, 16, 0, tzinfo=ZONA_INDEC).timestamp()
+
+
+@pytest.fixture(autouse=True)
+def sin_logs():
+    logging.disable(logging.INFO)
+    yield
+    logging.disable(logging.NOTSET)
+
+
+class FuenteFalsa:
+    def __init__(self, fecha: Optional[str] = FECHA):
+        self.fecha = fecha
+        self.novedades = False
+        self.consultas_fecha = 0
+        self.sondeos: List[str] = []
+
+    def fecha_proximo_informe(self) -> Optional[str]:
+        self.consultas_fecha += 1
+        return self.fecha
+
+    def url_excel(self) -> str:
+        return "https://www.indec.gob.ar/precios.xls"
+
+    def hay_novedades(self, url: str) -> bool:
+        self.sondeos.append(url)
+        return self.novedades
+
+
+class Reloj:
+    def __init__(self, ahora: float):
+        self.ahora = ahora
+
+    def __call__(self) -> float:
+        return self.ahora
+
+
+def crear_planificador(tmp_path, fuente: FuenteFalsa, reloj: Reloj, ejecutar=lambda: True) -> Planificador:
+    return Planificador(fuente=fuente, ejecutar=ejecutar, ruta_estado=str(tmp_path / "estado.json"), reloj=reloj,
+                        anticipacion=3600.0, espera_inicial=300.0, espera_maxima=1800.0,
+                        espera_sin_fecha=6 * 3600.0, dias_ventana=3, aleatorio=lambda: 0.5)
+
+
+def sondear(planificador: Planificador, reloj: Reloj, pasos: int) -> List[float]:
+    """Ejecuta pasos seguidos, avanzando el reloj lo que pide cada uno."""
+    esperas = []
+    for _ in range(pasos):
+        espera = planificador.paso()
+        esperas.append(espera)
+        reloj.ahora += espera
+    return esperas
+
+
+def test_duerme_hasta_el_inicio_del_sondeo(tmp_path):
+    fuente = FuenteFalsa()
+    reloj = Reloj(PUBLICACION - 3 * 3600)
+    planificador = crear_planificador(tmp_path, fuente, reloj)
+
+    assert planificador.paso() == pytest.approx(2 * 3600)
+    assert fuente.sondeos == []
+
+
+def test_espera_exponencial_mientras_la_fecha_no_cambia(tmp_path):
+    fuente = FuenteFalsa()
+    reloj = Reloj(PUBLICACION - 1800)
+    planificador = crear_planificador(tmp_path, fuente, reloj)
+
+    esperas = sondear(planificador, reloj, 12)
+
+    # Fija hasta la hora de publicación; desde ahí se duplica hasta el tope
+    assert esperas == pytest.approx([300.0] * 6 + [600.0, 1200.0] + [1800.0] * 4)
+    assert len(fuente.sondeos) == 12
+    assert fuente.consultas_fecha == 1
+
+
+def test_consultar_la_misma_fecha_no_reinicia_la_espera(tmp_path):
+    fuente = FuenteFalsa()
+    reloj = Reloj(PUBLICACION)
+    planificador = crear_planificador(tmp_path, fuente, reloj)
+    sondear(planificador, reloj, 4)
+
+    # Pasó un día: se vuelve a consultar la fecha, que sigue siendo la misma
+    reloj.ahora = PUBLICACION + DIA
+    assert planificador.paso() == pytest.approx(1800.0)
+    assert fuente.consultas_fecha == 2
+
+    # Pasada la ventana de días se sondea cada espera_sin_fecha
+    reloj.ahora = PUBLICACION + 3 * DIA
+    assert planificador.paso() == pytest.approx(6 * 3600.0)
+
+
+def test_fecha_nueva_reinicia_la_espera(tmp_path):
+    fuente = FuenteFalsa()
+    reloj = Reloj(PUBLICACION)
+    planificador = crear_planificador(tmp_path, fuente, reloj)
+    sondear(planificador, reloj, 4)
+
+    fuente.fecha = "2024-03-15"
+    reloj.ahora = PUBLICACION + DIA
+    assert planificador.paso() == pytest.approx(300.0)
+    assert planificador.estado["proxima_fecha"] == "2024-03-15"
+
+
+def test_procesa_y_espera_la_fecha_siguiente(tmp_path):
+    fuente = FuenteFalsa()
+    reloj = Reloj(PUBLICACION)
+    ejecuciones = []
+    planificador = crear_planificador(tmp_path, fuente, reloj, ejecutar=lambda: ejecuciones.append(1) or True)
+    sondear(planificador, reloj, 3)
+
+    fuente.novedades = True
+    assert planificador.paso() == 0.0
+    assert ejecuciones == [1]
+    assert planificador.estado["fecha_procesada"] == FECHA
+
+    # El INDEC todavía no anunció el informe siguiente: no se sondea
+    assert planificador.paso() == 6 * 3600.0
+    assert len(fuente.sondeos) == 4
+
+
+def test_pipeline_fallido_sigue_sondeando(tmp_path):
+    fuente = FuenteFalsa()
+    fuente.novedades = True
+    reloj = Reloj(PUBLICACION)
+    planificador = crear_planificador(tmp_path, fuente, reloj, ejecutar=lambda: False)
+
+    assert sondear(planificador, reloj, 3) == pytest.approx([300.0, 600.0, 1200.0])
+    assert "fecha_procesada" not in planificador.estado
+
+
+def test_estado_persistente(tmp_path):
+    fuente = FuenteFalsa()
+    reloj = Reloj(PUBLICACION)
+    sondear(crear_planificador(tmp_path, fuente, reloj), reloj, 3)
+
+    # Un proceso nuevo retoma la espera donde quedó
+    assert crear_planificador(tmp_path, fuente, reloj).paso() == pytest.approx(1800.0)
+    assert fuente.consultas_fecha == 1
@@ -0,0 +1,76 @@
+"""Worker de la bandeja de salida frente a los límites de uso de la API."""
+import asyncio
+import logging
+from typing import List
+
+import pytest
+
+from src.publicar import BandejaSalida, LimiteExcedido, PublicadorAsync
+
+
+@pytest.fixture(autouse=True)
+def sin_logs():
+    logging.disable(logging.WARNING)
+    yield
+    logging.disable(logging.NOTSET)
+
+
+class Reloj:
+    def __init__(self, ahora: float = 1_000_000.0):
+        self.ahora = ahora
+
+    def __call__(self) -> float:
+        return self.ahora
+
+    async def dormir(self, segundos: float) -> None:
+        self.ahora += segundos
+
+
+class ClienteConLimite:
+    """Responde 429 hasta la hora de reinicio y después publica."""
+
+    def __init__(self, reloj: Reloj, reinicio: float):
+        self.reloj = reloj
+        self.reinicio = reinicio
+        self.rechazos: List[float] = []
+        self.publicados: List[str] = []
+
+    def publicar(self, texto: str) -> str:
+        if self.reloj() < self.reinicio:
+            self.rechazos.append(self.reloj())
+            raise LimiteExcedido(self.reinicio - self.reloj())
+        self.publicados.append(texto)
+        return str(len(self.publicados))
+
+
+def test_limite_pausa_todo_el_worker(tmp_path):
+    reloj = Reloj()
+    bandeja = BandejaSalida(str(tmp_path / "publicaciones.sqlite"), reloj=reloj)
+    bandeja.encolar("Nacional:2024-01", "Enero")
+    reloj.ahora += 1
+    bandeja.encolar("Nacional:2024-02", "Febrero")
+    inicio = reloj()
+    cliente = ClienteConLimite(reloj, reinicio=inicio + 900)
+
+    resumen = asyncio.run(PublicadorAsync(bandeja, cliente, dormir=reloj.dormir).drenar())
+
+    # Un solo 429: el segundo mensaje espera el reinicio en lugar de chocar con el límite
+    assert cliente.rechazos == [inicio]
+    assert sorted(cliente.publicados) == ["Enero", "Febrero"]
+    assert reloj() == inicio + 900
+    assert resumen == {"publicados": 2, "fallidos": 0, "pendientes": 0}
+    # El límite no cuenta como intento: solo el envío que publicó
+    assert bandeja.estado("Nacional:2024-01")["intentos"] == 1
+
+
+def test_limite_mas_alla_del_tope_deja_pendientes(tmp_path):
+    reloj = Reloj()
+    bandeja = BandejaSalida(str(tmp_path / "publicaciones.sqlite"), reloj=reloj)
+    bandeja.encolar("Nacional:2024-01", "Enero")
+    bandeja.encolar("Nacional:2024-02", "Febrero")
+    cliente = ClienteConLimite(reloj, reinicio=reloj() + 900)
+
+    resumen = asyncio.run(PublicadorAsync(bandeja, cliente, dormir=reloj.dormir).drenar(limite=600))
+
+    assert len(cliente.rechazos) == 1
+    assert resumen == {"publicados": 0, "fallidos": 0, "pendientes": 2}
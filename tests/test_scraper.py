@@ -0,0 +1,131 @@
+"""Descarga condicional del Excel con la caché de descargas y descubrimiento sin Playwright."""
+import logging
+import sys
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List
+
+import pytest
+
+from benchmarks.libro_sintetico import generar_libro
+from src.cache import CacheDescargas
+from src.cliente_http import ClienteHTTP
+from src.scraper import IndecScraper
+
+
+@pytest.fixture(autouse=True)
+def sin_logs():
+    logging.disable(logging.INFO)
+    yield
+    logging.disable(logging.NOTSET)
+
+
+class ServidorExcel(BaseHTTPRequestHandler):
+    """Sirve un libro con ETag y responde 304 a las peticiones con el ETag vigente."""
+    protocol_version = "HTTP/1.1"
+    libro = b""
+    etag = '"v1"'
+    peticiones: List[Dict[str, str]] = []
+
+    def log_message(self, *args) -> None:
+        pass
+
+    def do_GET(self) -> None:
+        self.peticiones.append(dict(self.headers))
+        if self.headers.get("If-None-Match") == self.etag:
+            self.send_response(304)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        self.send_response(200)
+        self.send_header("ETag", self.etag)
+        self.send_header("Content-Length", str(len(self.libro)))
+        self.end_headers()
+        self.wfile.write(self.libro)
+
+
+@pytest.fixture
+def url(tmp_path):
+    ruta = tmp_path / "libro.xls"
+    generar_libro(str(ruta), anios=2)
+    ServidorExcel.libro = ruta.read_bytes()
+    ServidorExcel.etag = '"v1"'
+    ServidorExcel.peticiones = []
+    servidor = ThreadingHTTPServer(("127.0.0.1", 0), ServidorExcel)
+    threading.Thread(target=servidor.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{servidor.server_address[1]}/precios.xls"
+    servidor.shutdown()
+    servidor.server_close()
+
+
+def crear_scraper(cache: CacheDescargas = None) -> IndecScraper:
+    return IndecScraper(estrategia_descubrimiento="http", cache_descargas=cache,
+                        cliente_http=ClienteHTTP(dormir=lambda segundos: None))
+
+
+def test_304_reutiliza_la_cache(tmp_path, url):
+    cache = CacheDescargas(str(tmp_path / "cache"))
+    scraper = crear_scraper(cache)
+
+    primera = scraper.descargar_excel(url)
+    scraper.marcar_procesado(primera)
+    segunda = scraper.descargar_excel(url)
+
+    assert not primera.desde_cache and not primera.ya_procesada
+    assert "If-None-Match" not in ServidorExcel.peticiones[0]
+    assert ServidorExcel.peticiones[1]["If-None-Match"] == '"v1"'
+    assert segunda.desde_cache and segunda.ya_procesada
+    assert segunda.sha256 == primera.sha256
+    # El cuerpo queda en la caché y se lee desde disco
+    assert segunda.contenido is None
+    with open(segunda.ruta, "rb") as archivo:
+        assert archivo.read() == ServidorExcel.libro
+    assert list(scraper.leer_hojas_compatibles(segunda.fuente, ["Nacional"])) == ["Nacional"]
+
+
+def test_contenido_nuevo_no_esta_procesado(tmp_path, url):
+    cache = CacheDescargas(str(tmp_path / "cache"))
+    scraper = crear_scraper(cache)
+    scraper.marcar_procesado(scraper.descargar_excel(url))
+
+    ServidorExcel.etag = '"v2"'
+    ServidorExcel.libro += b"\0"
+    descarga = scraper.descargar_excel(url)
+
+    assert not descarga.desde_cache and not descarga.ya_procesada
+    assert cache.entrada(url)["etag"] == '"v2"'
+    assert descarga.tamano == len(ServidorExcel.libro)
+
+
+def test_cache_corrupta_descarga_de_nuevo(tmp_path, url):
+    cache = CacheDescargas(str(tmp_path / "cache"))
+    scraper = crear_scraper(cache)
+    primera = scraper.descargar_excel(url)
+    with open(primera.ruta, "ab") as archivo:
+        archivo.write(b"basura")
+
+    descarga = scraper.descargar_excel(url)
+
+    # 304 con la caché inválida: se repite la descarga sin cabeceras condicionales
+    assert [p.get("If-None-Match") for p in ServidorExcel.peticiones] == [None, '"v1"', None]
+    assert not descarga.desde_cache
+    assert descarga.sha256 == primera.sha256
+
+
+def test_sin_cache(url):
+    scraper = crear_scraper()
+
+    descarga = scraper.descargar_excel(url)
+
+    assert descarga.tamano == len(ServidorExcel.libro)
+    assert not descarga.desde_cache
+    assert list(scraper.leer_hojas_compatibles(descarga.fuente, ["Nacional"])) == ["Nacional"]
+
+
+def test_navegador_sin_playwright(monkeypatch):
+    # None en sys.modules hace que el import falle como si no estuviera instalado
+    monkeypatch.setitem(sys.modules, "playwright", None)
+    scraper = IndecScraper(estrategia_descubrimiento="navegador")
+
+    assert scraper.obtener_url_excel() is None
+    assert scraper.obtener_fecha_proximo_informe() is None
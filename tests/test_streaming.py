@@ -0,0 +1,77 @@
+"""
+La transformación por lotes de src/streaming.py da las mismas filas, valores y
+tipos que TransformadorDatos sobre libros XLS y XLSX generados con
+benchmarks/libro_sintetico.py, con lotes chicos para que cada hoja se parta.
+"""
+import logging
+from typing import Dict, List
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from benchmarks.libro_sintetico import escribir_libro, generar_hoja, generar_libro
+from src.pipeline import transformar_hojas
+from src.streaming import TransformadorStreaming, transformar_libro_streaming
+from src.transformaciones import TransformadorDatos
+
+REGIONES_HOJA = ["GBA", "Noreste", "Patagonia"]
+PRODUCTOS_HOJA = ["Papa", "Azúcar", "Pan francés"]
+
+DISPOSICIONES = {
+    "estandar": {},
+    "encabezados_corridos": {"filas_titulo": 4, "vacias_intermedias": 2},
+    "inicio_a_mitad_de_anio": {"mes_inicio": 7, "marcadores_sin_prefijo": True, "notas": 3},
+}
+
+
+@pytest.fixture(autouse=True)
+def sin_logs():
+    logging.disable(logging.WARNING)
+    yield
+    logging.disable(logging.NOTSET)
+
+
+def ordenar(df: pd.DataFrame, claves: List[str]) -> pd.DataFrame:
+    return df.sort_values(claves).reset_index(drop=True)
+
+
+def escribir(tmp_path, formato: str, hojas: Dict[str, List[List]]) -> str:
+    ruta = str(tmp_path / f"libro.{formato}")
+    escribir_libro(ruta, hojas)
+    return ruta
+
+
+@pytest.mark.parametrize("formato", ["xls", "xlsx"])
+@pytest.mark.parametrize("nombre", DISPOSICIONES)
+def test_hoja_por_lotes_igual_a_transformador(tmp_path, formato, nombre):
+    # Con precios faltantes: el relleno por lotes tiene que dar lo mismo que sobre la hoja completa
+    filas = generar_hoja(REGIONES_HOJA, PRODUCTOS_HOJA, 2020, 15, 0.2, np.random.default_rng(7),
+                         **DISPOSICIONES[nombre])
+    ruta = escribir(tmp_path, formato, {"Nacional": filas})
+
+    transformador = TransformadorStreaming(ruta, "Nacional", tamano_lote=40)
+    resumen = transformador.inspeccionar()
+    lotes = list(transformador.lotes())
+
+    assert len(resumen["series"]) == len(REGIONES_HOJA) * len(PRODUCTOS_HOJA)
+    assert len(lotes) > 1
+    esperado = TransformadorDatos(pd.read_excel(ruta, sheet_name="Nacional")).identificar_encabezados()
+    claves = ["Date", "product_id"]
+    pd.testing.assert_frame_equal(ordenar(pd.concat(lotes, ignore_index=True), claves), ordenar(esperado, claves),
+                                  check_exact=True)
+
+
+@pytest.mark.parametrize("formato", ["xls", "xlsx"])
+def test_libro_por_lotes_igual_a_transformar_hojas(tmp_path, formato):
+    ruta = str(tmp_path / f"libro.{formato}")
+    generar_libro(ruta, anios=2, productos=5, semilla=2, peculiaridades=True)
+
+    lotes = list(transformar_libro_streaming(ruta, tamano_lote=200))
+
+    hojas = {hoja: df for hoja, df in pd.read_excel(ruta, sheet_name=None).items()
+             if TransformadorDatos.es_hoja_compatible(df)}
+    esperado = transformar_hojas(hojas, workers=1)
+    claves = ["sheet", "Date", "product_id"]
+    pd.testing.assert_frame_equal(ordenar(pd.concat(lotes, ignore_index=True), claves), ordenar(esperado, claves),
+                                  check_exact=True)
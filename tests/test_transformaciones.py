@@ -0,0 +1,168 @@
+"""
+TransformadorDatos y la detección de la disposición de las hojas sobre libros
+generados con benchmarks/libro_sintetico.py: encabezados corridos, filas en
+blanco en distintas posiciones y filas extra al final. Cada caso compara el
+resultado con el DataFrame esperado armado directamente desde las filas escritas.
+"""
+import logging
+from typing import Dict, List
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from benchmarks.libro_sintetico import REGIONES, PRODUCTOS, escribir_libro, generar_hoja, generar_libro
+from src.transformaciones import TransformadorDatos, compactar, detectar_disposicion
+
+REGIONES_HOJA = ["GBA", "Noreste", "Patagonia"]
+PRODUCTOS_HOJA = ["Papa", "Azúcar", "Pan francés"]
+
+# Disposiciones de la hoja: filas de título (la fila de encabezados queda debajo),
+# filas en blanco tras los meses e intercaladas entre los datos, notas al pie,
+# mes inicial y formato de los marcadores de año
+DISPOSICIONES = {
+    "estandar": {},
+    "un_titulo": {"filas_titulo": 1},
+    "encabezados_corridos": {"filas_titulo": 4},
+    "sin_vacias": {"vacias_tras_meses": 0},
+    "vacias_movidas": {"vacias_tras_meses": 1, "vacias_intermedias": 3},
+    "filas_finales_extra": {"notas": 3},
+    "sin_notas": {"notas": 0},
+    "inicio_a_mitad_de_anio": {"mes_inicio": 7, "marcadores_sin_prefijo": True},
+}
+
+
+@pytest.fixture(autouse=True)
+def sin_logs():
+    logging.disable(logging.INFO)
+    yield
+    logging.disable(logging.NOTSET)
+
+
+def generar(disposicion: Dict, meses: int = 15, semilla: int = 3) -> List[List]:
+    """Filas de una hoja Nacional con la disposición indicada (mismos precios para la misma semilla)."""
+    return generar_hoja(REGIONES_HOJA, PRODUCTOS_HOJA, 2020, meses, 0.0, np.random.default_rng(semilla),
+                        **disposicion)
+
+
+def leer(tmp_path, hojas: Dict[str, List[List]]) -> Dict[str, pd.DataFrame]:
+    """Escribe el libro y lo lee como lo hace el scraper (primera fila como encabezado)."""
+    ruta = str(tmp_path / "libro.xls")
+    escribir_libro(ruta, hojas)
+    return pd.read_excel(ruta, sheet_name=None)
+
+
+def esperado(filas: List[List], anio_inicio: int = 2020, mes_inicio: int = 1) -> pd.DataFrame:
+    """Resultado esperado de la transformación, armado desde las filas escritas."""
+    datos = [fila for fila in filas if fila[0] in REGIONES and fila[1] in PRODUCTOS]
+    fechas = pd.date_range(f"{anio_inicio}-{mes_inicio:02d}-01", periods=len(datos[0]) - 3, freq="MS")
+    registros = [
+        (fila[0], fila[1], fila[2], fecha, float(fila[3 + i]))
+        for i, fecha in enumerate(fechas) for fila in datos
+    ]
+    df = pd.DataFrame(registros, columns=["Región", "Productos seleccionados", "Unidad de medida", "Date", "Price"])
+    series = sorted({(fila[1], fila[0], fila[2]) for fila in datos})
+    ids = {serie: numero for numero, serie in enumerate(series, start=1)}
+    df["product_id"] = [ids[(p, r, u)] for r, p, u in
+                        zip(df["Región"], df["Productos seleccionados"], df["Unidad de medida"])]
+    return compactar(df)
+
+
+def ordenar(df: pd.DataFrame) -> pd.DataFrame:
+    return df.sort_values(["Date", "Región", "Productos seleccionados"]).reset_index(drop=True)
+
+
+def posiciones_esperadas(filas: List[List]) -> Dict:
+    """Filas de la disposición en el índice del DataFrame leído (la primera fila es el encabezado)."""
+    encabezados = next(i for i, fila in enumerate(filas) if fila[0] == "Región")
+    datos = [i for i, fila in enumerate(filas) if fila[0] in REGIONES]
+    vacias = [i for i in range(encabezados + 2, datos[-1]) if all(valor is None for valor in filas[i])]
+    return {
+        "fila_encabezados": encabezados - 1,
+        "fila_meses": encabezados,
+        "fila_ultima": datos[-1] - 1,
+        "filas_vacias": [i - 1 for i in vacias],
+    }
+
+
+@pytest.mark.parametrize("nombre", DISPOSICIONES)
+def test_detectar_disposicion(tmp_path, nombre):
+    disposicion = DISPOSICIONES[nombre]
+    filas = generar(disposicion)
+    df = leer(tmp_path, {"Nacional": filas})["Nacional"]
+
+    detectada = detectar_disposicion(df)
+
+    posiciones = posiciones_esperadas(filas)
+    assert detectada.fila_encabezados == posiciones["fila_encabezados"]
+    assert detectada.fila_meses == posiciones["fila_meses"]
+    assert detectada.fila_ultima == posiciones["fila_ultima"]
+    assert detectada.filas_vacias == posiciones["filas_vacias"]
+    assert detectada.columna_region == 0
+    assert detectada.columnas_meses == list(range(3, 18))
+    mes_inicio = disposicion.get("mes_inicio", 1)
+    # Un marcador en la primera columna y otro en cada enero
+    assert detectada.marcadores_anio == {
+        3 + i: 2020 + (mes_inicio - 1 + i) // 12 for i in range(15) if i == 0 or (mes_inicio - 1 + i) % 12 == 0
+    }
+
+
+@pytest.mark.parametrize("nombre", DISPOSICIONES)
+def test_transformar_disposicion(tmp_path, nombre):
+    disposicion = DISPOSICIONES[nombre]
+    filas = generar(disposicion)
+    df = leer(tmp_path, {"Nacional": filas})["Nacional"]
+
+    resultado = TransformadorDatos(df).identificar_encabezados()
+
+    pd.testing.assert_frame_equal(ordenar(resultado), ordenar(esperado(filas, mes_inicio=disposicion.get("mes_inicio", 1))))
+
+
+def test_filas_en_blanco_movidas_no_cambian_el_resultado(tmp_path):
+    """Los mismos precios con las filas en blanco en otras posiciones dan el mismo DataFrame."""
+    resultados = []
+    for disposicion in ({"vacias_tras_meses": 0}, {"vacias_tras_meses": 3, "vacias_intermedias": 2},
+                        {"filas_titulo": 3, "vacias_tras_meses": 1, "vacias_intermedias": 4, "notas": 3}):
+        df = leer(tmp_path, {"Nacional": generar(disposicion)})["Nacional"]
+        resultados.append(ordenar(TransformadorDatos(df).identificar_encabezados()))
+    for resultado in resultados[1:]:
+        pd.testing.assert_frame_equal(resultado, resultados[0])
+
+
+@pytest.mark.parametrize("semilla", range(4))
+def test_libro_con_peculiaridades(tmp_path, semilla):
+    """Cada hoja de un libro con disposiciones al azar (como varían entre publicaciones)."""
+    ruta = str(tmp_path / "libro.xls")
+    hojas = generar_libro(ruta, anios=2, productos=4, faltantes=0.0, semilla=semilla, peculiaridades=True)
+    leidas = pd.read_excel(ruta, sheet_name=None)
+
+    assert set(leidas) == set(hojas)
+    for nombre, filas in hojas.items():
+        df = leidas[nombre]
+        assert TransformadorDatos.es_hoja_compatible(df)
+        resultado = TransformadorDatos(df).identificar_encabezados()
+        pd.testing.assert_frame_equal(ordenar(resultado), ordenar(esperado(filas, anio_inicio=2017)))
+
+
+def test_precios_faltantes_se_rellenan(tmp_path):
+    filas = generar_hoja(REGIONES_HOJA, PRODUCTOS_HOJA, 2020, 15, 0.2, np.random.default_rng(5))
+    df = leer(tmp_path, {"Nacional": filas})["Nacional"]
+
+    resultado = TransformadorDatos(df).identificar_encabezados()
+
+    assert len(resultado) == len(REGIONES_HOJA) * len(PRODUCTOS_HOJA) * 15
+    assert not resultado["Price"].isna().any()
+    # Los precios publicados no cambian
+    conocidos = esperado([[valor if valor != "///" else np.nan for valor in fila] for fila in filas])
+    conocidos = ordenar(conocidos)
+    publicados = conocidos["Price"].notna()
+    pd.testing.assert_series_equal(ordenar(resultado)["Price"][publicados], conocidos["Price"][publicados])
+
+
+def test_hoja_sin_encabezados(tmp_path):
+    filas = [["Notas metodológicas", None, None], ["Fuente: INDEC", None, None], [None, None, None]]
+    df = leer(tmp_path, {"Notas": filas})["Notas"]
+
+    assert not TransformadorDatos.es_hoja_compatible(df)
+    with pytest.raises(ValueError, match="encabezados"):
+        detectar_disposicion(df)